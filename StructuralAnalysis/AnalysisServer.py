@@ -0,0 +1,469 @@
+"""
+This class is a long-running local analysis server: an asyncio front end accepts model files over HTTP (TCP port or
+Unix socket), queues the first-order elastic analyses onto worker processes and streams the results back. Workers keep
+their recent models factorized; a model is identified by the SHA-256 hash of its tables without the loads (see
+ModelFile), and its jobs go to the worker holding it warm, a new model to the least busy worker.
+Requests (one per connection):
+    POST /analyze with a .npz model file as body: analyzes the model under the loads of its loads table
+    POST /analyze with a JSON body {"model": hash or "path": model file or CSV directory on this machine,
+                                    "loads": [[node, force_1, ..., force_6], ...], "load_case": name}:
+        analyzes a model under the given loads (the loads table of the model if "loads" is missing); node is the
+        id of the node in the model file
+    GET /metrics: JSON of the queue depth, counters, throughput and latency
+The results are streamed as newline-delimited JSON (chunked transfer encoding): a first line with the model hash,
+load case, number of nodes, whether the model was warm and the queue and solve times, followed by blocks of at
+most stream_rows nodes {"node_ids": [...], "displacements": [[dof_1, ..., dof_6], ...], "reactions": [...]}, where
+node_ids are the ids of the model file.
+Errors are returned as JSON {"error": message} with status 400 (invalid model or request, or a body larger than
+max_body bytes), 404 (unknown model hash or path) or 503 (queue full).
+The server only listens on the loopback interface unless another host is given.
+Attributes:
+    self.workers: number of worker processes (default: one per core)
+    self.models_per_worker: number of warm models kept by every worker (least recently used ones are dropped)
+    self.max_models: number of model files kept by the server to reload models dropped by the workers
+    self.max_queue: number of queued jobs beyond which new jobs are refused
+    self.stream_rows: number of nodes per streamed block
+    self.max_body: largest accepted request body in bytes
+Properties:
+    self.queue_depth: number of jobs waiting for a worker
+    self.metrics: dict of the queue depth, running jobs, submitted, completed, failed and warm jobs, throughput
+                  (jobs per second since start and over the last minute) and latency (mean, p50, p95, max seconds
+                  over the last 1000 jobs)
+Methods:
+    await self.start(host, port, path): starts the worker processes and listens on host:port, or on the Unix socket
+                                        path if it is given
+    await self.serve_forever()
+    await self.analyze(source, key, loads): runs one job and returns (key, warm, queue seconds, solve seconds,
+                                            node_ids, displacements, reactions)
+    await self.close(): stops listening and stops the workers
+
+Functions:
+    serve(host, port, path, workers, models_per_worker): runs a server until interrupted
+    model_key(source): returns (key, loads table) of a model file given as bytes (.npz) or as a path
+"""
+
+
+import io
+import os
+import json
+import signal
+import time
+import asyncio
+import hashlib
+import argparse
+import tempfile
+import multiprocessing
+from collections import OrderedDict, deque
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlsplit
+import numpy as np
+from StructuralAnalysis.ModelFile import read_model
+from StructuralAnalysis.ElasticSystem import ElasticSystem
+
+REASONS = {200: 'OK', 400: 'Bad Request', 404: 'Not Found', 405: 'Method Not Allowed', 503: 'Service Unavailable'}
+
+
+class UnknownModel(KeyError):
+    pass
+
+
+class AnalysisServer:
+
+    def __init__(self, workers=None, models_per_worker=8, max_models=64, max_queue=1000, stream_rows=1000,
+                 max_body=2 ** 30):
+        self.workers = workers or os.cpu_count() or 1
+        self.models_per_worker = models_per_worker
+        self.max_models = max_models
+        self.max_queue = max_queue
+        self.stream_rows = stream_rows
+        self.max_body = max_body
+        self.__server = None
+        self.__path = None
+        self.__processes = []
+        self.__queues = []
+        self.__dispatchers = []
+        self.__threads = None
+        # model files by key, and the keys every worker holds warm (the workers drop them in the same order)
+        self.__sources = OrderedDict()
+        self.__warm = []
+        self.__affinity = {}
+        self.__running = 0
+        self.__started = time.monotonic()
+        self.__counters = {'submitted': 0, 'completed': 0, 'failed': 0, 'warm': 0, 'rejected': 0}
+        self.__finished = deque(maxlen=1000)
+
+    @property
+    def queue_depth(self):
+        return sum(queue.qsize() for queue in self.__queues)
+
+    @property
+    def metrics(self):
+        now = time.monotonic()
+        uptime = now - self.__started
+        latencies = np.array([latency for _, latency in self.__finished])
+        recent = sum(1 for finished, _ in self.__finished if now - finished <= 60)
+        latency = {'mean': None, 'p50': None, 'p95': None, 'max': None}
+        if len(latencies):
+            latency = {'mean': float(latencies.mean()), 'p50': float(np.percentile(latencies, 50)),
+                       'p95': float(np.percentile(latencies, 95)), 'max': float(latencies.max())}
+        return dict(self.__counters, queue_depth=self.queue_depth, running=self.__running, workers=self.workers,
+                    models=len(self.__sources), uptime=uptime,
+                    throughput=self.__counters['completed'] / uptime if uptime > 0 else 0.0,
+                    recent_throughput=recent / min(60.0, uptime) if uptime > 0 else 0.0, latency=latency)
+
+    async def start(self, host='127.0.0.1', port=8765, path=None):
+        context = multiprocessing.get_context()
+        self.__threads = ThreadPoolExecutor(max_workers=self.workers + 1)
+        for worker in range(self.workers):
+            parent_connection, child_connection = context.Pipe()
+            process = context.Process(target=_service_worker,
+                                      args=(child_connection, self.models_per_worker, parent_connection), daemon=True)
+            process.start()
+            child_connection.close()
+            self.__processes.append((process, parent_connection))
+            self.__queues.append(asyncio.Queue())
+            self.__warm.append(OrderedDict())
+            self.__dispatchers.append(asyncio.ensure_future(self.__dispatch(worker)))
+        self.__started = time.monotonic()
+        if path is not None:
+            self.__path = path
+            self.__server = await asyncio.start_unix_server(self.__handle, path=path)
+        else:
+            self.__server = await asyncio.start_server(self.__handle, host, port)
+        return self.__server
+
+    async def serve_forever(self):
+        async with self.__server:
+            await self.__server.serve_forever()
+
+    async def close(self):
+        if self.__server is not None:
+            self.__server.close()
+            await self.__server.wait_closed()
+        for dispatcher in self.__dispatchers:
+            dispatcher.cancel()
+        for process, connection in self.__processes:
+            try:
+                connection.send(None)
+            except (OSError, ValueError):
+                pass
+        for process, connection in self.__processes:
+            process.join(timeout=5)
+            if process.is_alive():
+                process.terminate()
+            connection.close()
+        self.__processes = []
+        self.__dispatchers = []
+        if self.__threads is not None:
+            self.__threads.shutdown(wait=False)
+        if self.__path is not None and os.path.exists(self.__path):
+            os.remove(self.__path)
+
+    async def analyze(self, source=None, key=None, loads=None):
+        """
+        runs a job on a model given by its file (bytes of a .npz file, or a path) or by the key of a model submitted
+        before; loads is an array (rows, 7) of node ids and forces, the loads table of the model file if None
+        """
+        loop = asyncio.get_running_loop()
+        if source is not None:
+            key, model_loads = await loop.run_in_executor(self.__threads, model_key, source)
+            self.__sources[key] = source
+            if loads is None:
+                loads = model_loads
+        elif key not in self.__sources:
+            raise UnknownModel(key)
+        elif loads is None:
+            _, loads = await loop.run_in_executor(self.__threads, model_key, self.__sources[key])
+        self.__sources.move_to_end(key)
+        while len(self.__sources) > self.max_models:
+            self.__sources.popitem(last=False)
+        if self.queue_depth >= self.max_queue:
+            self.__counters['rejected'] += 1
+            raise OverflowError('The job queue is full.')
+
+        worker = self.__affinity.get(key)
+        if worker is None:
+            worker = min(range(self.workers), key=lambda i: self.__queues[i].qsize())
+            self.__affinity[key] = worker
+        future = loop.create_future()
+        self.__counters['submitted'] += 1
+        await self.__queues[worker].put((key, np.asarray(loads, dtype=float).reshape(-1, 7), future,
+                                         time.monotonic()))
+        return await future
+
+    async def __dispatch(self, worker):
+        loop = asyncio.get_running_loop()
+        process, connection = self.__processes[worker]
+        warm = self.__warm[worker]
+        while True:
+            key, loads, future, submitted = await self.__queues[worker].get()
+            self.__running += 1
+            try:
+                # the model file is only sent when the worker does not hold the model
+                source = None
+                if key in warm:
+                    warm.move_to_end(key)
+                else:
+                    source = self.__sources.get(key)
+                    warm[key] = True
+                    while len(warm) > self.models_per_worker:
+                        dropped, _ = warm.popitem(last=False)
+                        if self.__affinity.get(dropped) == worker:
+                            del self.__affinity[dropped]
+                await loop.run_in_executor(self.__threads, connection.send, (key, source, loads))
+                reply = await loop.run_in_executor(self.__threads, connection.recv)
+            except (OSError, EOFError) as error:
+                reply = ('error', 'The worker stopped: %s' % error)
+            finally:
+                self.__running -= 1
+
+            if reply[0] == 'error':
+                warm.pop(key, None)
+                self.__counters['failed'] += 1
+                if not future.done():
+                    future.set_exception(ValueError(reply[1]))
+                continue
+            _, was_warm, seconds, node_ids, displacements, reactions = reply
+            self.__counters['completed'] += 1
+            self.__counters['warm'] += was_warm
+            finished = time.monotonic()
+            self.__finished.append((finished, finished - submitted))
+            if not future.done():
+                future.set_result((key, was_warm, finished - submitted - seconds, seconds, node_ids,
+                                   displacements, reactions))
+
+    async def __handle(self, reader, writer):
+        try:
+            try:
+                request = await self.__read_request(reader)
+            except ValueError as error:
+                await self.__respond(writer, 400, {'error': 'Malformed request: %s' % error})
+                return
+            if request is None:
+                return
+            method, target, headers, body = request
+            route = urlsplit(target).path
+            if route == '/metrics' and method == 'GET':
+                await self.__respond(writer, 200, self.metrics)
+            elif route == '/analyze' and method == 'POST':
+                await self.__analyze_request(writer, headers, body)
+            elif route in ('/metrics', '/analyze'):
+                await self.__respond(writer, 405, {'error': 'Method %s is not allowed on %s.' % (method, route)})
+            else:
+                await self.__respond(writer, 404, {'error': 'Unknown route %s.' % route})
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+    async def __analyze_request(self, writer, headers, body):
+        load_case = 'default'
+        try:
+            if headers.get('content-type', '').startswith('application/json'):
+                request = json.loads(body)
+                if not isinstance(request, dict):
+                    raise ValueError('The JSON body must be an object.')
+                for name in ('path', 'model', 'load_case'):
+                    if name in request and not isinstance(request[name], str):
+                        raise ValueError('"%s" must be a string.' % name)
+                if 'path' not in request and 'model' not in request:
+                    raise ValueError('The JSON body must give a "path" or a "model".')
+                load_case = request.get('load_case', load_case)
+                loads = request.get('loads')
+                if loads is not None:
+                    loads = np.array(loads, dtype=float).reshape(-1, 7)
+                if 'path' in request:
+                    if not os.path.exists(request['path']):
+                        raise UnknownModel(request['path'])
+                    result = await self.analyze(source=request['path'], loads=loads)
+                else:
+                    result = await self.analyze(key=request.get('model'), loads=loads)
+            else:
+                result = await self.analyze(source=body)
+        except UnknownModel as error:
+            await self.__respond(writer, 404, {'error': 'Unknown model %s.' % error.args[0]})
+            return
+        except OverflowError as error:
+            await self.__respond(writer, 503, {'error': str(error)})
+            return
+        except (ValueError, TypeError, KeyError, OSError) as error:
+            await self.__respond(writer, 400, {'error': str(error)})
+            return
+
+        key, warm, queue_seconds, solve_seconds, node_ids, displacements, reactions = result
+        writer.write(b'HTTP/1.1 200 OK\r\nContent-Type: application/x-ndjson\r\nTransfer-Encoding: chunked\r\n'
+                     b'Connection: close\r\n\r\n')
+        header = {'model': key, 'load_case': load_case, 'nodes': len(node_ids), 'warm': bool(warm),
+                  'queue_seconds': queue_seconds, 'solve_seconds': solve_seconds}
+        await self.__write_chunk(writer, header)
+        for start in range(0, len(node_ids), self.stream_rows):
+            rows = slice(start, start + self.stream_rows)
+            await self.__write_chunk(writer, {'node_ids': node_ids[rows].tolist(),
+                                              'displacements': displacements[rows].tolist(),
+                                              'reactions': reactions[rows].tolist()})
+        writer.write(b'0\r\n\r\n')
+        await writer.drain()
+
+    async def __read_request(self, reader):
+        request_line = await reader.readline()
+        if not request_line:
+            return None
+        method, target, _ = request_line.decode('latin-1').split(' ', 2)
+        headers = {}
+        while True:
+            line = await reader.readline()
+            if line in (b'\r\n', b'\n', b''):
+                break
+            name, _, value = line.decode('latin-1').partition(':')
+            headers[name.strip().lower()] = value.strip()
+        length = int(headers.get('content-length', 0))
+        if length < 0 or length > self.max_body:
+            raise ValueError('the body must have between 0 and %d bytes.' % self.max_body)
+        body = await reader.readexactly(length)
+        return method.upper(), target, headers, body
+
+    async def __respond(self, writer, status, content):
+        data = json.dumps(content).encode()
+        writer.write(b'HTTP/1.1 %d %s\r\nContent-Type: application/json\r\nContent-Length: %d\r\n'
+                     b'Connection: close\r\n\r\n' % (status, REASONS[status].encode(), len(data)) + data)
+        await writer.drain()
+
+    async def __write_chunk(self, writer, content):
+        data = json.dumps(content).encode() + b'\n'
+        writer.write(b'%x\r\n%s\r\n' % (len(data), data))
+        await writer.drain()
+
+
+def serve(host='127.0.0.1', port=8765, path=None, workers=None, models_per_worker=8):
+    async def run():
+        server = AnalysisServer(workers, models_per_worker)
+        await server.start(host, port, path)
+        try:
+            asyncio.get_running_loop().add_signal_handler(signal.SIGTERM, asyncio.current_task().cancel)
+        except (NotImplementedError, AttributeError):
+            pass
+        try:
+            await server.serve_forever()
+        except asyncio.CancelledError:
+            pass
+        finally:
+            await server.close()
+
+    try:
+        asyncio.run(run())
+    except KeyboardInterrupt:
+        pass
+
+
+def model_key(source):
+    """
+    returns (key, loads) of a model file given as the bytes of a .npz file or as the path of a .npz file or of a CSV
+    directory; the key hashes every table but the loads, so the loads of a model do not change its key
+    """
+    if isinstance(source, (bytes, bytearray)):
+        try:
+            with np.load(io.BytesIO(source)) as data:
+                tables = {name: data[name] for name in data.files}
+        except (OSError, ValueError, AttributeError):
+            raise ValueError('The request body is not a .npz model file.')
+    elif str(source).endswith('.npz'):
+        with np.load(source) as data:
+            tables = {name: data[name] for name in data.files}
+    else:
+        tables = {}
+        for name in sorted(os.listdir(source)):
+            if name.endswith('.csv'):
+                with open(os.path.join(source, name), 'rb') as file:
+                    tables[name[:-4]] = file.read()
+        if 'loads' in tables:
+            tables['loads'] = np.loadtxt(io.BytesIO(tables['loads']), delimiter=',', skiprows=1, ndmin=2)
+
+    loads = np.asarray(tables.pop('loads', np.zeros((0, 7))), dtype=float).reshape(-1, 7)
+    digest = hashlib.sha256()
+    for name in sorted(tables):
+        table = tables[name]
+        if isinstance(table, bytes):
+            digest.update(('%s:csv' % name).encode())
+            digest.update(table)
+            continue
+        array = np.ascontiguousarray(table)
+        digest.update(('%s:%s:%s' % (name, array.dtype.str, array.shape)).encode())
+        digest.update(array.tobytes() if array.dtype != object else repr(array.tolist()).encode())
+    return digest.hexdigest(), loads
+
+
+def _service_worker(connection, models_per_worker, parent_connection=None):
+    # a forked worker closes its copy of the server end so it stops when the server does
+    if parent_connection is not None:
+        parent_connection.close()
+    models = OrderedDict()
+    while True:
+        try:
+            job = connection.recv()
+        except EOFError:
+            break
+        if job is None:
+            break
+        key, source, loads = job
+        start = time.perf_counter()
+        try:
+            warm = source is None and key in models
+            if warm:
+                models.move_to_end(key)
+            elif source is None:
+                raise ValueError('The model %s is no longer available, submit its model file again.' % key)
+            else:
+                models[key] = __load_model(source)
+                while len(models) > models_per_worker:
+                    models.popitem(last=False)
+            displacements, reactions = __solve_load_case(models[key], loads)
+        except Exception as error:
+            models.pop(key, None)
+            connection.send(('error', '%s: %s' % (type(error).__name__, error)))
+            continue
+        connection.send(('ok', warm, time.perf_counter() - start, models[key]['node_ids'], displacements,
+                         reactions))
+    connection.close()
+
+
+def __load_model(source):
+    """assembles and factorizes a model file as an ElasticSystem"""
+    if isinstance(source, (bytes, bytearray)):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'model.npz')
+            with open(path, 'wb') as file:
+                file.write(source)
+            structure, nodes, _ = read_model(path, return_ids=True)
+    else:
+        structure, nodes, _ = read_model(source, return_ids=True)
+    system = ElasticSystem(structure)
+    if system.singular:
+        raise ValueError('Matrix is singular or ill-conditioned! Check for stability.')
+    # the file ids of the nodes of the structure (nodes without elements are not part of it), ordered as its rows
+    file_ids = {node: node_id for node_id, node in nodes.items()}
+    node_ids = np.array([file_ids[node] for node in structure.nodes], dtype=np.int64)
+    order = np.argsort(node_ids)
+    return {'system': system, 'settlements': system.node_settlements(), 'node_ids': node_ids,
+            'sorted_ids': node_ids[order], 'sorted_rows': order}
+
+
+def __solve_load_case(model, loads):
+    """returns the (nodes, 6) displacements and reactions of a warm model under a loads table of file node ids"""
+    sorted_ids = model['sorted_ids']
+    node_loads = np.zeros((len(sorted_ids), 6))
+    ids = loads[:, 0].astype(np.int64)
+    positions = np.minimum(np.searchsorted(sorted_ids, ids), max(len(sorted_ids) - 1, 0))
+    if len(ids) and not (sorted_ids[positions] == ids).all():
+        raise ValueError('The loads refer to nodes that are not in the model.')
+    np.add.at(node_loads, model['sorted_rows'][positions], loads[:, 1:])
+    return model['system'].solve_load_cases(node_loads, model['settlements'])
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Local analysis server.')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--unix-socket', default=None, help='listen on this Unix socket instead of a TCP port')
+    parser.add_argument('--workers', type=int, default=None)
+    parser.add_argument('--models-per-worker', type=int, default=8)
+    arguments = parser.parse_args()
+    serve(arguments.host, arguments.port, arguments.unix_socket, arguments.workers, arguments.models_per_worker)
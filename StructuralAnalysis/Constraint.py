@@ -0,0 +1,85 @@
+"""
+Constraint class is an abstract class of kinematic (master-slave) constraints between nodes.
+A constraint ties degrees of freedom of slave nodes to the degrees of freedom of a master node. The slave degrees of
+freedom are eliminated before the stiffness matrix is factorized (see __SolverHelper.constraint_transformation) and
+their displacements are recovered after the solution.
+Methods(abstract):
+    equations: list of (slave dof, [(master dof, coefficient), ...]) where
+               slave dof displacement = sum(coefficient * master dof displacement)
+
+Derived classes:
+    RigidDiaphragm: slave nodes move as a rigid body in the plane normal to a global axis (y-axis by default)
+    RigidLink: slave node moves as a rigid body with the master node (6 degrees of freedom)
+    EqualDOF: the chosen degrees of freedom of the slave nodes are equal to those of the master node
+"""
+
+
+from abc import ABC, abstractmethod
+from StructuralAnalysis.Node import Node
+
+
+class Constraint(ABC):
+
+    def __init__(self, master_node: Node, slave_nodes: [Node]):
+        self.master_node = master_node
+        self.slave_nodes = list(slave_nodes)
+
+    @property
+    def nodes(self):
+        return [self.master_node] + self.slave_nodes
+
+    @abstractmethod
+    def equations(self):
+        pass
+
+    def _rigid_body_equation(self, slave_node, dof_number):
+        """displacement of slave_node along dof_number (1 to 6) for a rigid body rotating about the master node"""
+        master = self.master_node
+        dof = getattr(slave_node, 'dof_%d' % dof_number)
+        if dof_number > 3:
+            return dof, [(getattr(master, 'dof_%d' % dof_number), 1)]
+        arm = [slave_node.x - master.x, slave_node.y - master.y, slave_node.z - master.z]
+        # translation + rotation x arm
+        i, j, k = dof_number - 1, dof_number % 3, (dof_number + 1) % 3
+        terms = [(getattr(master, 'dof_%d' % dof_number), 1),
+                 (getattr(master, 'dof_%d' % (j + 4)), arm[k]),
+                 (getattr(master, 'dof_%d' % (k + 4)), -arm[j])]
+        return dof, [(master_dof, coefficient) for master_dof, coefficient in terms if coefficient != 0]
+
+
+class RigidDiaphragm(Constraint):
+
+    def __init__(self, master_node: Node, slave_nodes: [Node], normal_axis=2):
+        super().__init__(master_node, slave_nodes)
+        self.normal_axis = normal_axis
+
+    def equations(self):
+        in_plane = [axis for axis in (1, 2, 3) if axis != self.normal_axis] + [self.normal_axis + 3]
+        master_dofs = [getattr(self.master_node, 'dof_%d' % number) for number in in_plane]
+        equations = []
+        for node in self.slave_nodes:
+            for dof_number in in_plane:
+                dof, terms = self._rigid_body_equation(node, dof_number)
+                equations.append((dof, [(master_dof, coefficient) for master_dof, coefficient in terms
+                                        if master_dof in master_dofs]))
+        return equations
+
+
+class RigidLink(Constraint):
+
+    def __init__(self, master_node: Node, slave_node: Node):
+        super().__init__(master_node, [slave_node])
+
+    def equations(self):
+        return [self._rigid_body_equation(self.slave_nodes[0], dof_number) for dof_number in range(1, 7)]
+
+
+class EqualDOF(Constraint):
+
+    def __init__(self, master_node: Node, slave_nodes: [Node], dof_numbers=(1, 2, 3)):
+        super().__init__(master_node, slave_nodes)
+        self.dof_numbers = tuple(dof_numbers)
+
+    def equations(self):
+        return [(getattr(node, 'dof_%d' % number), [(getattr(self.master_node, 'dof_%d' % number), 1)])
+                for node in self.slave_nodes for number in self.dof_numbers]
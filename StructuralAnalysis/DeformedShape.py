@@ -0,0 +1,170 @@
+"""
+This class computes the undeformed and deformed geometry of all the line elements of a structure at
+number_of_stations + 1 equally spaced stations per element in one vectorized pass. It does not depend on Qt and is
+used by Visualization (and by anything else drawing the structure).
+The station displacements use the shape functions of the elements (Hermitian cubic for frame elements, linear for
+truss elements). The shape functions only depend on the station position and the element length, so they are
+tabulated once per number of stations (shape_function_tables) and every deformed shape is a batched product of
+these tables with the end displacements of the elements.
+Condensed elements (SuperElement, ReducedElement) have no geometry of their own and are not drawn.
+Attributes:
+    self.structure: the drawn structure
+    self.elements: list of the drawn elements, ordered as the rows of the arrays
+    self.number_of_stations: number of segments per element
+    self.rotations: array (elements, 3, 3) from the global to the local axes
+    self.coordinates: array (elements, stations, 3) of the undeformed global coordinates of the stations
+Methods:
+    self.node_displacements(): array (nodes, 6) of the displacements stored in the degrees of freedom, rows ordered
+                               as structure.nodes (the layout of Results.displacements)
+    self.displacements(node_displacements=None): array (elements, stations, 3) of the global station
+                                                 displacements, from the degrees of freedom if not given
+    self.positions(scale, node_displacements=None, out=None): coordinates + scale * displacements
+    self.segments(points): (elements * number_of_stations * 2, 3) vertex array of the line segments joining the
+                           consecutive stations of points (elements, stations, 3), for line-segment rendering
+    self.write_segments(scale, node_displacements, out): writes the segments of the deformed shape into the vertex
+                                                         array out with one batched product by self.frame_matrices,
+                                                         used to play animations frame by frame
+Properties:
+    self.frame_matrices: array (elements, stations * 3, 12) from the displacements of the nodes of an element
+                         (dof_1 to dof_6 of the start and end nodes) to the global displacements of its stations,
+                         computed on first use
+
+Functions:
+    shape_function_tables(number_of_stations): returns (frame, truss) tables of shape (stations, 3, 12, 2)
+"""
+
+
+from functools import lru_cache, cached_property
+import numpy as np
+from StructuralAnalysis.FrameElements import FrameElement, TrussElement, TwoDimensionalFrameElement, \
+    TwoDimensionalTrussElement
+from StructuralAnalysis.MemberForces import rotation_matrices
+
+FRAME_ELEMENTS = (FrameElement, TwoDimensionalFrameElement)
+TRUSS_ELEMENTS = (TrussElement, TwoDimensionalTrussElement)
+
+
+class DeformedShape:
+
+    def __init__(self, structure, number_of_stations=10):
+        self.structure = structure
+        self.elements = [element for element in structure.elements
+                         if isinstance(element, FRAME_ELEMENTS + TRUSS_ELEMENTS)]
+        self.number_of_stations = number_of_stations
+        rows = {node: i for i, node in enumerate(structure.nodes)}
+        self.__start_rows = np.array([rows[element.start_node] for element in self.elements], dtype=int)
+        self.__end_rows = np.array([rows[element.end_node] for element in self.elements], dtype=int)
+        self.__frame_elements = np.array([isinstance(element, FRAME_ELEMENTS) for element in self.elements],
+                                         dtype=bool)
+        self.__truss_elements = np.array([isinstance(element, TRUSS_ELEMENTS) for element in self.elements],
+                                         dtype=bool)
+
+        node_coordinates = np.array([[node.x, node.y, node.z] for node in structure.nodes],
+                                    dtype=float).reshape(-1, 3)
+        start = node_coordinates[self.__start_rows]
+        end = node_coordinates[self.__end_rows]
+        self.__lengths = np.linalg.norm(end - start, axis=1)
+        self.rotations = rotation_matrices(start, end)
+        ratios = np.linspace(0, 1, number_of_stations + 1)[np.newaxis, :, np.newaxis]
+        self.coordinates = start[:, np.newaxis] + ratios * (end - start)[:, np.newaxis]
+
+    @cached_property
+    def frame_matrices(self):
+        frame, truss = shape_function_tables(self.number_of_stations)
+        # linear interpolation of the translations gives the same matrix in the local and in the global axes
+        matrices = np.empty((len(self.elements),) + truss.shape[:-1])
+        matrices[:] = truss[..., 0]
+        mask = self.__frame_elements
+        if np.any(mask):
+            rotations = self.rotations[mask]
+            blocks = np.zeros((len(rotations), 12, 12))
+            for i in range(4):
+                blocks[:, i * 3:(i + 1) * 3, i * 3:(i + 1) * 3] = rotations
+            local = frame[np.newaxis, ..., 0] + self.__lengths[mask, np.newaxis, np.newaxis, np.newaxis] * \
+                frame[np.newaxis, ..., 1]
+            matrices[mask] = np.einsum('nki,nskl,nlm->nsim', rotations, local, blocks, optimize=True)
+        return matrices.reshape(len(self.elements), -1, 12)
+
+    def write_segments(self, scale, node_displacements, out):
+        node_displacements = np.asarray(node_displacements, dtype=float)
+        end_displacements = np.hstack([node_displacements[self.__start_rows], node_displacements[self.__end_rows]])
+        stations = np.matmul(self.frame_matrices, end_displacements[:, :, np.newaxis])
+        stations = stations.reshape(self.coordinates.shape)
+        stations *= scale
+        stations += self.coordinates
+        segments = out.reshape(len(self.elements), self.number_of_stations, 2, 3)
+        segments[:, :, 0] = stations[:, :-1]
+        segments[:, :, 1] = stations[:, 1:]
+        return out
+
+    def node_displacements(self):
+        return np.array([[getattr(node, 'dof_%d' % number).displacement for number in range(1, 7)]
+                         for node in self.structure.nodes], dtype=float).reshape(-1, 6)
+
+    def displacements(self, node_displacements=None):
+        if node_displacements is None:
+            node_displacements = self.node_displacements()
+        node_displacements = np.asarray(node_displacements, dtype=float)
+        start = node_displacements[self.__start_rows]
+        end = node_displacements[self.__end_rows]
+        # straight lines between the displaced nodes, replaced by the shape functions where they exist
+        ratios = np.linspace(0, 1, self.number_of_stations + 1)[np.newaxis, :, np.newaxis]
+        displacements = start[:, np.newaxis, :3] + ratios * (end - start)[:, np.newaxis, :3]
+
+        frame, truss = shape_function_tables(self.number_of_stations)
+        for mask, table in ((self.__frame_elements, frame), (self.__truss_elements, truss)):
+            if not np.any(mask):
+                continue
+            rotations = self.rotations[mask]
+            # global to local end displacements, 4 blocks of 3 per element
+            end_displacements = np.concatenate([start[mask], end[mask]], axis=1).reshape(-1, 4, 3)
+            local = np.einsum('nij,nbj->nbi', rotations, end_displacements).reshape(-1, 12)
+            lengths = self.__lengths[mask]
+            local_stations = np.einsum('sijk,nj,nk->nsi', table, local, np.stack([np.ones_like(lengths), lengths],
+                                                                                  axis=1))
+            displacements[mask] = np.einsum('nji,nsj->nsi', rotations, local_stations)
+        return displacements
+
+    def positions(self, scale, node_displacements=None, out=None):
+        displacements = self.displacements(node_displacements)
+        return np.add(self.coordinates, np.multiply(displacements, scale, out=displacements), out=out)
+
+    def segments(self, points):
+        return np.stack([points[:, :-1], points[:, 1:]], axis=2).reshape(-1, 3)
+
+
+@lru_cache(maxsize=None)
+def shape_function_tables(number_of_stations):
+    """
+    returns the shape functions of the frame elements (FrameElement.shape_function_matrix) and of the truss elements
+    at number_of_stations + 1 stations as tables (stations, 3 local translations, 12 local end displacements, 2);
+    the last index holds the part independent of the element length and the part proportional to it, so
+    local station displacements = table[..., 0] * u + length * table[..., 1] * u
+    """
+    ratio = np.linspace(0, 1, number_of_stations + 1)
+    n1 = 1 - ratio
+    n2 = ratio
+    n3 = 1 - 3 * ratio ** 2 + 2 * ratio ** 3
+    n4 = 3 * ratio ** 2 - 2 * ratio ** 3
+    n5 = ratio * (1 - ratio) ** 2
+    n6 = ratio ** 3 - ratio ** 2
+
+    frame = np.zeros((len(ratio), 3, 12, 2))
+    frame[:, 0, 0, 0] = n1
+    frame[:, 0, 6, 0] = n2
+    frame[:, 1, 1, 0] = n3
+    frame[:, 1, 7, 0] = n4
+    frame[:, 1, 5, 1] = n5
+    frame[:, 1, 11, 1] = n6
+    frame[:, 2, 2, 0] = n3
+    frame[:, 2, 8, 0] = n4
+    frame[:, 2, 4, 1] = -n5
+    frame[:, 2, 10, 1] = -n6
+
+    truss = np.zeros((len(ratio), 3, 12, 2))
+    for i in range(3):
+        truss[:, i, i, 0] = n1
+        truss[:, i, i + 6, 0] = n2
+    frame.setflags(write=False)
+    truss.setflags(write=False)
+    return frame, truss
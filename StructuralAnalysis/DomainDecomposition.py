@@ -0,0 +1,262 @@
+"""
+First-order elastic solution by domain decomposition (Schur complement) across worker processes.
+The elements of the structure are partitioned into subdomains by recursive coordinate bisection of the element
+centroids. A degree of freedom shared by elements of different subdomains is an interface degree of freedom, every
+other free degree of freedom is interior to one subdomain.
+The degree of freedom map, the forces and the settlements are placed once in shared memory. Every subdomain is
+handled by its own worker process, which receives its elements and:
+    1. computes the matrices of its elements and assembles them as a sparse matrix (sparse_elastic_matrix),
+    2. factorizes its interior block Kii,
+    3. returns its contribution to the interface Schur complement Kbb - Kbi * inverse(Kii) * Kib and to the
+       condensed interface forces,
+    4. once the interface displacements are solved for, back-substitutes its interior displacements directly into
+       the shared displacement array and returns its contribution to the reactions.
+The main process assembles the contributions into a sparse interface matrix and factorizes it with a sparse LU, so
+no process ever holds the factorization of the whole structure. Structures with constraints are not supported.
+
+Functions:
+    partition_elements(structure, number_of_subdomains): list of subdomain numbers ordered as structure.elements
+    solve(structure, number_of_subdomains): returns (displacements, reactions) ordered as
+                                            structure.free_degrees_of_freedom and
+                                            structure.restrained_degrees_of_freedom, or None if the structure is
+                                            unstable
+"""
+
+
+import os
+import numpy as np
+import multiprocessing
+from multiprocessing import shared_memory
+from scipy.sparse import coo_matrix
+from scipy.sparse.linalg import splu
+from StructuralAnalysis.Structure import Structure
+from StructuralAnalysis.Factorization import Factorization
+from StructuralAnalysis.__SolverHelper import element_load_vector, sparse_elastic_matrix
+
+_FREE = 0
+_INTERFACE = 1
+_RESTRAINED = 2
+
+
+def partition_elements(structure: Structure, number_of_subdomains):
+    centroids = np.array([np.mean([[node.x, node.y, node.z] for node in element.nodes], axis=0)
+                          for element in structure.elements])
+    subdomains = np.zeros(len(centroids), dtype=int)
+
+    def bisect(indices, first, count):
+        if count == 1 or len(indices) <= 1:
+            subdomains[indices] = first
+            return
+        spread = np.ptp(centroids[indices], axis=0)
+        order = indices[np.argsort(centroids[indices, np.argmax(spread)], kind='stable')]
+        lower = count // 2
+        split = len(order) * lower // count
+        bisect(order[:split], first, lower)
+        bisect(order[split:], first + lower, count - lower)
+
+    bisect(np.arange(len(centroids)), 0, max(1, min(number_of_subdomains, len(centroids))))
+    return subdomains
+
+
+def solve(structure: Structure, number_of_subdomains=None):
+    if structure.constraints:
+        raise ValueError("Structures with constraints are not supported by domain decomposition.")
+    if number_of_subdomains is None:
+        number_of_subdomains = os.cpu_count() or 1
+    subdomains = partition_elements(structure, number_of_subdomains)
+    number_of_subdomains = int(subdomains.max()) + 1
+    no_dof = structure.no_of_degrees_of_freedom
+    indices = structure.dof_indices
+    element_indices = [np.array([indices[dof] for dof in element.degrees_of_freedom], dtype=np.int64)
+                       for element in structure.elements]
+
+    # a free degree of freedom touched by more than one subdomain is on the interface
+    owners = np.full(no_dof, -1)
+    dof_map = np.full(no_dof, _FREE)
+    for ids, subdomain in zip(element_indices, subdomains):
+        shared = (owners[ids] != -1) & (owners[ids] != subdomain)
+        dof_map[ids[shared]] = _INTERFACE
+        owners[ids] = subdomain
+    restrained = np.array([indices[dof] for dof in structure.restrained_degrees_of_freedom], dtype=np.int64)
+    free = np.array([indices[dof] for dof in structure.free_degrees_of_freedom], dtype=np.int64)
+    dof_map[restrained] = _RESTRAINED
+
+    forces = np.zeros(no_dof)
+    forces[free] = [dof.force for dof in structure.free_degrees_of_freedom]
+    equivalent_forces = element_load_vector(structure)
+    if equivalent_forces is not None:
+        forces += equivalent_forces
+    settlements = np.zeros(no_dof)
+    settlements[restrained] = [dof.displacement for dof in structure.restrained_degrees_of_freedom]
+
+    shared_arrays = {}
+    workers = []
+    try:
+        descriptors = {}
+        for name, array in (('dof_map', dof_map), ('forces', forces), ('settlements', settlements),
+                            ('displacements', settlements.copy())):
+            shared_arrays[name], descriptors[name] = _share(array)
+
+        context = multiprocessing.get_context()
+        for subdomain in range(number_of_subdomains):
+            members = np.flatnonzero(subdomains == subdomain)
+            parent_connection, child_connection = context.Pipe()
+            process = context.Process(target=_subdomain_worker,
+                                      args=(child_connection, descriptors, [structure.elements[e] for e in members],
+                                            [element_indices[e] for e in members]),
+                                      daemon=True)
+            process.start()
+            child_connection.close()
+            workers.append((process, parent_connection))
+
+        interface = np.flatnonzero(dof_map == _INTERFACE)
+        interface_index = np.full(no_dof, -1)
+        interface_index[interface] = np.arange(len(interface))
+        rows, columns, values = [], [], []
+        interface_forces = forces[interface].copy()
+        singular = False
+        for process, connection in workers:
+            contribution = _receive(connection)
+            if contribution is None:
+                # the interior of a subdomain is a mechanism, so is the structure
+                singular = True
+                continue
+            local_interface, local_schur_complement, local_forces = contribution
+            local_index = interface_index[local_interface]
+            rows.append(np.repeat(local_index, len(local_index)))
+            columns.append(np.tile(local_index, len(local_index)))
+            values.append(np.ravel(local_schur_complement))
+            interface_forces[local_index] += local_forces
+
+        interface_displacements = np.zeros(0)
+        if not singular and len(interface):
+            schur_complement = coo_matrix((np.concatenate(values), (np.concatenate(rows), np.concatenate(columns))),
+                                          shape=(len(interface), len(interface))).tocsc()
+            factorization = _factorize(schur_complement)
+            if factorization is None:
+                singular = True
+            else:
+                interface_displacements = factorization.solve(interface_forces)
+        for process, connection in workers:
+            connection.send(None if singular else interface_displacements)
+        if singular:
+            for process, connection in workers:
+                connection.close()
+                process.join()
+            return None
+
+        all_reactions = np.zeros(no_dof)
+        for process, connection in workers:
+            local_restrained, local_reactions = _receive(connection)
+            all_reactions[local_restrained] += local_reactions
+            connection.close()
+            process.join()
+
+        all_displacements = np.ndarray(settlements.shape, dtype=float,
+                                       buffer=shared_arrays['displacements'].buf).copy()
+        all_displacements[interface] = interface_displacements
+    finally:
+        for process, connection in workers:
+            if process.is_alive():
+                process.terminate()
+        for memory in shared_arrays.values():
+            memory.close()
+            memory.unlink()
+
+    if equivalent_forces is not None:
+        all_reactions -= equivalent_forces
+    return all_displacements[free], all_reactions[restrained]
+
+
+def _factorize(matrix):
+    """sparse LU factorization of a matrix, None if it is singular or ill-conditioned (as Factorization)"""
+    try:
+        factorization = splu(matrix)
+    except RuntimeError:
+        return None
+    pivots = np.abs(factorization.U.diagonal())
+    if pivots.size and pivots.min() <= Factorization.singularity_tolerance * pivots.max():
+        return None
+    return factorization
+
+
+def _share(array):
+    memory = shared_memory.SharedMemory(create=True, size=max(array.nbytes, 1))
+    np.ndarray(array.shape, dtype=array.dtype, buffer=memory.buf)[...] = array
+    return memory, (memory.name, array.shape, array.dtype.str)
+
+
+def _attach(descriptor):
+    name, shape, dtype = descriptor
+    memory = shared_memory.SharedMemory(name=name)
+    return memory, np.ndarray(shape, dtype=dtype, buffer=memory.buf)
+
+
+def _receive(connection):
+    message = connection.recv()
+    if isinstance(message, BaseException):
+        raise message
+    return message
+
+
+def _subdomain_worker(connection, descriptors, elements, element_indices):
+    memories = []
+    arrays = {}
+    try:
+        for name, descriptor in descriptors.items():
+            memory, arrays[name] = _attach(descriptor)
+            memories.append(memory)
+        _solve_subdomain(connection, arrays, elements, element_indices)
+    except BaseException as error:
+        connection.send(error)
+    finally:
+        arrays.clear()
+        for memory in memories:
+            memory.close()
+        connection.close()
+
+
+def _solve_subdomain(connection, arrays, elements, element_indices):
+    dof_map = arrays['dof_map']
+    touched = np.unique(np.concatenate(element_indices)) if element_indices else np.zeros(0, dtype=np.int64)
+    interior = touched[dof_map[touched] == _FREE]
+    interface = touched[dof_map[touched] == _INTERFACE]
+    restrained = touched[dof_map[touched] == _RESTRAINED]
+    ordered = np.concatenate([interior, interface, restrained])
+    local_index = np.full(len(dof_map), -1)
+    local_index[ordered] = np.arange(len(ordered))
+    size = len(ordered)
+    matrix = sparse_elastic_matrix(elements, [local_index[ids] for ids in element_indices], size)
+
+    ni, nb = len(interior), len(interface)
+    i, b, s = slice(0, ni), slice(ni, ni + nb), slice(ni + nb, size)
+    kib = matrix[i, b].toarray()
+    kbi, kbb = matrix[b, i], matrix[b, b].toarray()
+    settlements = arrays['settlements'][restrained]
+    interior_forces = arrays['forces'][interior] - matrix[i, s].dot(settlements)
+    interface_forces = -matrix[b, s].dot(settlements)
+
+    if ni:
+        factorization = _factorize(matrix[i, i])
+        if factorization is None:
+            connection.send(None)
+            return
+        kii_kib = factorization.solve(kib) if nb else np.zeros((ni, 0))
+        kii_fi = factorization.solve(interior_forces)
+        connection.send((interface, kbb - kbi.dot(kii_kib), interface_forces - kbi.dot(kii_fi)))
+    else:
+        connection.send((interface, kbb, interface_forces))
+
+    interface_displacements = connection.recv()
+    if interface_displacements is None:
+        # the structure is unstable
+        return
+    displacements = np.zeros(size)
+    displacements[s] = settlements
+    if nb:
+        all_interface = np.flatnonzero(dof_map == _INTERFACE)
+        displacements[b] = interface_displacements[np.searchsorted(all_interface, interface)]
+    if ni:
+        displacements[i] = kii_fi - np.dot(kii_kib, displacements[b])
+        arrays['displacements'][interior] = displacements[i]
+    connection.send((restrained, matrix[s, :].dot(displacements)))
@@ -0,0 +1,128 @@
+"""
+This class is the assembled and factorized first-order elastic system of a structure, for solving load cases
+without side effects. The stiffness matrix is partitioned and its free-free part factorized once, when the object is
+created. Every solve then takes the loads and settlements as arguments and returns new arrays or a Results object.
+Nothing is written into the degrees of freedom, so one structure and one ElasticSystem can serve many concurrent
+load cases from a thread pool without copying the model. The solves are BLAS/LAPACK calls that release the GIL.
+Solver.analyze_first_order_elastic is the analysis that stores the results in the degrees of freedom.
+The structure must not be modified while the object is used. After a change, build a new ElasticSystem; if it is
+built from the structure's GlobalMatrix, only the changed elements are assembled again.
+Structures with constraints are not supported.
+Attributes:
+    self.structure: the analyzed structure
+    self.ff, self.fs, self.sf, self.ss: partitions of the global stiffness matrix
+    self.factorization: Factorization of self.ff
+    self.free_equivalent_forces, self.restrained_equivalent_forces: equivalent nodal forces of the element loads
+Properties:
+    self.singular: True if the structure is unstable
+Methods:
+    self.node_forces(), self.node_settlements(): (nodes, 6) arrays of the forces and of the settlements assigned to
+                                                 the degrees of freedom (read only)
+    self.solve_load_cases(forces, settlements=None): forces is an array (nodes, 6) or (load cases, nodes, 6) of
+                                                     nodal forces ordered as structure.nodes; returns the
+                                                     displacements and reactions as arrays of the same shape, all
+                                                     the load cases are solved at once as one multi-column solve.
+                                                     Element loads are not included.
+    self.solve(forces=None, settlements=None): returns a Results object; without forces the loads of the model
+                                               (nodal forces and element loads) are solved
+"""
+
+
+import numpy as np
+from StructuralAnalysis.Structure import Structure
+from StructuralAnalysis.Factorization import Factorization
+from StructuralAnalysis.Results import Results, dof_positions, node_forces
+from StructuralAnalysis.__SolverHelper import global_elastic_matrix, partition_global_matrix, element_load_vector
+
+
+class ElasticSystem:
+
+    def __init__(self, structure: Structure, global_matrix=None):
+        """global_matrix: GlobalMatrix of the structure, updated instead of assembling the structure from scratch"""
+        if structure.constraints:
+            raise ValueError("Structures with constraints are not supported by ElasticSystem.")
+        self.structure = structure
+        if global_matrix is not None:
+            global_matrix.update()
+            self.ff, self.fs, self.sf, self.ss = global_matrix.partition()
+        else:
+            self.ff, self.fs, self.sf, self.ss = partition_global_matrix(structure, global_elastic_matrix(structure))
+        self.factorization = Factorization(self.ff)
+
+        positions = dof_positions(structure)
+        self.__free_positions = positions(structure.free_degrees_of_freedom)
+        self.__restrained_positions = positions(structure.restrained_degrees_of_freedom)
+        self.__node_count = len(structure.nodes)
+        equivalent_forces = element_load_vector(structure)
+        if equivalent_forces is None:
+            equivalent_forces = np.zeros(structure.no_of_degrees_of_freedom)
+        indices = structure.dof_indices
+        self.free_equivalent_forces = equivalent_forces[[indices[dof] for dof in structure.free_degrees_of_freedom]]
+        self.restrained_equivalent_forces = \
+            equivalent_forces[[indices[dof] for dof in structure.restrained_degrees_of_freedom]]
+
+    @property
+    def singular(self):
+        return self.factorization.singular
+
+    def node_forces(self):
+        return node_forces(self.structure)
+
+    def node_settlements(self):
+        settlements = np.zeros((self.__node_count, 6))
+        indices, rows, columns = self.__restrained_positions
+        restrained = self.structure.restrained_degrees_of_freedom
+        settlements[rows, columns] = np.array([dof.displacement for dof in restrained], dtype=float)[indices]
+        return settlements
+
+    def solve_load_cases(self, forces, settlements=None):
+        forces = np.asarray(forces, dtype=float)
+        single = forces.ndim == 2
+        forces = forces.reshape(-1, self.__node_count, 6)
+        free_displacements, restrained_reactions, restrained_displacements = \
+            self.__solve(self.__free_vectors(forces), settlements)
+
+        displacements = np.zeros(forces.shape)
+        reactions = np.zeros(forces.shape)
+        indices, rows, columns = self.__free_positions
+        displacements[:, rows, columns] = free_displacements[indices].T
+        indices, rows, columns = self.__restrained_positions
+        displacements[:, rows, columns] = restrained_displacements[indices]
+        reactions[:, rows, columns] = restrained_reactions[indices].T
+        if single:
+            return displacements[0], reactions[0]
+        return displacements, reactions
+
+    def solve(self, forces=None, settlements=None):
+        if forces is None:
+            forces = self.node_forces()
+            free_forces = self.__free_vectors(forces[np.newaxis]) + self.free_equivalent_forces[:, np.newaxis]
+            equivalent_reactions = self.restrained_equivalent_forces
+        else:
+            forces = np.asarray(forces, dtype=float)
+            free_forces = self.__free_vectors(forces[np.newaxis])
+            equivalent_reactions = 0
+        free_displacements, restrained_reactions, restrained_displacements = self.__solve(free_forces, settlements)
+        return Results(self.structure, free_displacements[:, 0], restrained_reactions[:, 0] - equivalent_reactions,
+                       forces, restrained_displacements)
+
+    def __free_vectors(self, forces):
+        """(free degrees of freedom, load cases) forces of the free degrees of freedom"""
+        indices, rows, columns = self.__free_positions
+        vectors = np.zeros((len(self.structure.free_degrees_of_freedom), len(forces)))
+        vectors[indices] = forces[:, rows, columns].T
+        return vectors
+
+    def __solve(self, free_forces, settlements):
+        if settlements is None:
+            restrained_displacements = np.array([dof.displacement for dof in
+                                                 self.structure.restrained_degrees_of_freedom], dtype=float)
+        else:
+            restrained_displacements = np.zeros(len(self.structure.restrained_degrees_of_freedom))
+            indices, rows, columns = self.__restrained_positions
+            restrained_displacements[indices] = np.asarray(settlements, dtype=float)[rows, columns]
+        free_displacements = self.factorization.solve(free_forces -
+                                                      np.dot(self.fs, restrained_displacements)[:, np.newaxis])
+        restrained_reactions = np.dot(self.sf, free_displacements) + \
+            np.dot(self.ss, restrained_displacements)[:, np.newaxis]
+        return free_displacements, restrained_reactions, restrained_displacements
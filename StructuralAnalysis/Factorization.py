@@ -0,0 +1,109 @@
+"""
+This class factorizes a square stiffness matrix once so it can be reused for many right-hand sides and modified by
+low-rank updates (Sherman-Morrison-Woodbury) instead of being refactorized from scratch.
+Attributes:
+    self.matrix: the matrix of the last full factorization (low-rank updates are not applied to it)
+    self.refactorizations: number of full factorizations performed so far
+    self.updates: number of low-rank terms currently applied on top of the factorization
+
+Properties:
+    self.singular: True if the updated matrix became singular (e.g. a collapse mechanism formed)
+    self.updated_matrix: the matrix with all the low-rank terms applied
+
+Methods:
+    self.solve(rhs): solves the updated system for a vector or for a matrix whose columns are right-hand sides; it
+                     does not modify the object, so several threads may solve with the same factorization at once
+                     (but not while update or refactorize runs)
+    self.update(vector, coefficient): adds coefficient * vector * vector^T to the matrix
+    self.refactorize(): factorizes self.updated_matrix from scratch and clears the low-rank terms
+"""
+
+
+import numpy as np
+from scipy.linalg import lu_factor, solve_triangular
+from StructuralAnalysis import Instrumentation
+
+
+class Factorization:
+    singularity_tolerance = 1e-10
+
+    def __init__(self, matrix: np.array):
+        self.matrix = None
+        self.refactorizations = 0
+        self.updates = 0
+        self.__lu = None
+        self.__permutation = None
+        self.__vectors = None
+        self.__solved_vectors = None
+        self.__capacitance = None
+        self.__singular = False
+        self.__factorize(matrix)
+
+    @Instrumentation.timed('factorization')
+    def __factorize(self, matrix):
+        self.matrix = np.array(matrix, dtype=float)
+        self.__lu = lu_factor(self.matrix, check_finite=False)
+        # the row interchanges of the factorization as one permutation of the right-hand sides
+        self.__permutation = np.arange(len(self.matrix))
+        for i, pivot in enumerate(self.__lu[1]):
+            self.__permutation[i], self.__permutation[pivot] = self.__permutation[pivot], self.__permutation[i]
+        self.refactorizations += 1
+        Instrumentation.count('factorizations')
+        self.updates = 0
+        self.__vectors = np.zeros((len(self.matrix), 0))
+        self.__solved_vectors = np.zeros((len(self.matrix), 0))
+        self.__capacitance = np.zeros((0, 0))
+        pivots = np.abs(np.diag(self.__lu[0]))
+        self.__singular = pivots.size > 0 and pivots.min() <= self.singularity_tolerance * pivots.max()
+
+    @property
+    def singular(self):
+        return self.__singular
+
+    @property
+    def updated_matrix(self):
+        vectors = self.__vectors
+        if self.updates == 0:
+            return self.matrix.copy()
+        coefficients = 1 / np.diag(self.__capacitance - np.dot(vectors.T, self.__solved_vectors))
+        return self.matrix + np.dot(vectors * coefficients, vectors.T)
+
+    def solve(self, rhs):
+        solution = self.__lu_solve(rhs)
+        if self.updates == 0:
+            return solution
+        correction = np.linalg.solve(self.__capacitance, np.dot(self.__vectors.T, solution))
+        return solution - np.dot(self.__solved_vectors, correction)
+
+    def update(self, vector, coefficient):
+        Instrumentation.count('low_rank_updates')
+        vector = np.asarray(vector, dtype=float)
+        current = self.solve(vector)
+        pivot = 1 / coefficient + np.dot(vector, current)
+        if abs(pivot) <= self.singularity_tolerance * abs(1 / coefficient):
+            self.__singular = True
+
+        size = self.updates
+        capacitance = np.zeros((size + 1, size + 1))
+        capacitance[:size, :size] = self.__capacitance
+        solved = self.__lu_solve(vector)
+        cross = np.dot(self.__vectors.T, solved)
+        capacitance[:size, size] = cross
+        capacitance[size, :size] = cross
+        capacitance[size, size] = 1 / coefficient + np.dot(vector, solved)
+
+        self.__vectors = np.column_stack([self.__vectors, vector])
+        self.__solved_vectors = np.column_stack([self.__solved_vectors, solved])
+        self.__capacitance = capacitance
+        self.updates += 1
+
+    def refactorize(self):
+        self.__factorize(self.updated_matrix)
+
+    def __lu_solve(self, rhs):
+        # two triangular solves instead of lu_solve: getrs is not safe to call from several threads at once with some
+        # OpenBLAS builds, trtrs is; both release the GIL so concurrent solves run in parallel
+        lu = self.__lu[0]
+        lower = solve_triangular(lu, np.asarray(rhs, dtype=float)[self.__permutation], lower=True,
+                                 unit_diagonal=True, check_finite=False)
+        return solve_triangular(lu, lower, check_finite=False)
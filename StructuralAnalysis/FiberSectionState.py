@@ -0,0 +1,109 @@
+"""
+This class performs the state determination of a FiberSection at every integration point of a group of elements.
+The fibers follow a bilinear uniaxial law with kinematic hardening built from the material
+(elasticity_modulus, yield_strength). The state is vectorized over elements, integration points and fibers:
+no per-fiber objects are created, every quantity is an array of shape (elements, integration points, fibers).
+
+Section deformations (elements, integration points, 3): axial strain, curvature about z, curvature about y.
+Fiber strain: axial strain - y * curvature about z + z * curvature about y
+Section forces (elements, integration points, 3): axial force, moment about z, moment about y.
+
+Attributes:
+    self.section: FiberSection object
+    self.material: material object (must have a yield_strength)
+    self.hardening_ratio: ratio of the post-yield tangent modulus to the elasticity modulus
+    self.shape: (elements, integration points, fibers)
+    self.committed: contiguous array (5, elements, integration points, fibers) of the committed
+                    strain, stress, plastic strain, back stress and tangent modulus
+    self.trial: contiguous array with the same layout as self.committed for the trial state
+Properties:
+    self.strain, self.stress, self.plastic_strain, self.back_stress: views of the trial state
+    self.tangent_modulus: fiber tangent moduli of the trial state
+Methods:
+    self.set_trial_deformations(deformations): computes the trial fiber state from the committed one and
+                                               returns (section forces, section tangent stiffness (..., 3, 3))
+    self.commit(): copies the trial state to the committed state (end of a converged step)
+    self.revert_to_committed(): copies the committed state to the trial state (rollback of a Newton iteration)
+"""
+
+
+import numpy as np
+from StructuralAnalysis.Section import FiberSection
+from StructuralAnalysis.Material import Material
+
+
+class FiberSectionState:
+    __strain, __stress, __plastic_strain, __back_stress, __tangent_modulus = range(5)
+
+    def __init__(self, section: FiberSection, material: Material, number_of_elements,
+                 number_of_integration_points=5, hardening_ratio=0.01):
+        if getattr(material, 'yield_strength', None) is None:
+            raise ValueError("Fiber state determination requires a material with a yield strength.")
+        self.section = section
+        self.material = material
+        self.hardening_ratio = hardening_ratio
+        self.shape = (number_of_elements, number_of_integration_points, section.number_of_fibers)
+        self.committed = np.zeros((5,) + self.shape)
+        self.committed[self.__tangent_modulus] = material.elasticity_modulus
+        self.trial = self.committed.copy()
+
+        # (fibers, 3) strain-deformation vectors and the (fibers, 9) area weighted products used for the tangent
+        self.__compatibility = np.column_stack([np.ones(section.number_of_fibers), -section.y, section.z])
+        self.__weighted_compatibility = self.__compatibility * section.areas[:, np.newaxis]
+        self.__tangent_weights = np.einsum('fi,fj->fij', self.__weighted_compatibility,
+                                           self.__compatibility).reshape(-1, 9)
+
+    @property
+    def strain(self):
+        return self.trial[self.__strain]
+
+    @property
+    def stress(self):
+        return self.trial[self.__stress]
+
+    @property
+    def plastic_strain(self):
+        return self.trial[self.__plastic_strain]
+
+    @property
+    def back_stress(self):
+        return self.trial[self.__back_stress]
+
+    @property
+    def tangent_modulus(self):
+        return self.trial[self.__tangent_modulus]
+
+    def set_trial_deformations(self, deformations):
+        e = self.material.elasticity_modulus
+        fy = self.material.yield_strength
+        kinematic_modulus = self.hardening_ratio * e / (1 - self.hardening_ratio)
+
+        strain = np.matmul(deformations, self.__compatibility.T, out=self.trial[self.__strain])
+        plastic_strain = self.committed[self.__plastic_strain]
+        back_stress = self.committed[self.__back_stress]
+
+        stress = e * (strain - plastic_strain)
+        relative_stress = stress - back_stress
+        direction = np.sign(relative_stress)
+        plastic_multiplier = np.maximum(np.abs(relative_stress) - fy, 0) / (e + kinematic_modulus)
+
+        self.trial[self.__stress] = stress - e * plastic_multiplier * direction
+        self.trial[self.__plastic_strain] = plastic_strain + plastic_multiplier * direction
+        self.trial[self.__back_stress] = back_stress + kinematic_modulus * plastic_multiplier * direction
+        self.trial[self.__tangent_modulus] = np.where(plastic_multiplier > 0,
+                                                      e * kinematic_modulus / (e + kinematic_modulus), e)
+
+        return self.section_forces(), self.section_tangent()
+
+    def section_forces(self):
+        return np.matmul(self.trial[self.__stress], self.__weighted_compatibility)
+
+    def section_tangent(self):
+        tangent = np.matmul(self.trial[self.__tangent_modulus], self.__tangent_weights)
+        return tangent.reshape(self.shape[:2] + (3, 3))
+
+    def commit(self):
+        np.copyto(self.committed, self.trial)
+
+    def revert_to_committed(self):
+        np.copyto(self.trial, self.committed)
@@ -0,0 +1,71 @@
+import numpy as np
+from abc import abstractmethod, ABC
+from StructuralAnalysis.FrameElements.Element import Element
+
+
+class CondensedElement(ABC):
+    """
+    This class is an abstract class.
+    A matrix condensed from another structure (Substructure, ReducedModel) and placed in a parent structure. Unlike
+    Element it has no local axis, section, material or shape functions: it is assembled from its matrix, degrees of
+    freedom and load vector, and its end forces are the forces at its degrees of freedom in global axis.
+    attributes:
+        self.revision: always 0, the condensed matrix does not change once it is computed
+
+        abstract properties:
+        self.nodes: nodes of the parent structure connected by the element
+        self.degrees_of_freedom: degrees of freedom of the element in global axis
+        self.matrix: condensed stiffness matrix ordered as self.degrees_of_freedom
+
+        properties:
+        self.load_vector: condensed forces ordered as self.degrees_of_freedom (None if not loaded)
+        self.mass_matrix: condensed mass matrix (None if massless)
+        self.elastic_geometric_matrix: None, the condensed matrix is elastic
+
+        methods:
+        self.end_displacements(): displacements of self.degrees_of_freedom
+        self.end_forces(displacements): forces at self.degrees_of_freedom for their displacements
+        self.plastic_capacities: an empty list, the element stays elastic
+    """
+
+    def __init__(self):
+        # the ids are taken from Element so every element of a structure has its own id
+        self.id = Element.id
+        Element.id += 1
+        self.revision = 0
+
+    @property
+    @abstractmethod
+    def nodes(self):
+        pass
+
+    @property
+    @abstractmethod
+    def degrees_of_freedom(self):
+        pass
+
+    @property
+    @abstractmethod
+    def matrix(self) -> np.array:
+        pass
+
+    @property
+    def load_vector(self) -> np.array:
+        return None
+
+    @property
+    def mass_matrix(self) -> np.array:
+        return None
+
+    @property
+    def elastic_geometric_matrix(self):
+        return None
+
+    def end_displacements(self):
+        return np.array([dof.displacement for dof in self.degrees_of_freedom])
+
+    def end_forces(self, displacements):
+        return np.dot(self.matrix, displacements)
+
+    def plastic_capacities(self):
+        return []
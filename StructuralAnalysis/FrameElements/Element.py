@@ -15,6 +15,8 @@ class Element(ABC):
         self.end_node: other node object initialized by user
         self.section: section object initialized by user
         self.material: material object initialized by user
+        self.revision: number of section and material changes, used by Structure to find the elements to assemble
+                       again
 
         abstract methods and properties:
         self._local_matrix: stiffness matrix of the element in its local axis
@@ -23,6 +25,18 @@ class Element(ABC):
         self._shape_function_matrix
         self._local_end_displacements
         self._matrix: stiffness matrix of the element in global axis
+
+        properties:
+        self.length: distance between the start node and the end node (follows the node coordinates)
+        self.section, self.material: assigning another section or material counts as a revision
+        self.nodes: nodes connected by the element (start node and end node)
+        self.load_vector: equivalent nodal forces ordered as self.degrees_of_freedom (None if not loaded)
+        self.mass_matrix: consistent mass matrix of the element in global axis (None if massless)
+
+        methods:
+        self.end_forces(displacements): local end forces for the global displacements of self.degrees_of_freedom
+        self.plastic_capacities: list of (local index, capacity) pairs of the end forces that may yield.
+                                 An empty list means the element stays elastic.
     """
 
     id = 1
@@ -30,13 +44,35 @@ class Element(ABC):
     def __init__(self, start_node: Node, end_node: Node, section: Section, material: Material):
         self.id = Element.id
         Element.id += 1
+        self.revision = 0
         self.start_node = start_node
         self.end_node = end_node
-        self.section = section
-        self.material = material
-        self.length = sqrt((end_node.x - start_node.x) ** 2 +
-                           (end_node.y - start_node.y) ** 2 +
-                           (end_node.z - start_node.z) ** 2)
+        self._section = section
+        self._material = material
+
+    @property
+    def length(self):
+        return sqrt((self.end_node.x - self.start_node.x) ** 2 +
+                    (self.end_node.y - self.start_node.y) ** 2 +
+                    (self.end_node.z - self.start_node.z) ** 2)
+
+    @property
+    def section(self):
+        return self._section
+
+    @section.setter
+    def section(self, value):
+        self._section = value
+        self.revision += 1
+
+    @property
+    def material(self):
+        return self._material
+
+    @material.setter
+    def material(self, value):
+        self._material = value
+        self.revision += 1
 
     @abstractmethod
     def _local_matrix(self) -> np.array:
@@ -68,3 +104,27 @@ class Element(ABC):
     @abstractmethod
     def elastic_geometric_matrix(self):
         pass
+
+    @property
+    def nodes(self) -> [Node]:
+        return [self.start_node, self.end_node]
+
+    @property
+    def load_vector(self) -> np.array:
+        return None
+
+    @property
+    def mass_matrix(self) -> np.array:
+        return None
+
+    def _mass(self):
+        return getattr(self.material, 'density', 0) * self.section.area * self.length
+
+    def end_forces(self, displacements) -> np.array:
+        return np.dot(self._local_matrix(), np.dot(self._transformation_matrix(), displacements))
+
+    def plastic_capacities(self) -> [(int, float)]:
+        return []
+
+    def _yield_strength(self):
+        return getattr(self.material, 'yield_strength', None)
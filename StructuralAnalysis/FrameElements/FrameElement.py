@@ -9,6 +9,7 @@ class FrameElement(Element):
     properties:
         self._degrees_of_freedom: 12 degrees of freedom (6 per node) - 3D element
         self._transformation_matrix: does not take into account tilt angle of the element
+        self.plastic_capacities: plastic moments about the local y and z axes at both ends
     """
 
     def _local_matrix(self):
@@ -38,6 +39,23 @@ class FrameElement(Element):
                          [0,    0,     -cy,  0,    ey,   0,    0,    0,    cy,   0,    dy,   0],
                          [0,    cz,    0,    0,    0,    ez,   0,    -cz,  0,    0,    0,    dz]])
 
+    def _local_mass_matrix(self):
+        le = self.length
+        m = self._mass()
+        rotary = getattr(self.material, 'density', 0) * self.section.polar_inertia * le
+        matrix = np.zeros((12, 12))
+        matrix[np.ix_([0, 6], [0, 6])] = m / 6 * np.array([[2, 1], [1, 2]])
+        matrix[np.ix_([3, 9], [3, 9])] = rotary / 6 * np.array([[2, 1], [1, 2]])
+        matrix[np.ix_([1, 5, 7, 11], [1, 5, 7, 11])] = m / 420 * np.array([[156, 22*le, 54, -13*le],
+                                                                          [22*le, 4*le**2, 13*le, -3*le**2],
+                                                                          [54, 13*le, 156, -22*le],
+                                                                          [-13*le, -3*le**2, -22*le, 4*le**2]])
+        matrix[np.ix_([2, 4, 8, 10], [2, 4, 8, 10])] = m / 420 * np.array([[156, -22*le, 54, 13*le],
+                                                                          [-22*le, 4*le**2, -13*le, -3*le**2],
+                                                                          [54, -13*le, 156, 22*le],
+                                                                          [13*le, -3*le**2, 22*le, 4*le**2]])
+        return matrix
+
     def _transformation_matrix(self):
         if self.start_node.x == self.end_node.x and self.start_node.y == self.end_node.y:
             if self.end_node.z > self.start_node.z:
@@ -86,6 +104,19 @@ class FrameElement(Element):
         global_displacements = np.array([dof.displacement for dof in self.degrees_of_freedom])
         return np.dot(self._transformation_matrix(), global_displacements)
 
+    def plastic_capacities(self):
+        fy = self._yield_strength()
+        if fy is None:
+            return []
+        capacities = []
+        if self.section.plastic_modulus_y is not None:
+            mpy = fy * self.section.plastic_modulus_y
+            capacities += [(4, mpy), (10, mpy)]
+        if self.section.plastic_modulus_z is not None:
+            mpz = fy * self.section.plastic_modulus_z
+            capacities += [(5, mpz), (11, mpz)]
+        return capacities
+
     @property
     def degrees_of_freedom(self):
         return [self.start_node.dof_1, self.start_node.dof_2, self.start_node.dof_3,
@@ -98,6 +129,11 @@ class FrameElement(Element):
         return np.dot(np.dot(self._transformation_matrix().T, self._local_matrix()),
                       self._transformation_matrix())
 
+    @property
+    def mass_matrix(self):
+        return np.dot(np.dot(self._transformation_matrix().T, self._local_mass_matrix()),
+                      self._transformation_matrix())
+
     @property
     def elastic_geometric_matrix(self):
         return None
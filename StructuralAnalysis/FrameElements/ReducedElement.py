@@ -0,0 +1,50 @@
+from StructuralAnalysis.FrameElements.CondensedElement import CondensedElement
+from StructuralAnalysis.DegreeOfFreedom import DegreeOfFreedom
+
+
+class ReducedElement(CondensedElement):
+    """
+    This class inherits from CondensedElement.
+    An instance of a ReducedModel (Craig-Bampton / Guyan) placed in a parent structure. The interface nodes of the
+    instance take the place of the interface nodes of the reduced structure (same order, same orientation).
+    attributes:
+        self.reduced_model: ReducedModel object
+        self.interface_nodes: nodes of the parent structure
+        self.modal_degrees_of_freedom: one DegreeOfFreedom (not attached to a node) per kept fixed-interface mode
+    properties:
+        self.degrees_of_freedom: interface degrees of freedom followed by self.modal_degrees_of_freedom
+        self.matrix: reduced stiffness matrix
+        self.mass_matrix: reduced mass matrix
+    methods:
+        self.interior_displacements: displacements of the reduced interior degrees of freedom
+    """
+
+    def __init__(self, reduced_model, interface_nodes):
+        self.reduced_model = reduced_model
+        self.interface_nodes = list(interface_nodes)
+        positions = [position for position, _ in reduced_model.interface_degrees_of_freedom]
+        if positions and max(positions) >= len(self.interface_nodes):
+            raise ValueError("Expected %d interface nodes, got %d." % (max(positions) + 1, len(self.interface_nodes)))
+        super().__init__()
+        self.modal_degrees_of_freedom = [DegreeOfFreedom() for _ in range(reduced_model.number_of_modes)]
+
+    def interior_displacements(self):
+        return self.reduced_model.interior_displacements(self.end_displacements())
+
+    @property
+    def nodes(self):
+        return self.interface_nodes
+
+    @property
+    def degrees_of_freedom(self):
+        return [getattr(self.interface_nodes[position], 'dof_%d' % number)
+                for position, number in self.reduced_model.interface_degrees_of_freedom] + \
+            self.modal_degrees_of_freedom
+
+    @property
+    def matrix(self):
+        return self.reduced_model.stiffness_matrix
+
+    @property
+    def mass_matrix(self):
+        return self.reduced_model.mass_matrix
@@ -0,0 +1,65 @@
+import numpy as np
+from StructuralAnalysis.FrameElements.CondensedElement import CondensedElement
+
+
+class SuperElement(CondensedElement):
+    """
+    This class inherits from CondensedElement.
+    An instance of a Substructure placed in a parent structure. The boundary nodes of the instance take the place of
+    the boundary nodes of the substructure (same order, same orientation), so many instances share the condensed
+    matrix that the substructure computed once.
+    attributes:
+        self.substructure: Substructure object
+        self.boundary_nodes: nodes of the parent structure matching substructure.boundary_nodes
+    properties:
+        self.degrees_of_freedom: degrees of freedom of the boundary nodes used by the substructure
+        self.load_vector: condensed forces of the substructure (None if it has no forces)
+    methods:
+        self.interior_displacements: displacements of the condensed degrees of freedom, recovered on the first call
+                                     and recomputed only if the boundary displacements change
+        self.node_displacements(node): the 6 displacements of a node of the substructure for this instance
+    """
+
+    def __init__(self, substructure, boundary_nodes):
+        if len(boundary_nodes) != len(substructure.boundary_nodes):
+            raise ValueError("Expected %d boundary nodes, got %d." %
+                             (len(substructure.boundary_nodes), len(boundary_nodes)))
+        super().__init__()
+        self.substructure = substructure
+        self.boundary_nodes = list(boundary_nodes)
+        self.__recovered = None
+        self.__recovered_from = None
+
+    def interior_displacements(self):
+        boundary_displacements = self.end_displacements()
+        if self.__recovered is None or not np.array_equal(boundary_displacements, self.__recovered_from):
+            self.__recovered = self.substructure.interior_displacements(boundary_displacements)
+            self.__recovered_from = boundary_displacements
+        return self.__recovered
+
+    def node_displacements(self, node):
+        if node in self.substructure.boundary_nodes:
+            boundary_node = self.boundary_nodes[self.substructure.boundary_nodes.index(node)]
+            return np.array([getattr(boundary_node, 'dof_%d' % number).displacement for number in range(1, 7)])
+        interior = dict(zip(self.substructure.interior_degrees_of_freedom, self.interior_displacements()))
+        dofs = [getattr(node, 'dof_%d' % number) for number in range(1, 7)]
+        return np.array([interior.get(dof, dof.displacement) for dof in dofs])
+
+    @property
+    def nodes(self):
+        return self.boundary_nodes
+
+    @property
+    def degrees_of_freedom(self):
+        return [getattr(self.boundary_nodes[position], 'dof_%d' % number)
+                for position, number in self.substructure.boundary_degrees_of_freedom]
+
+    @property
+    def load_vector(self):
+        if not np.any(self.substructure.load_vector):
+            return None
+        return self.substructure.load_vector
+
+    @property
+    def matrix(self):
+        return self.substructure.matrix
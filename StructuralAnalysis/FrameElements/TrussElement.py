@@ -7,6 +7,7 @@ class TrussElement(Element):
     This class inherits from Element.
     properties:
         self._degrees_of_freedom: 6 degrees of freedom (3 per node) - 3D element
+        self.plastic_capacities: axial yield force (the whole member yields)
     """
 
     def _local_matrix(self):
@@ -42,6 +43,12 @@ class TrussElement(Element):
         global_displacements = np.array([dof.displacement for dof in self.degrees_of_freedom])
         return np.dot(self._transformation_matrix(), global_displacements)
 
+    def plastic_capacities(self):
+        fy = self._yield_strength()
+        if fy is None:
+            return []
+        return [(0, fy * self.section.area)]
+
     @property
     def degrees_of_freedom(self):
         return [self.start_node.dof_1,
@@ -56,6 +63,11 @@ class TrussElement(Element):
         return np.dot(np.dot(self._transformation_matrix().T, self._local_matrix()),
                       self._transformation_matrix())
 
+    @property
+    def mass_matrix(self):
+        return self._mass() / 6 * np.kron(np.array([[2, 1],
+                                                    [1, 2]]), np.identity(3))
+
     @property
     def elastic_geometric_matrix(self):
         return None
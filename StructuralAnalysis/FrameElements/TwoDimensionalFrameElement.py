@@ -7,6 +7,7 @@ class TwoDimensionalFrameElement(Element):
     This class inherits from Element.
     properties:
         self._degrees_of_freedom: 6 degrees of freedom (3 per node) - 2D element
+        self.plastic_capacities: plastic moments about the local z axis at both ends
     """
 
     def __init__(self, start_node, end_node, section, material):
@@ -31,6 +32,17 @@ class TwoDimensionalFrameElement(Element):
                         [0, -b, -c, 0, b, -c],
                         [0, c, e, 0, -c, d]])
 
+    def _local_mass_matrix(self):
+        le = self.length
+        m = self._mass()
+        matrix = np.zeros((6, 6))
+        matrix[np.ix_([0, 3], [0, 3])] = m / 6 * np.array([[2, 1], [1, 2]])
+        matrix[np.ix_([1, 2, 4, 5], [1, 2, 4, 5])] = m / 420 * np.array([[156, 22*le, 54, -13*le],
+                                                                        [22*le, 4*le**2, 13*le, -3*le**2],
+                                                                        [54, 13*le, 156, -22*le],
+                                                                        [-13*le, -3*le**2, -22*le, 4*le**2]])
+        return matrix
+
     def _transformation_matrix(self):
         x_diff = self.end_node.x - self.start_node.x
         y_diff = self.end_node.y - self.start_node.y
@@ -62,6 +74,13 @@ class TwoDimensionalFrameElement(Element):
         global_displacements = np.array([dof.displacement for dof in self.degrees_of_freedom])
         return np.dot(self._transformation_matrix(), global_displacements)
 
+    def plastic_capacities(self):
+        fy = self._yield_strength()
+        if fy is None or self.section.plastic_modulus_z is None:
+            return []
+        mp = fy * self.section.plastic_modulus_z
+        return [(2, mp), (5, mp)]
+
     @property
     def degrees_of_freedom(self):
         return [self.start_node.dof_1,
@@ -76,6 +95,11 @@ class TwoDimensionalFrameElement(Element):
         return np.dot(np.dot(self._transformation_matrix().T, self._local_matrix()),
                       self._transformation_matrix())
 
+    @property
+    def mass_matrix(self):
+        return np.dot(np.dot(self._transformation_matrix().T, self._local_mass_matrix()),
+                      self._transformation_matrix())
+
     @property
     def elastic_geometric_matrix(self):
         return None
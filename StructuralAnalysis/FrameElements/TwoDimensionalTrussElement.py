@@ -7,6 +7,7 @@ class TwoDimensionalTrussElement(Element):
     This class inherits from Element.
     properties:
         self._degrees_of_freedom: 4 degrees of freedom (2 per node) - 2D element
+        self.plastic_capacities: axial yield force (the whole member yields)
     """
 
     def __init__(self, start_node, end_node, section, material):
@@ -39,6 +40,12 @@ class TwoDimensionalTrussElement(Element):
         global_displacements = np.array([dof.displacement for dof in self.degrees_of_freedom])
         return np.dot(self._transformation_matrix(), global_displacements)
 
+    def plastic_capacities(self):
+        fy = self._yield_strength()
+        if fy is None:
+            return []
+        return [(0, fy * self.section.area)]
+
     @property
     def degrees_of_freedom(self):
         return [self.start_node.dof_1,
@@ -51,6 +58,11 @@ class TwoDimensionalTrussElement(Element):
         return np.dot(np.dot(self._transformation_matrix().T, self._local_matrix()),
                       self._transformation_matrix())
 
+    @property
+    def mass_matrix(self):
+        return self._mass() / 6 * np.kron(np.array([[2, 1],
+                                                    [1, 2]]), np.identity(2))
+
     @property
     def elastic_geometric_matrix(self):
         return None
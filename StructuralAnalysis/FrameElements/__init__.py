@@ -2,3 +2,6 @@ from StructuralAnalysis.FrameElements.TwoDimensionalTrussElement import TwoDimen
 from StructuralAnalysis.FrameElements.TwoDimensionalFrameElement import TwoDimensionalFrameElement
 from StructuralAnalysis.FrameElements.TrussElement import TrussElement
 from StructuralAnalysis.FrameElements.FrameElement import FrameElement
+from StructuralAnalysis.FrameElements.CondensedElement import CondensedElement
+from StructuralAnalysis.FrameElements.SuperElement import SuperElement
+from StructuralAnalysis.FrameElements.ReducedElement import ReducedElement
@@ -0,0 +1,130 @@
+"""
+This class keeps the global stiffness matrix of a structure as a sparse matrix and updates it incrementally.
+Every element contribution (the element's global matrix and its degree-of-freedom indices) is stored. An update only
+recomputes the contributions of the elements reported by Structure.dirty_elements, i.e. the elements that were moved,
+given another section or material, or added. A changed element's old contribution is subtracted from the stored
+entries and its new one is added, in place. The sparsity pattern (the CSR structure and the position of every element
+entry in it) is reused as long as the connectivity is unchanged. Adding or removing elements rebuilds the pattern from
+the stored contributions, but only the new elements are computed, and so does a change of the degrees of freedom
+of the structure, which renumbers them.
+The structure should be assembled by one GlobalMatrix only, since every update clears the changes of the structure.
+The matrix is indexed by structure.dof_indices, like global_elastic_matrix.
+Attributes:
+    self.structure: the assembled structure
+    self.matrix: scipy.sparse.csr_matrix of size structure.no_of_degrees_of_freedom
+    self.recomputed: number of element contributions computed by the last update (every element on the first one)
+    self.pattern_rebuilds: number of times the sparsity pattern was built
+Methods:
+    self.update(): applies the changes of the structure since the last update and returns self.recomputed
+    self.partition(free=None, restrained=None): dense (ff, fs, sf, ss) partitions of the matrix, as
+                                               partition_global_matrix; other lists of free and restrained degrees of
+                                               freedom than those of the structure may be given
+    self.element_matrix(element): the stored global matrix of an assembled element
+    self.toarray(): dense copy of the matrix
+"""
+
+
+import numpy as np
+from scipy.sparse import csr_matrix
+from StructuralAnalysis.Structure import Structure
+from StructuralAnalysis import Instrumentation
+
+
+class GlobalMatrix:
+
+    def __init__(self, structure: Structure):
+        self.structure = structure
+        self.matrix = None
+        self.recomputed = 0
+        self.pattern_rebuilds = 0
+        # element: (degrees of freedom, flattened global matrix) of the assembled elements
+        self.__contributions = {}
+        # the degrees of freedom of the structure when the pattern was built, which numbered the entries
+        self.__degrees_of_freedom = None
+        # element: slice of its entries in self.__positions, the data positions of all the entries in the pattern
+        self.__slices = {}
+        self.__positions = None
+        self.update()
+
+    @Instrumentation.timed('incremental_assembly')
+    def update(self):
+        structure = self.structure
+        dirty = structure.dirty_elements
+        # elements never assembled by this object (e.g. a structure assembled before by another GlobalMatrix)
+        dirty_set = set(dirty)
+        dirty += [element for element in structure.elements
+                  if element not in self.__contributions and element not in dirty_set]
+        removed = structure.removed_elements
+        present = set(structure.elements)
+        removed += [element for element in self.__contributions if element not in present and element not in removed]
+        for element in removed:
+            self.__contributions.pop(element, None)
+
+        pattern_changed = bool(removed) or self.matrix is None or \
+            structure.degrees_of_freedom != self.__degrees_of_freedom
+        changes = []
+        for element in dirty:
+            dofs = tuple(element.degrees_of_freedom)
+            values = np.ravel(element.matrix).astype(float)
+            previous = self.__contributions.get(element)
+            if previous is None or previous[0] != dofs:
+                pattern_changed = True
+            else:
+                changes.append((element, values - previous[1]))
+            self.__contributions[element] = (dofs, values)
+
+        if pattern_changed:
+            self.__build_pattern()
+        else:
+            for element, difference in changes:
+                np.add.at(self.matrix.data, self.__positions[self.__slices[element]], difference)
+        structure.clear_changes()
+
+        self.recomputed = len(dirty)
+        Instrumentation.count('elements_assembled', len(dirty))
+        return self.recomputed
+
+    def partition(self, free=None, restrained=None):
+        if free is None:
+            free = self.structure.free_degrees_of_freedom
+        if restrained is None:
+            restrained = self.structure.restrained_degrees_of_freedom
+        indices = self.structure.dof_indices
+        free = np.array([indices[dof] for dof in free], dtype=np.int64)
+        restrained = np.array([indices[dof] for dof in restrained], dtype=np.int64)
+        free_rows = self.matrix[free]
+        restrained_rows = self.matrix[restrained]
+        return free_rows[:, free].toarray(), free_rows[:, restrained].toarray(), \
+            restrained_rows[:, free].toarray(), restrained_rows[:, restrained].toarray()
+
+    def element_matrix(self, element):
+        dofs, values = self.__contributions[element]
+        return values.reshape(len(dofs), len(dofs))
+
+    def toarray(self):
+        return self.matrix.toarray()
+
+    def __build_pattern(self):
+        size = self.structure.no_of_degrees_of_freedom
+        indices = self.structure.dof_indices
+        elements = self.structure.elements
+        contributions = [self.__contributions[element] for element in elements]
+        ids = [np.array([indices[dof] for dof in dofs], dtype=np.int64) for dofs, _ in contributions]
+        rows = np.concatenate([np.repeat(element_ids, len(element_ids)) for element_ids in ids] +
+                              [np.zeros(0, np.int64)])
+        columns = np.concatenate([np.tile(element_ids, len(element_ids)) for element_ids in ids] +
+                                 [np.zeros(0, np.int64)])
+        values = np.concatenate([values for _, values in contributions] + [np.zeros(0)])
+
+        # the unique (row, column) keys in increasing order are the entries of the CSR matrix in storage order
+        keys, self.__positions = np.unique(rows * size + columns, return_inverse=True)
+        self.__positions = self.__positions.ravel()
+        data = np.bincount(self.__positions, weights=values, minlength=len(keys))
+        indptr = np.concatenate([[0], np.cumsum(np.bincount(keys // size, minlength=size))])
+        self.matrix = csr_matrix((data, keys % size, indptr), shape=(size, size))
+
+        offsets = np.concatenate([[0], np.cumsum([len(values) for _, values in contributions])])
+        self.__slices = {element: slice(offsets[i], offsets[i + 1]) for i, element in enumerate(elements)}
+        self.__degrees_of_freedom = list(self.structure.degrees_of_freedom)
+        self.pattern_rebuilds += 1
+        Instrumentation.count('pattern_rebuilds')
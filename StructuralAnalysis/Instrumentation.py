@@ -0,0 +1,177 @@
+"""
+Instrumentation of the analysis pipeline: named phase timers, counters and the peak memory of every phase.
+Solver, __SolverHelper, Factorization and DomainDecomposition report their phases (assembly, partition,
+condition_check, solve, reactions, report, ...) and counters (elements_assembled, nonzeros,
+free_degrees_of_freedom, restrained_degrees_of_freedom, factorizations, iterations, ...) here.
+Nothing is measured until enable() is called; while disabled, phase() returns a shared empty context manager and
+count() returns at once, so the instrumented code runs at full speed.
+Listeners are called with every event as it happens, e.g. to forward the metrics to a logger:
+    phase events: {'type': 'phase', 'name': name, 'seconds': seconds, 'peak_bytes': bytes or None}
+    counter events: {'type': 'counter', 'name': name, 'value': increment}
+Peak memory is measured with tracemalloc (enable(memory=True)); it slows the measured code down. disable() only
+stops tracemalloc if enable() started it. The phases and counters may be updated from several threads; every thread
+keeps its own stack of nested phases, but tracemalloc traces the whole process, so the peaks of phases running at
+the same time include each other's allocations.
+
+Functions:
+    enable(memory=False), disable(), is_enabled()
+    reset(): clears the collected phases and counters
+    phase(name): context manager measuring a phase
+    timed(name): decorator measuring every call of a function as a phase
+    count(name, value=1): adds value to a counter
+    add_listener(listener), remove_listener(listener)
+    report(): {'phases': {name: {'calls', 'seconds', 'peak_bytes'}}, 'counters': {name: value}}
+    profile(memory=False, listener=None): context manager that resets, enables, yields the report dictionary
+                                          (filled on exit) and restores the previous state
+"""
+
+
+import time
+import functools
+import threading
+import tracemalloc
+from contextlib import contextmanager, nullcontext
+
+__enabled = False
+__memory = False
+# True if enable() started tracemalloc, so disable() leaves a trace started by the caller running
+__started_tracing = False
+__phases = {}
+__counters = {}
+__listeners = []
+__lock = threading.Lock()
+# memory_stack: [allocated bytes at the start, highest peak of the nested phases] of the running phases of a thread
+__local = threading.local()
+__disabled_phase = nullcontext()
+
+
+def enable(memory=False):
+    global __enabled, __memory, __started_tracing
+    __enabled = True
+    __memory = memory
+    if memory and not tracemalloc.is_tracing():
+        tracemalloc.start()
+        __started_tracing = True
+
+
+def disable():
+    global __enabled, __memory, __started_tracing
+    if __started_tracing and tracemalloc.is_tracing():
+        tracemalloc.stop()
+    __started_tracing = False
+    __enabled = False
+    __memory = False
+
+
+def is_enabled():
+    return __enabled
+
+
+def reset():
+    with __lock:
+        __phases.clear()
+        __counters.clear()
+
+
+def add_listener(listener):
+    __listeners.append(listener)
+
+
+def remove_listener(listener):
+    __listeners.remove(listener)
+
+
+def phase(name):
+    if not __enabled:
+        return __disabled_phase
+    return __measured_phase(name)
+
+
+def timed(name):
+    def decorator(function):
+        @functools.wraps(function)
+        def measured(*args, **kwargs):
+            if not __enabled:
+                return function(*args, **kwargs)
+            with __measured_phase(name):
+                return function(*args, **kwargs)
+        return measured
+    return decorator
+
+
+def count(name, value=1):
+    if not __enabled:
+        return
+    with __lock:
+        __counters[name] = __counters.get(name, 0) + value
+    for listener in __listeners:
+        listener({'type': 'counter', 'name': name, 'value': value})
+
+
+def report():
+    with __lock:
+        return {'phases': {name: dict(record) for name, record in __phases.items()}, 'counters': dict(__counters)}
+
+
+@contextmanager
+def profile(memory=False, listener=None):
+    previous = (__enabled, __memory)
+    collected = {}
+    reset()
+    if listener is not None:
+        add_listener(listener)
+    enable(memory)
+    try:
+        yield collected
+    finally:
+        collected.update(report())
+        disable()
+        if listener is not None:
+            remove_listener(listener)
+        if previous[0]:
+            enable(previous[1])
+
+
+@contextmanager
+def __measured_phase(name):
+    memory = __memory and tracemalloc.is_tracing()
+    if memory:
+        memory_stack = __memory_stack()
+        current, peak = tracemalloc.get_traced_memory()
+        if memory_stack:
+            memory_stack[-1][1] = max(memory_stack[-1][1], peak)
+        __reset_peak()
+        memory_stack.append([current, 0])
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        seconds = time.perf_counter() - start
+        peak_bytes = None
+        if memory:
+            allocated, highest = memory_stack.pop()
+            highest = max(highest, tracemalloc.get_traced_memory()[1])
+            peak_bytes = highest - allocated
+            if memory_stack:
+                memory_stack[-1][1] = max(memory_stack[-1][1], highest)
+        with __lock:
+            record = __phases.setdefault(name, {'calls': 0, 'seconds': 0.0, 'peak_bytes': None})
+            record['calls'] += 1
+            record['seconds'] += seconds
+            if peak_bytes is not None:
+                record['peak_bytes'] = max(record['peak_bytes'] or 0, peak_bytes)
+        for listener in __listeners:
+            listener({'type': 'phase', 'name': name, 'seconds': seconds, 'peak_bytes': peak_bytes})
+
+
+def __memory_stack():
+    if not hasattr(__local, 'memory_stack'):
+        __local.memory_stack = []
+    return __local.memory_stack
+
+
+def __reset_peak():
+    # tracemalloc.reset_peak exists from Python 3.9; before it the peaks are measured from the start of tracing
+    reset_peak = getattr(tracemalloc, 'reset_peak', None)
+    if reset_peak is not None:
+        reset_peak()
@@ -3,6 +3,7 @@ Class Material is an abstract class.
 attributes and properties:
     elasticity_modulus: should be initialized by the user
     poissons_ratio: should be initialized by the used
+    density: mass per unit volume, used by the mass matrices (defaults to 0, massless)
     shear_modulus (property & abstract method): each inheriting class has its own implementation of the shear_modulus
 
 Derived classes:
@@ -17,9 +18,10 @@ from abc import ABC, abstractmethod
 
 class Material(ABC):
 
-    def __init__(self, elasticity_modulus, poissons_ratio):
+    def __init__(self, elasticity_modulus, poissons_ratio, density=0):
         self.elasticity_modulus = elasticity_modulus
         self.poissons_ratio = poissons_ratio
+        self.density = density
         self.__shear_modulus = None
 
     @property
@@ -30,8 +32,8 @@ class Material(ABC):
 
 class Steel(Material):
 
-    def __init__(self, yield_strength, ultimate_strength, elasticity_modulus, poissons_ratio):
-        super().__init__(elasticity_modulus, poissons_ratio)
+    def __init__(self, yield_strength, ultimate_strength, elasticity_modulus, poissons_ratio, density=0):
+        super().__init__(elasticity_modulus, poissons_ratio, density)
         self.yield_strength = yield_strength
         self.ultimate_strength = ultimate_strength
 
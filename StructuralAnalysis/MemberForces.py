@@ -0,0 +1,159 @@
+"""
+This class recovers the end forces and the internal-action diagrams of all the line elements (frame and truss
+elements) of a structure at once. The local stiffness and transformation matrices of the elements are built as
+stacked arrays from the element properties instead of element by element, and every quantity is obtained by batched
+array operations.
+All the element types use the 12 local end forces of FrameElement, ordered as
+    start node: N, Vy, Vz, T, My, Mz, end node: N, Vy, Vz, T, My, Mz
+(components that do not exist in an element type are zero, e.g. everything but N for truss elements).
+The internal actions at a station are the forces and moments in the local axes acting on the face of the cut whose
+outward normal is the local x-axis, so a positive N is tension and the internal actions at the end station are the
+end forces of the end node. Elements carry no member loads, so the diagrams are linear between the end forces.
+Condensed elements (see CondensedElement) have no local axis and are skipped.
+Attributes:
+    self.structure: the analyzed structure
+    self.elements: list of the line elements, ordered as the rows of the arrays
+    self.element_ids: array (elements,) of the element ids
+    self.lengths: array (elements,) of the element lengths
+    self.local_matrices: array (elements, 12, 12) of the local stiffness matrices
+    self.transformation_matrices: array (elements, 12, 12) from the global to the local axes
+    self.global_displacements: array (elements, 12) of the displacements of dof_1 to dof_6 of both nodes
+    self.local_displacements: array (elements, 12) of the end displacements in the local axes
+    self.end_forces: array (elements, 12) of the local end forces (k_local * T * u_global)
+Methods:
+    self.stations(number_of_stations): array (elements, stations) of the local x-coordinates of the stations,
+                                       number_of_stations + 1 equally spaced stations including both ends
+    self.internal_actions(number_of_stations): array (elements, stations, 6) of N, Vy, Vz, T, My, Mz
+    self.row(element): row of an element in the arrays
+
+Functions:
+    rotation_matrices(start, end): (elements, 3, 3) rotation matrices of the local axes of line elements
+"""
+
+
+import numpy as np
+from StructuralAnalysis.FrameElements import FrameElement, TrussElement, TwoDimensionalFrameElement, \
+    TwoDimensionalTrussElement
+
+COMPONENTS = ('N', 'Vy', 'Vz', 'T', 'My', 'Mz')
+# (bending about z, bending about y and torsion) of every element type, the axial stiffness is always included
+ELEMENT_ACTIONS = {FrameElement: (1, 1, 1), TwoDimensionalFrameElement: (1, 0, 0),
+                   TrussElement: (0, 0, 0), TwoDimensionalTrussElement: (0, 0, 0)}
+
+
+class MemberForces:
+
+    def __init__(self, structure, results=None):
+        """
+        The displacements are taken from results (a Results object) if given, otherwise from the degrees of
+        freedom of the nodes.
+        """
+        self.structure = structure
+        self.elements = [element for element in structure.elements if type(element) in ELEMENT_ACTIONS]
+        self.__rows = {element: i for i, element in enumerate(self.elements)}
+        self.element_ids = np.array([element.id for element in self.elements], dtype=int)
+
+        start = np.array([[element.start_node.x, element.start_node.y, element.start_node.z]
+                          for element in self.elements], dtype=float).reshape(-1, 3)
+        end = np.array([[element.end_node.x, element.end_node.y, element.end_node.z]
+                        for element in self.elements], dtype=float).reshape(-1, 3)
+        self.lengths = np.linalg.norm(end - start, axis=1)
+        self.local_matrices = self.__local_matrices()
+        self.transformation_matrices = self.__transformation_matrices(start, end)
+        self.global_displacements = self.__global_displacements(results)
+        self.local_displacements = np.einsum('nij,nj->ni', self.transformation_matrices, self.global_displacements)
+        self.end_forces = np.einsum('nij,nj->ni', self.local_matrices, self.local_displacements)
+
+    def row(self, element):
+        return self.__rows[element]
+
+    def stations(self, number_of_stations=10):
+        return self.lengths[:, np.newaxis] * np.linspace(0, 1, number_of_stations + 1)
+
+    def internal_actions(self, number_of_stations=10):
+        ratios = np.linspace(0, 1, number_of_stations + 1)[np.newaxis, :, np.newaxis]
+        start = -self.end_forces[:, np.newaxis, :6]
+        end = self.end_forces[:, np.newaxis, 6:]
+        return (1 - ratios) * start + ratios * end
+
+    def __properties(self):
+        """arrays of E, A, E*Iz, E*Iy and G*J, each section and material is evaluated once"""
+        sections = {}
+        materials = {}
+        properties = np.zeros((len(self.elements), 5))
+        for i, element in enumerate(self.elements):
+            bending_z, bending_y, torsion = ELEMENT_ACTIONS[type(element)]
+            section = element.section
+            material = element.material
+            if section not in sections:
+                sections[section] = (section.area, section.inertia_z, section.inertia_y, section.polar_inertia)
+            if material not in materials:
+                materials[material] = (material.elasticity_modulus, material.shear_modulus)
+            area, inertia_z, inertia_y, polar_inertia = sections[section]
+            elasticity_modulus, shear_modulus = materials[material]
+            properties[i] = [elasticity_modulus, area,
+                             elasticity_modulus * inertia_z if bending_z else 0,
+                             elasticity_modulus * inertia_y if bending_y else 0,
+                             shear_modulus * polar_inertia if torsion else 0]
+        return properties.T
+
+    def __local_matrices(self):
+        le = self.lengths
+        e, area, eiz, eiy, gj = self.__properties()
+        a = e * area / le
+        t = gj / le
+        bz, cz, dz, ez = 12 * eiz / le ** 3, 6 * eiz / le ** 2, 4 * eiz / le, 2 * eiz / le
+        by, cy, dy, ey = 12 * eiy / le ** 3, 6 * eiy / le ** 2, 4 * eiy / le, 2 * eiy / le
+
+        matrices = np.zeros((len(le), 12, 12))
+        # the upper triangle of FrameElement._local_matrix, mirrored below
+        terms = [(0, 0, a), (0, 6, -a), (6, 6, a),
+                 (1, 1, bz), (1, 5, cz), (1, 7, -bz), (1, 11, cz), (5, 5, dz), (5, 7, -cz), (5, 11, ez),
+                 (7, 7, bz), (7, 11, -cz), (11, 11, dz),
+                 (2, 2, by), (2, 4, -cy), (2, 8, -by), (2, 10, -cy), (4, 4, dy), (4, 8, cy), (4, 10, ey),
+                 (8, 8, by), (8, 10, cy), (10, 10, dy),
+                 (3, 3, t), (3, 9, -t), (9, 9, t)]
+        for i, j, value in terms:
+            matrices[:, i, j] = value
+            matrices[:, j, i] = value
+        return matrices
+
+    def __transformation_matrices(self, start, end):
+        gama = rotation_matrices(start, end)
+        matrices = np.zeros((len(gama), 12, 12))
+        for i in range(4):
+            matrices[:, i * 3:(i + 1) * 3, i * 3:(i + 1) * 3] = gama
+        return matrices
+
+    def __global_displacements(self, results):
+        if results is None:
+            return np.array([[getattr(node, 'dof_%d' % number).displacement
+                              for node in (element.start_node, element.end_node) for number in range(1, 7)]
+                             for element in self.elements], dtype=float).reshape(-1, 12)
+        rows = {node: i for i, node in enumerate(self.structure.nodes)}
+        start_rows = np.array([rows[element.start_node] for element in self.elements], dtype=int)
+        end_rows = np.array([rows[element.end_node] for element in self.elements], dtype=int)
+        return np.hstack([results.displacements[start_rows], results.displacements[end_rows]])
+
+
+def rotation_matrices(start, end):
+    """
+    returns the (elements, 3, 3) rotation matrices from the global to the local axes of the elements between the
+    start and end coordinates (elements, 3), with the local axes of FrameElement._transformation_matrix (the 2D and
+    truss elements share them)
+    """
+    cosines = (end - start) / np.linalg.norm(end - start, axis=1)[:, np.newaxis]
+    cxx, cyx, czx = cosines.T
+    d = np.hypot(cxx, cyx)
+    vertical = d == 0
+    safe_d = np.where(vertical, 1, d)
+    gama = np.zeros((len(d), 3, 3))
+    gama[:, 0] = cosines
+    gama[:, 1] = np.stack([-cyx / safe_d, cxx / safe_d, np.zeros_like(d)], axis=1)
+    gama[:, 2] = np.stack([-cxx * czx / safe_d, -cyx * czx / safe_d, d], axis=1)
+    up = np.sign(czx[vertical])
+    gama[vertical] = 0
+    gama[vertical, 0, 2] = up
+    gama[vertical, 1, 1] = 1
+    gama[vertical, 2, 0] = -up
+    return gama
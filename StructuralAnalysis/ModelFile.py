@@ -0,0 +1,258 @@
+"""
+Reads and writes models as tables, either as a directory of CSV files or as a single binary .npz file.
+Tables (one header line per CSV file, the .npz file holds one array per table with the same columns):
+    materials.csv: id, type (Steel, Concrete), elasticity_modulus, poissons_ratio, density, yield_strength,
+                   ultimate_strength
+    sections.csv: id, type (Rectangle, Circle, ArbitrarySection), breadth, depth, radius, area, inertia_y, inertia_z,
+                  polar_inertia, warping_rigidity, plastic_modulus_y, plastic_modulus_z
+    nodes.csv: id, x, y, z
+    elements.csv: id, type, start_node, end_node, section, material
+                  type: 1 FrameElement, 2 TrussElement, 3 TwoDimensionalFrameElement, 4 TwoDimensionalTrussElement
+    restraints.csv: node, restrained dof_1 to dof_6 (0 or 1), displacement of dof_1 to dof_6
+    loads.csv: node, force of dof_1 to dof_6
+Empty CSV fields (NaN in the .npz file) stand for properties that do not apply (None).
+The ids in the files link the tables (the .npz file holds the ids of the materials and sections as the
+material_ids and section_ids arrays). The writer numbers the nodes, elements, sections and materials by their order
+in the structure so writing a model that was read reproduces the same files. The loads table holds the forces of
+the free degrees of freedom only (the forces of restrained degrees of freedom are the reactions of an analysis).
+The node, element, restraint and load tables are parsed in blocks of chunk_size rows with vectorized NumPy parsing,
+and the ids of every block are looked up at once, so CSV files do not have to fit in memory.
+
+Functions:
+    read_model(path, chunk_size, return_ids): returns a Structure, or (structure, nodes, elements) with return_ids,
+                                              the dicts {file id: Node} and {file id: Element} of the model file
+    write_model(structure, path): path ending with .npz writes the binary file, otherwise a directory of CSV files
+    model_tables(structure): returns (tables, types), the arrays written by write_model and the type names of the
+                             materials and sections
+"""
+
+
+import os
+import csv
+from itertools import islice
+import numpy as np
+from StructuralAnalysis.Node import Node
+from StructuralAnalysis.Structure import Structure
+from StructuralAnalysis import Material
+from StructuralAnalysis import Section
+from StructuralAnalysis.FrameElements import FrameElement, TrussElement, TwoDimensionalFrameElement, \
+    TwoDimensionalTrussElement
+
+ELEMENT_TYPES = {1: FrameElement, 2: TrussElement, 3: TwoDimensionalFrameElement, 4: TwoDimensionalTrussElement}
+MATERIAL_COLUMNS = ['elasticity_modulus', 'poissons_ratio', 'density', 'yield_strength', 'ultimate_strength']
+SECTION_COLUMNS = ['breadth', 'depth', 'radius', 'area', 'inertia_y', 'inertia_z', 'polar_inertia',
+                   'warping_rigidity', 'plastic_modulus_y', 'plastic_modulus_z']
+HEADERS = {'materials': ['id', 'type'] + MATERIAL_COLUMNS,
+           'sections': ['id', 'type'] + SECTION_COLUMNS,
+           'nodes': ['id', 'x', 'y', 'z'],
+           'elements': ['id', 'type', 'start_node', 'end_node', 'section', 'material'],
+           'restraints': ['node'] + ['restrained_%d' % number for number in range(1, 7)] +
+                         ['displacement_%d' % number for number in range(1, 7)],
+           'loads': ['node'] + ['force_%d' % number for number in range(1, 7)]}
+
+
+def read_model(path, chunk_size=100000, return_ids=False):
+    if str(path).endswith('.npz'):
+        with np.load(path) as data:
+            tables = {name: data[name] for name in data.files}
+        chunks = {name: [tables[name]] for name in ('nodes', 'elements', 'restraints', 'loads')}
+        # files written before the ids were stored number the materials and sections by their rows
+        material_ids = tables.get('material_ids', np.arange(1, len(tables['materials']) + 1))
+        section_ids = tables.get('section_ids', np.arange(1, len(tables['sections']) + 1))
+        materials = __build_materials(material_ids, tables['material_types'], tables['materials'])
+        sections = __build_sections(section_ids, tables['section_types'], tables['sections'])
+    else:
+        chunks = {name: __read_csv_chunks(os.path.join(path, name + '.csv'), chunk_size)
+                  for name in ('nodes', 'elements', 'restraints', 'loads')}
+        materials = __build_materials(*__read_typed_csv(os.path.join(path, 'materials.csv')))
+        sections = __build_sections(*__read_typed_csv(os.path.join(path, 'sections.csv')))
+
+    nodes = {}
+    for table in chunks['nodes']:
+        nodes.update(zip(table[:, 0].astype(np.int64).tolist(),
+                         map(Node, table[:, 1].tolist(), table[:, 2].tolist(), table[:, 3].tolist())))
+    node_lookup = __lookup_table(nodes)
+    section_lookup = __lookup_table(sections)
+    material_lookup = __lookup_table(materials)
+    type_lookup = __lookup_table(ELEMENT_TYPES)
+
+    elements = {}
+    for table in chunks['elements']:
+        table = table.astype(np.int64)
+        elements.update(zip(table[:, 0].tolist(),
+                            map(__new_element, __lookup(type_lookup, table[:, 1], 'element type'),
+                                __lookup(node_lookup, table[:, 2], 'node'), __lookup(node_lookup, table[:, 3], 'node'),
+                                __lookup(section_lookup, table[:, 4], 'section'),
+                                __lookup(material_lookup, table[:, 5], 'material'))))
+
+    for table in chunks['restraints']:
+        restrained_nodes = __lookup(node_lookup, table[:, 0].astype(np.int64), 'node')
+        for number in range(1, 7):
+            rows = table[:, number] != 0
+            for node, displacement in zip(restrained_nodes[rows], table[rows, number + 6].tolist()):
+                getattr(node, 'dof_%d' % number).displaced = displacement
+
+    for table in chunks['loads']:
+        loaded_nodes = __lookup(node_lookup, table[:, 0].astype(np.int64), 'node')
+        for number in range(1, 7):
+            rows = table[:, number] != 0
+            for node, force in zip(loaded_nodes[rows], table[rows, number].tolist()):
+                getattr(node, 'dof_%d' % number).force = force
+
+    structure = Structure(list(elements.values()))
+    if return_ids:
+        return structure, nodes, elements
+    return structure
+
+
+def write_model(structure: Structure, path):
+    tables, types = model_tables(structure)
+    if str(path).endswith('.npz'):
+        np.savez(path, material_types=types['materials'], section_types=types['sections'], **tables)
+        return
+
+    os.makedirs(path, exist_ok=True)
+    for name in ('nodes', 'elements', 'restraints', 'loads'):
+        integer = name == 'elements'
+        np.savetxt(os.path.join(path, name + '.csv'), tables[name], delimiter=',', comments='',
+                   header=','.join(HEADERS[name]), fmt='%d' if integer else '%.17g')
+    for name, ids in (('materials', tables['material_ids']), ('sections', tables['section_ids'])):
+        with open(os.path.join(path, name + '.csv'), 'w', newline='') as file:
+            writer = csv.writer(file)
+            writer.writerow(HEADERS[name])
+            for item_id, type_name, values in zip(ids.tolist(), types[name], tables[name]):
+                writer.writerow([item_id, type_name] + ['' if np.isnan(value) else '%.17g' % value
+                                                        for value in values])
+
+
+def model_tables(structure: Structure):
+    if structure.constraints:
+        raise ValueError("Constraints cannot be written to a model file.")
+    element_codes = {element_type: code for code, element_type in ELEMENT_TYPES.items()}
+    node_ids = {node: i + 1 for i, node in enumerate(structure.nodes)}
+    materials = {}
+    sections = {}
+    elements = np.zeros((len(structure.elements), 6), dtype=np.int64)
+    for i, element in enumerate(structure.elements):
+        if type(element) not in element_codes:
+            raise ValueError("%s cannot be written to a model file." % type(element).__name__)
+        section = sections.setdefault(element.section, len(sections) + 1)
+        material = materials.setdefault(element.material, len(materials) + 1)
+        elements[i] = [i + 1, element_codes[type(element)], node_ids[element.start_node],
+                       node_ids[element.end_node], section, material]
+
+    nodes = np.array([[node_ids[node], node.x, node.y, node.z] for node in structure.nodes], dtype=float)
+    restraints = []
+    loads = []
+    for node in structure.nodes:
+        dofs = [getattr(node, 'dof_%d' % number) for number in range(1, 7)]
+        if any(dof.restrained for dof in dofs):
+            restraints.append([node_ids[node]] + [float(dof.restrained) for dof in dofs] +
+                              [dof.displacement if dof.restrained else 0.0 for dof in dofs])
+        forces = [0.0 if dof.restrained else dof.force for dof in dofs]
+        if any(forces):
+            loads.append([node_ids[node]] + forces)
+
+    tables = {'nodes': nodes,
+              'elements': elements,
+              'restraints': np.array(restraints, dtype=float).reshape(-1, 13),
+              'loads': np.array(loads, dtype=float).reshape(-1, 7),
+              'materials': np.array([[__value(material, column) for column in MATERIAL_COLUMNS]
+                                     for material in materials], dtype=float).reshape(-1, len(MATERIAL_COLUMNS)),
+              'sections': np.array([[__value(section, column) for column in SECTION_COLUMNS]
+                                    for section in sections], dtype=float).reshape(-1, len(SECTION_COLUMNS)),
+              'material_ids': np.arange(1, len(materials) + 1),
+              'section_ids': np.arange(1, len(sections) + 1)}
+    types = {'materials': np.array([type(material).__name__ for material in materials], dtype=str),
+             'sections': np.array([__section_type(section) for section in sections], dtype=str)}
+    return tables, types
+
+
+def __read_csv_chunks(path, chunk_size):
+    if not os.path.exists(path):
+        return
+    with open(path) as file:
+        columns = len(file.readline().split(','))
+        while True:
+            lines = list(islice(file, chunk_size))
+            if not lines:
+                break
+            yield np.loadtxt(lines, delimiter=',', ndmin=2).reshape(-1, columns)
+
+
+def __read_typed_csv(path):
+    with open(path, newline='') as file:
+        rows = list(csv.reader(file))[1:]
+    ids = [int(row[0]) for row in rows]
+    types = [row[1] for row in rows]
+    values = np.array([[float(value) if value else np.nan for value in row[2:]] for row in rows], dtype=float)
+    return ids, types, values
+
+
+def __lookup_table(items):
+    """(sorted ids, objects ordered as the ids) of a dict {id: object}"""
+    ids = np.array(list(items), dtype=np.int64)
+    objects = np.empty(len(items), dtype=object)
+    objects[:] = list(items.values())
+    order = np.argsort(ids, kind='stable')
+    return ids[order], objects[order]
+
+
+def __lookup(table, ids, name):
+    """array of the objects of an array of ids"""
+    keys, objects = table
+    positions = np.minimum(np.searchsorted(keys, ids), max(len(keys) - 1, 0))
+    found = keys[positions] == ids if len(keys) else np.zeros(len(ids), dtype=bool)
+    if not found.all():
+        raise ValueError("Unknown %s id %d." % (name, ids[~found][0]))
+    return objects[positions]
+
+
+def __new_element(element_type, start_node, end_node, section, material):
+    return element_type(start_node, end_node, section, material)
+
+
+def __value(item, column):
+    if isinstance(item, Section.ArbitrarySection) and column in ('breadth', 'depth', 'radius'):
+        return np.nan
+    value = getattr(item, column, None)
+    return np.nan if value is None else value
+
+
+def __section_type(section):
+    if type(section) not in (Section.Rectangle, Section.Circle, Section.ArbitrarySection):
+        raise ValueError("%s cannot be written to a model file." % type(section).__name__)
+    return type(section).__name__
+
+
+def __optional(value):
+    return None if np.isnan(value) else value
+
+
+def __build_materials(ids, types, values):
+    materials = {}
+    for material_id, material_type, row in zip(np.asarray(ids, dtype=np.int64).tolist(), types, values):
+        e, nu, density, fy, fu = [__optional(value) for value in row]
+        density = density or 0
+        if material_type == 'Steel':
+            materials[material_id] = Material.Steel(fy, fu, e, nu, density)
+        elif material_type == 'Concrete':
+            materials[material_id] = Material.Concrete(e, nu, density)
+        else:
+            raise ValueError("Unknown material type %s." % material_type)
+    return materials
+
+
+def __build_sections(ids, types, values):
+    sections = {}
+    for section_id, section_type, row in zip(np.asarray(ids, dtype=np.int64).tolist(), types, values):
+        breadth, depth, radius, area, iy, iz, j, cw, zy, zz = [__optional(value) for value in row]
+        if section_type == 'Rectangle':
+            sections[section_id] = Section.Rectangle(breadth, depth)
+        elif section_type == 'Circle':
+            sections[section_id] = Section.Circle(radius)
+        elif section_type == 'ArbitrarySection':
+            sections[section_id] = Section.ArbitrarySection(area, iy, iz, j, cw, zy, zz)
+        else:
+            raise ValueError("Unknown section type %s." % section_type)
+    return sections
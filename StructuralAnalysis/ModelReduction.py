@@ -0,0 +1,140 @@
+"""
+This class holds a dynamically reduced (Craig-Bampton or Guyan) model of a structure.
+The reduced coordinates are the interface degrees of freedom followed by the amplitudes of the fixed-interface
+normal modes kept in the model. With no modes kept the reduction is Guyan (static) reduction.
+The reduction is made once by ReducedModel.craig_bampton, can be saved with self.save and loaded in other runs with
+ReducedModel.load, so the internal eigenvalue problem is only solved once. A saved model holds the key of its
+inputs, and craig_bampton only reuses a file made from the same matrices, interface and number of modes.
+A ReducedElement places the model in a parent structure. Structures with constraints cannot be reduced.
+Attributes:
+    self.stiffness_matrix: reduced stiffness matrix (interface + modes)
+    self.mass_matrix: reduced mass matrix (interface + modes)
+    self.interface_degrees_of_freedom: list of (interface node position, dof number 1 to 6) that orders the interface
+                                       rows and columns of the reduced matrices
+    self.frequencies: circular frequencies of the fixed-interface modes kept in the model
+    self.constraint_modes: interior displacements caused by unit interface displacements (-inverse(Kii) * Kib)
+    self.normal_modes: mass normalized fixed-interface modes of the interior degrees of freedom
+    self.key: SHA-256 hash of the inputs of the reduction (None if unknown)
+Properties:
+    self.number_of_modes: number of fixed-interface modes kept in the model
+Methods:
+    self.interior_displacements(reduced_displacements): recovers the interior displacements
+    self.save(path): writes the model to a .npz file
+"""
+
+
+import os
+import hashlib
+import numpy as np
+from scipy.linalg import eigh
+from StructuralAnalysis.Node import Node
+from StructuralAnalysis.Structure import Structure
+from StructuralAnalysis.Factorization import Factorization
+from StructuralAnalysis.__SolverHelper import global_elastic_matrix, global_mass_matrix
+
+
+class ReducedModel:
+
+    def __init__(self, stiffness_matrix, mass_matrix, interface_degrees_of_freedom, frequencies,
+                 constraint_modes, normal_modes, key=None):
+        self.stiffness_matrix = np.asarray(stiffness_matrix, dtype=float)
+        self.mass_matrix = np.asarray(mass_matrix, dtype=float)
+        self.interface_degrees_of_freedom = [(int(position), int(number))
+                                             for position, number in interface_degrees_of_freedom]
+        self.frequencies = np.asarray(frequencies, dtype=float)
+        self.constraint_modes = np.asarray(constraint_modes, dtype=float)
+        self.normal_modes = np.asarray(normal_modes, dtype=float)
+        self.key = key
+
+    @classmethod
+    def craig_bampton(cls, structure: Structure, interface_nodes: [Node], number_of_modes=0, path=None):
+        """
+        Reduces structure onto the degrees of freedom of interface_nodes plus number_of_modes fixed-interface modes.
+        If path is given and holds the model of the same inputs, the model is loaded from it instead; otherwise the
+        model is computed and saved to it.
+        """
+        if structure.constraints:
+            raise ValueError("Structures with constraints cannot be reduced.")
+
+        structure_dofs = set(structure.degrees_of_freedom)
+        interface_dofs = []
+        interface_degrees_of_freedom = []
+        for position, node in enumerate(interface_nodes):
+            for number in range(1, 7):
+                dof = getattr(node, 'dof_%d' % number)
+                if dof in structure_dofs:
+                    interface_dofs.append(dof)
+                    interface_degrees_of_freedom.append((position, number))
+        interface_set = set(interface_dofs)
+        interior_dofs = [dof for dof in structure.free_degrees_of_freedom if dof not in interface_set]
+        if number_of_modes > len(interior_dofs):
+            raise ValueError("Cannot keep %d modes of %d interior degrees of freedom." %
+                             (number_of_modes, len(interior_dofs)))
+
+        b = [structure.dof_indices[dof] for dof in interface_dofs]
+        i = [structure.dof_indices[dof] for dof in interior_dofs]
+        stiffness = global_elastic_matrix(structure)
+        mass = global_mass_matrix(structure)
+        ids = i + b
+        key = cls.__inputs_key(stiffness[np.ix_(ids, ids)], mass[np.ix_(ids, ids)], interface_degrees_of_freedom,
+                               number_of_modes)
+        if path is not None and os.path.exists(path):
+            model = cls.load(path)
+            if model.key == key:
+                return model
+        kii = stiffness[np.ix_(i, i)]
+        kib = stiffness[np.ix_(i, b)]
+
+        constraint_modes = -Factorization(kii).solve(kib) if i else np.zeros((0, len(b)))
+        if number_of_modes:
+            eigenvalues, normal_modes = eigh(kii, mass[np.ix_(i, i)], subset_by_index=[0, number_of_modes - 1])
+            frequencies = np.sqrt(np.abs(eigenvalues))
+        else:
+            normal_modes = np.zeros((len(i), 0))
+            frequencies = np.zeros(0)
+
+        # reduced coordinates [interface displacements, modal amplitudes]
+        transformation = np.zeros((len(i) + len(b), len(b) + number_of_modes))
+        transformation[:len(i), :len(b)] = constraint_modes
+        transformation[:len(i), len(b):] = normal_modes
+        transformation[len(i):, :len(b)] = np.identity(len(b))
+        stiffness_matrix = transformation.T.dot(stiffness[np.ix_(ids, ids)]).dot(transformation)
+        mass_matrix = transformation.T.dot(mass[np.ix_(ids, ids)]).dot(transformation)
+
+        model = cls(stiffness_matrix, mass_matrix, interface_degrees_of_freedom, frequencies,
+                    constraint_modes, normal_modes, key)
+        if path is not None:
+            model.save(path)
+        return model
+
+    @classmethod
+    def load(cls, path):
+        with np.load(path) as data:
+            return cls(data['stiffness_matrix'], data['mass_matrix'], data['interface_degrees_of_freedom'],
+                       data['frequencies'], data['constraint_modes'], data['normal_modes'],
+                       str(data['key']) or None if 'key' in data.files else None)
+
+    def save(self, path):
+        with open(path, 'wb') as file:
+            np.savez(file, stiffness_matrix=self.stiffness_matrix, mass_matrix=self.mass_matrix,
+                     interface_degrees_of_freedom=np.reshape(self.interface_degrees_of_freedom, (-1, 2)),
+                     frequencies=self.frequencies, constraint_modes=self.constraint_modes,
+                     normal_modes=self.normal_modes, key=np.array(self.key or ''))
+
+    @staticmethod
+    def __inputs_key(stiffness, mass, interface_degrees_of_freedom, number_of_modes):
+        """hash of the (interior + interface) stiffness and mass matrices, the interface and the number of modes"""
+        digest = hashlib.sha256()
+        digest.update(np.ascontiguousarray(stiffness, dtype=float).tobytes())
+        digest.update(np.ascontiguousarray(mass, dtype=float).tobytes())
+        digest.update(repr((len(stiffness), interface_degrees_of_freedom, number_of_modes)).encode())
+        return digest.hexdigest()
+
+    @property
+    def number_of_modes(self):
+        return len(self.frequencies)
+
+    def interior_displacements(self, reduced_displacements):
+        interface = len(self.interface_degrees_of_freedom)
+        return np.dot(self.constraint_modes, reduced_displacements[:interface]) + \
+            np.dot(self.normal_modes, reduced_displacements[interface:])
@@ -0,0 +1,249 @@
+"""
+Classes used by the moving-load analysis: influence lines of a structure for a unit load travelling along a lane, and
+the envelopes of vehicles (trains of axle loads) driven along the lane. The unit loads of all the stations are solved
+at once by ElasticSystem.solve_load_cases; a load inside an element is applied as its consistent nodal forces, so the
+ordinates are exact at the stations and interpolated linearly between them. The response of a vehicle is evaluated
+for every position that brings an axle onto a station, as one sparse product with the influence lines.
+The lane elements must be line elements (see MemberForces). Structures with constraints are not supported.
+
+Lane: a path along a chain of elements.
+Attributes:
+    self.elements: list of the elements, in the order they are travelled
+    self.direction: array (3,) of the global direction of the unit load, (0, -1, 0) by default (gravity along -y)
+    self.positions: array (stations,) of the distance of every station from the start of the lane
+    self.length: length of the lane
+Methods:
+    self.stations(): list of (node, None, None) or (None, element, local x-coordinate) of every station
+
+Vehicle: a train of axle loads.
+Attributes:
+    self.loads: array (axles,) of the axle loads, the first axle leads
+    self.offsets: array (axles,) of the distance of every axle behind the first one
+    self.length: distance between the first and the last axle
+
+InfluenceLines: influence lines of every response of a structure for a lane.
+Attributes:
+    self.structure, self.lane
+    self.system: ElasticSystem of the structure (may be given to share one factorization between lanes)
+    self.positions: array (stations,) of the stations of the lane
+    self.node_ids, self.element_ids: ids of the nodes and of the line elements, ordered as the arrays
+    self.displacements: array (stations, nodes, 6) of the node displacements
+    self.reactions: array (stations, nodes, 6) of the reactions (a unit load at a support gives a unit reaction)
+    self.end_forces: array (stations, elements, 12) of the local end forces of the line elements (see MemberForces)
+Methods:
+    self.displacement(node, number), self.reaction(node, number): influence line of dof_<number> of a node
+    self.end_force(element, index): influence line of one of the 12 local end forces of an element
+    self.envelope(vehicle, both_directions=True): Envelope of a vehicle driven along the lane (and back)
+
+Envelope: extreme responses of a vehicle.
+Attributes:
+    self.vehicle
+    self.positions: array of the evaluated positions of the first axle (distance from the start of the lane)
+    self.max_displacements, self.min_displacements: arrays (nodes, 6)
+    self.max_reactions, self.min_reactions: arrays (nodes, 6)
+    self.max_end_forces, self.min_end_forces: arrays (elements, 12)
+"""
+
+
+import numpy as np
+from scipy.sparse import csr_matrix
+from StructuralAnalysis.Structure import Structure
+from StructuralAnalysis.ElasticSystem import ElasticSystem
+from StructuralAnalysis.MemberForces import MemberForces, ELEMENT_ACTIONS
+from StructuralAnalysis.Results import dof_positions
+from StructuralAnalysis import Instrumentation
+
+
+class Lane:
+
+    def __init__(self, elements, direction=(0, -1, 0), stations_per_element=4):
+        """stations_per_element: number of intervals every element is divided into by the stations"""
+        if not elements:
+            raise ValueError("A lane needs at least one element.")
+        for element in elements:
+            if type(element) not in ELEMENT_ACTIONS:
+                raise ValueError("Element %d is not a line element." % element.id)
+        self.elements = list(elements)
+        self.direction = np.asarray(direction, dtype=float) / np.linalg.norm(direction)
+        self.stations_per_element = stations_per_element
+        self.__nodes = self.__chain_nodes()
+        self.__stations = []
+        positions = []
+        distance = 0.0
+        for i, element in enumerate(self.elements):
+            start, end = self.__nodes[i], self.__nodes[i + 1]
+            length = element.length
+            if i == 0:
+                self.__stations.append((start, None, None))
+                positions.append(distance)
+            for k in range(1, stations_per_element):
+                ratio = k / stations_per_element
+                # the local x-coordinate is measured from the start node of the element
+                x = ratio * length if start is element.start_node else (1 - ratio) * length
+                self.__stations.append((None, element, x))
+                positions.append(distance + ratio * length)
+            distance += length
+            self.__stations.append((end, None, None))
+            positions.append(distance)
+        self.positions = np.array(positions)
+        self.length = distance
+
+    def stations(self):
+        return list(self.__stations)
+
+    def __chain_nodes(self):
+        """nodes of the lane in the order they are reached"""
+        elements = self.elements
+        if len(elements) == 1:
+            return [elements[0].start_node, elements[0].end_node]
+        first, second = elements[0], elements[1]
+        start = first.end_node if first.end_node not in second.nodes else first.start_node
+        nodes = [start]
+        for element in elements:
+            if nodes[-1] is element.start_node:
+                nodes.append(element.end_node)
+            elif nodes[-1] is element.end_node:
+                nodes.append(element.start_node)
+            else:
+                raise ValueError("Element %d is not connected to the previous element of the lane." % element.id)
+        return nodes
+
+
+class Vehicle:
+
+    def __init__(self, loads, spacings=()):
+        """loads: axle loads from the first axle to the last, spacings: distances between consecutive axles"""
+        self.loads = np.asarray(loads, dtype=float).ravel()
+        if len(spacings) != len(self.loads) - 1:
+            raise ValueError("A vehicle of %d axles needs %d spacings." % (len(self.loads), len(self.loads) - 1))
+        self.offsets = np.concatenate([[0.0], np.cumsum(spacings)])
+        self.length = self.offsets[-1]
+
+
+class Envelope:
+
+    def __init__(self, vehicle, positions, displacements, reactions, end_forces):
+        """displacements, reactions and end_forces: (minimum, maximum) pairs of arrays"""
+        self.vehicle = vehicle
+        self.positions = positions
+        self.min_displacements, self.max_displacements = displacements
+        self.min_reactions, self.max_reactions = reactions
+        self.min_end_forces, self.max_end_forces = end_forces
+
+
+class InfluenceLines:
+
+    def __init__(self, structure: Structure, lane: Lane, system: ElasticSystem = None):
+        self.structure = structure
+        self.lane = lane
+        self.system = system if system is not None else ElasticSystem(structure)
+        if self.system.singular:
+            raise ValueError("Matrix is singular or ill-conditioned! Check for stability.")
+        self.positions = lane.positions
+        self.__node_rows = {node: i for i, node in enumerate(structure.nodes)}
+        self.node_ids = np.array([node.id for node in structure.nodes])
+        self.__member_forces = MemberForces(structure)
+        self.element_ids = self.__member_forces.element_ids
+        self.displacements, self.reactions, self.end_forces = self.__solve()
+
+    def displacement(self, node, number):
+        return self.displacements[:, self.__node_rows[node], number - 1]
+
+    def reaction(self, node, number):
+        return self.reactions[:, self.__node_rows[node], number - 1]
+
+    def end_force(self, element, index):
+        return self.end_forces[:, self.__member_forces.row(element), index]
+
+    @Instrumentation.timed('moving_load_envelope')
+    def envelope(self, vehicle: Vehicle, both_directions=True):
+        patterns = [vehicle.offsets]
+        if both_directions:
+            # driven backwards, the axles are ahead of the reference position
+            patterns.append(-vehicle.offsets)
+        extremes = [[], [], []]
+        positions = []
+        for offsets in patterns:
+            # every position that brings an axle onto a station, the vehicle may be partly off the lane
+            candidates = np.unique((self.positions[:, np.newaxis] + offsets[np.newaxis, :]).ravel())
+            weights = self.__axle_weights(candidates, offsets, vehicle.loads)
+            positions.append(candidates)
+            for group, lines in zip(extremes, (self.displacements, self.reactions, self.end_forces)):
+                responses = weights.dot(lines.reshape(len(self.positions), -1))
+                group.append((responses.min(axis=0).reshape(lines.shape[1:]),
+                              responses.max(axis=0).reshape(lines.shape[1:])))
+        envelopes = [(np.min([low for low, _ in group], axis=0), np.max([high for _, high in group], axis=0))
+                     for group in extremes]
+        return Envelope(vehicle, np.unique(np.concatenate(positions)), *envelopes)
+
+    def __axle_weights(self, positions, offsets, loads):
+        """sparse (positions, stations) matrix of the axle loads interpolated onto the stations"""
+        stations = self.positions
+        axles = positions[:, np.newaxis] - offsets[np.newaxis, :]
+        rows = np.broadcast_to(np.arange(len(positions))[:, np.newaxis], axles.shape)
+        values = np.broadcast_to(loads[np.newaxis, :], axles.shape)
+        # axles beyond the ends of the lane carry nothing
+        on_lane = (axles >= stations[0]) & (axles <= stations[-1])
+        axles, rows, values = axles[on_lane], rows[on_lane], values[on_lane]
+        left = np.clip(np.searchsorted(stations, axles, side='right') - 1, 0, len(stations) - 2)
+        ratio = (axles - stations[left]) / (stations[left + 1] - stations[left])
+        return csr_matrix((np.concatenate([values * (1 - ratio), values * ratio]),
+                           (np.concatenate([rows, rows]), np.concatenate([left, left + 1]))),
+                          shape=(len(positions), len(stations)))
+
+    @Instrumentation.timed('influence_lines')
+    def __solve(self):
+        stations = self.lane.stations()
+        forces = np.zeros((len(stations), len(self.structure.nodes), 6))
+        # (station, element row, local fixed-end load vector) of the stations inside the elements
+        element_loads = []
+        for i, (node, element, x) in enumerate(stations):
+            if node is not None:
+                forces[i, self.__node_rows[node], :3] += self.lane.direction
+                continue
+            row = self.__member_forces.row(element)
+            transformation = self.__member_forces.transformation_matrices[row]
+            local = self.__consistent_load(element, x, np.dot(transformation[:3, :3], self.lane.direction))
+            nodal = np.dot(transformation.T, local)
+            forces[i, self.__node_rows[element.start_node]] += nodal[:6]
+            forces[i, self.__node_rows[element.end_node]] += nodal[6:]
+            element_loads.append((i, row, local))
+        Instrumentation.count('influence_stations', len(stations))
+
+        displacements, reactions = self.system.solve_load_cases(forces)
+        # the loads applied directly at the supports are carried by the supports
+        indices, rows, columns = dof_positions(self.structure)(self.structure.restrained_degrees_of_freedom)
+        reactions[:, rows, columns] -= forces[:, rows, columns]
+
+        member_forces = self.__member_forces
+        start_rows = np.array([self.__node_rows[element.start_node] for element in member_forces.elements], dtype=int)
+        end_rows = np.array([self.__node_rows[element.end_node] for element in member_forces.elements], dtype=int)
+        global_displacements = np.concatenate([displacements[:, start_rows], displacements[:, end_rows]], axis=2)
+        stiffness = np.einsum('eij,ejk->eik', member_forces.local_matrices, member_forces.transformation_matrices)
+        end_forces = np.einsum('eij,sej->sei', stiffness, global_displacements)
+        for i, row, local in element_loads:
+            end_forces[i, row] -= local
+        return displacements, reactions, end_forces
+
+    @staticmethod
+    def __consistent_load(element, x, load):
+        """local equivalent nodal forces (12,) of a point load (local components) at x, as the end forces layout"""
+        bending_z, bending_y, _ = ELEMENT_ACTIONS[type(element)]
+        ratio = x / element.length
+        linear = (1 - ratio, ratio)
+        # cubic shape functions of FrameElement.shape_function_matrix
+        n3 = 1 - 3 * ratio ** 2 + 2 * ratio ** 3
+        n4 = 3 * ratio ** 2 - 2 * ratio ** 3
+        n5 = x * (1 - ratio) ** 2
+        n6 = x * (ratio ** 2 - ratio)
+        vector = np.zeros(12)
+        vector[[0, 6]] = np.multiply(linear, load[0])
+        if bending_z:
+            vector[[1, 5, 7, 11]] = np.multiply((n3, n5, n4, n6), load[1])
+        else:
+            vector[[1, 7]] = np.multiply(linear, load[1])
+        if bending_y:
+            vector[[2, 4, 8, 10]] = np.multiply((n3, -n5, n4, -n6), load[2])
+        else:
+            vector[[2, 8]] = np.multiply(linear, load[2])
+        return vector
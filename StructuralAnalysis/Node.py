@@ -10,6 +10,7 @@ Attributes:
     self.dof_4 : rotation about the global x-direction
     self.dof_5 : rotation about the global y-direction
     self.dof_6 : rotation about the global z-direction
+    self.revision: number of coordinate changes, used by Structure to find the elements to assemble again
 """
 
 from StructuralAnalysis.DegreeOfFreedom import DegreeOfFreedom
@@ -24,6 +25,7 @@ class Node:
         self._x = x
         self._y = y
         self._z = z
+        self.revision = 0
         self.dof_1 = DegreeOfFreedom()
         self.dof_2 = DegreeOfFreedom()
         self.dof_3 = DegreeOfFreedom()
@@ -38,6 +40,7 @@ class Node:
     @x.setter
     def x(self, value):
         self._x = value
+        self.revision += 1
 
     @property
     def y(self):
@@ -46,6 +49,7 @@ class Node:
     @y.setter
     def y(self, value):
         self._y = value
+        self.revision += 1
 
     @property
     def z(self):
@@ -54,6 +58,7 @@ class Node:
     @z.setter
     def z(self, value):
         self._z = value
+        self.revision += 1
 
     def __repr__(self):
         return "NODE ID: %d" % self.id
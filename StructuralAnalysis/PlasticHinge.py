@@ -0,0 +1,63 @@
+"""
+Classes used by the first-order inelastic (event-to-event) analysis.
+
+PlasticHinge: a yielded end force of an element.
+Attributes:
+    self.element: element object in which the hinge formed
+    self.node: node object at which the hinge formed
+    self.local_index: index of the released end force in the element local stiffness matrix
+    self.capacity: plastic capacity of the end force (plastic moment or axial yield force)
+    self.load_factor: load factor at which the hinge formed
+    self.event: number of the event (1 for the first hinge)
+
+PushoverResult: output of Solver.analyze_first_order_inelastic.
+Attributes:
+    self.structure: the analyzed structure
+    self.load_factors: array of the load factor at the start and at every event
+    self.displacements: array (events + 1, free degrees of freedom) of the displacements at every load factor
+    self.hinges: list of PlasticHinge objects in the order of formation
+    self.mechanism: True if the analysis stopped because a collapse mechanism formed
+    self.refactorizations: number of full factorizations of the stiffness matrix
+    self.refactorizations_avoided: number of hinges handled by a low-rank update instead of a refactorization
+Methods:
+    self.curve(dof): returns (displacements of dof, load factors) i.e. the load-displacement curve
+"""
+
+
+import numpy as np
+
+
+class PlasticHinge:
+
+    def __init__(self, element, local_index, capacity, load_factor, event):
+        self.element = element
+        self.local_index = local_index
+        self.capacity = capacity
+        self.load_factor = load_factor
+        self.event = event
+        half = len(element._local_matrix()) // 2
+        self.node = element.start_node if local_index < half else element.end_node
+
+    def __repr__(self):
+        return "HINGE %d: ELEMENT ID: %d, NODE ID: %d, LOAD FACTOR: %.4e" % \
+               (self.event, self.element.id, self.node.id, self.load_factor)
+
+    def __str__(self):
+        return self.__repr__()
+
+
+class PushoverResult:
+
+    def __init__(self, structure, load_factors, displacements, hinges, mechanism,
+                 refactorizations, refactorizations_avoided):
+        self.structure = structure
+        self.load_factors = np.array(load_factors)
+        self.displacements = np.array(displacements)
+        self.hinges = hinges
+        self.mechanism = mechanism
+        self.refactorizations = refactorizations
+        self.refactorizations_avoided = refactorizations_avoided
+
+    def curve(self, dof):
+        index = self.structure.free_degrees_of_freedom.index(dof)
+        return self.displacements[:, index], self.load_factors
@@ -0,0 +1,114 @@
+"""
+Offscreen export of the structure and of its deformed shape (or of any mode shape) to PNG and SVG files, without Qt,
+OpenGL or a display. The station geometry of DeformedShape is projected with an orthographic camera (global y-axis
+up, as in the viewer of Visualization) and the line segments are either rasterized with NumPy and written as a PNG
+file (zlib only) or serialized as SVG paths.
+
+Functions:
+    export_plot(path, structure, number_of_stations, scale, node_displacements, show_undeformed, width, height,
+                azimuth, elevation, background): writes a PNG or an SVG file depending on the extension of path.
+                node_displacements is an array (nodes, 6) ordered as structure.nodes (e.g. Results.displacements or
+                a mode shape); the displacements of the degrees of freedom are used if it is not given.
+    project(points, azimuth, elevation): (..., 2) screen coordinates of global (..., 3) points
+    rasterize(lines, width, height, background): returns an (height, width, 3) uint8 image of the lines
+    write_png(path, image): writes an (height, width, 3) uint8 image
+    write_svg(path, lines, width, height, background): writes the lines as SVG paths
+lines are lists of (polylines, color) where polylines is an array (polylines, points, 2) of screen coordinates in
+pixels and color is an (r, g, b) tuple.
+"""
+
+
+import zlib
+import struct
+import numpy as np
+from StructuralAnalysis.DeformedShape import DeformedShape
+
+COLORS = {'black': (0, 0, 0), 'white': (255, 255, 255), 'red': (220, 30, 30), 'gray': (150, 150, 150)}
+
+
+def export_plot(path, structure, number_of_stations=10, scale=1, node_displacements=None, show_undeformed=True,
+                width=1200, height=900, azimuth=45, elevation=30, background='black'):
+    shape = DeformedShape(structure, number_of_stations)
+    polylines = [(shape.coordinates + scale * shape.displacements(node_displacements), COLORS['red'])]
+    if show_undeformed:
+        undeformed = 'white' if background == 'black' else 'gray'
+        polylines.insert(0, (shape.coordinates[:, [0, -1]], COLORS[undeformed]))
+
+    projected = [(project(points, azimuth, elevation), color) for points, color in polylines]
+    lines = __fit(projected, width, height)
+    if str(path).lower().endswith('.svg'):
+        write_svg(path, lines, width, height, COLORS[background])
+    else:
+        write_png(path, rasterize(lines, width, height, COLORS[background]))
+
+
+def project(points, azimuth=45, elevation=30):
+    a = np.radians(azimuth)
+    e = np.radians(elevation)
+    right = np.array([np.cos(a), 0, -np.sin(a)])
+    up = np.array([-np.sin(a) * np.sin(e), np.cos(e), -np.cos(a) * np.sin(e)])
+    return np.stack([np.dot(points, right), np.dot(points, up)], axis=-1)
+
+
+def rasterize(lines, width, height, background=(0, 0, 0)):
+    image = np.empty((height, width, 3), dtype=np.uint8)
+    image[:] = background
+    for polylines, color in lines:
+        start = polylines[:, :-1].reshape(-1, 2)
+        end = polylines[:, 1:].reshape(-1, 2)
+        # one sample per pixel along the longer axis of every segment
+        steps = np.ceil(np.max(np.abs(end - start), axis=1)).astype(np.int64) + 1
+        segments = np.repeat(np.arange(len(steps)), steps)
+        offsets = np.arange(len(segments)) - np.repeat(np.cumsum(steps) - steps, steps)
+        ratios = offsets / np.maximum(steps - 1, 1)[segments]
+        samples = start[segments] + ratios[:, np.newaxis] * (end - start)[segments]
+        x, y = np.rint(samples).astype(np.int64).T
+        inside = (x >= 0) & (x < width) & (y >= 0) & (y < height)
+        image[y[inside], x[inside]] = color
+    return image
+
+
+def write_png(path, image):
+    height, width, _ = image.shape
+    rows = np.zeros((height, width * 3 + 1), dtype=np.uint8)
+    rows[:, 1:] = image.reshape(height, -1)
+
+    def chunk(kind, data):
+        return struct.pack('>I', len(data)) + kind + data + struct.pack('>I', zlib.crc32(kind + data) & 0xffffffff)
+
+    with open(path, 'wb') as file:
+        file.write(b'\x89PNG\r\n\x1a\n')
+        file.write(chunk(b'IHDR', struct.pack('>IIBBBBB', width, height, 8, 2, 0, 0, 0)))
+        file.write(chunk(b'IDAT', zlib.compress(rows.tobytes(), 6)))
+        file.write(chunk(b'IEND', b''))
+
+
+def write_svg(path, lines, width, height, background=(0, 0, 0)):
+    with open(path, 'w') as file:
+        file.write('<svg xmlns="http://www.w3.org/2000/svg" width="%d" height="%d" viewBox="0 0 %d %d">\n' %
+                   (width, height, width, height))
+        file.write('<rect width="100%%" height="100%%" fill="rgb(%d,%d,%d)"/>\n' % tuple(background))
+        for polylines, color in lines:
+            # all the polylines have the same number of points so one format string serves them all
+            template = 'M%.1f %.1f' + ' L%.1f %.1f' * (polylines.shape[1] - 1)
+            data = ' '.join(template % tuple(polyline) for polyline in polylines.reshape(len(polylines), -1).tolist())
+            file.write('<path fill="none" stroke="rgb(%d,%d,%d)" stroke-width="1" d="%s"/>\n' %
+                       (tuple(color) + (data,)))
+        file.write('</svg>\n')
+
+
+def __fit(projected, width, height, margin=0.05):
+    """scales the projected lines to pixels so that all of them fit in the image (screen y-axis downwards)"""
+    points = np.concatenate([polylines.reshape(-1, 2) for polylines, _ in projected])
+    lower = points.min(axis=0)
+    upper = points.max(axis=0)
+    extent = np.maximum(upper - lower, 1e-12)
+    factor = (1 - 2 * margin) * min(width / extent[0], height / extent[1])
+    center = (lower + upper) / 2
+    lines = []
+    for polylines, color in projected:
+        pixels = (polylines - center) * factor
+        pixels[..., 0] += width / 2
+        pixels[..., 1] = height / 2 - pixels[..., 1]
+        lines.append((pixels, color))
+    return lines
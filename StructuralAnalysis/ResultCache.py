@@ -0,0 +1,167 @@
+"""
+This class is a persistent, content-addressed cache of analysis results shared by all the processes using the same
+directory. The key of an entry is the SHA-256 hash of the canonical tables of the model (ModelFile.model_tables:
+geometry, connectivity, sections, materials, restraints and loads) and of the analysis type, so an unchanged model
+is found again regardless of the ids of its objects. Every entry is a ResultsStore directory.
+An entry is written in a temporary directory which is then renamed to its key, so other processes see either a
+complete entry or none. The least recently used entries are removed when the cache grows beyond max_size bytes.
+Models that cannot be written to a model file (constraints, superelements, fiber sections) are not cached.
+Attributes:
+    self.path: directory of the cache (default: $STRUCTURAL_ANALYSIS_CACHE or ~/.cache/structural_analysis)
+    self.max_size: size limit of the cache in bytes
+    self.hits, self.misses, self.stores, self.evictions: counters of this object
+Properties:
+    self.size: bytes used by the entries
+    self.entries: number of entries
+    self.statistics: dict of the counters, size and entries
+Methods:
+    self.key(structure, analysis): returns the hash of the model (None if the model cannot be cached)
+    self.load(structure, analysis): returns (free displacements, restrained reactions) or None on a miss
+    self.store(structure, analysis, results): adds the results of the structure to the cache
+    self.clear(): removes all the entries
+"""
+
+
+import os
+import shutil
+import hashlib
+import tempfile
+import numpy as np
+from StructuralAnalysis.ModelFile import model_tables
+from StructuralAnalysis.ResultsStore import ResultsStore
+from StructuralAnalysis.Results import dof_positions
+
+
+class ResultCache:
+    version = 1
+
+    def __init__(self, path=None, max_size=2 ** 30):
+        if path is None:
+            path = os.environ.get('STRUCTURAL_ANALYSIS_CACHE',
+                                  os.path.join(os.path.expanduser('~'), '.cache', 'structural_analysis'))
+        self.path = path
+        self.max_size = max_size
+        self.hits = 0
+        self.misses = 0
+        self.stores = 0
+        self.evictions = 0
+        os.makedirs(path, exist_ok=True)
+
+    @property
+    def size(self):
+        return sum(size for _, _, size in self.__entries())
+
+    @property
+    def entries(self):
+        return len(self.__entries())
+
+    @property
+    def statistics(self):
+        return {'hits': self.hits, 'misses': self.misses, 'stores': self.stores, 'evictions': self.evictions,
+                'entries': self.entries, 'size': self.size}
+
+    def key(self, structure, analysis):
+        try:
+            tables, types = model_tables(structure)
+        except ValueError:
+            return None
+        # forces at restrained degrees of freedom do not change the results (the solver overwrites them with the
+        # reactions), so they are left out of the key
+        restrained = np.zeros((len(tables['nodes']), 6))
+        restraints = tables['restraints']
+        restrained[restraints[:, 0].astype(int) - 1] = restraints[:, 1:7]
+        loads = tables['loads'].copy()
+        loads[:, 1:] *= 1 - restrained[loads[:, 0].astype(int) - 1]
+        tables['loads'] = loads[np.any(loads[:, 1:] != 0, axis=1)]
+
+        digest = hashlib.sha256(('%d:%s' % (self.version, analysis)).encode())
+        for name in sorted(tables):
+            array = np.ascontiguousarray(tables[name])
+            digest.update(('%s:%s:%s' % (name, array.dtype.str, array.shape)).encode())
+            digest.update(array.tobytes())
+        for name in sorted(types):
+            digest.update(('%s:%s' % (name, '|'.join(types[name]))).encode())
+        return digest.hexdigest()
+
+    def load(self, structure, analysis):
+        key = self.key(structure, analysis)
+        entry = os.path.join(self.path, key) if key else None
+        try:
+            store = ResultsStore(entry) if entry and os.path.isdir(entry) else None
+            if store is None or not store.load_cases:
+                raise FileNotFoundError
+            displacements = np.array(store.displacements())
+            reactions = np.array(store.reactions())
+            os.utime(entry)
+        except (FileNotFoundError, ValueError):
+            # missing entry, or an entry removed by another process while it was read
+            self.misses += 1
+            return None
+        self.hits += 1
+
+        positions = dof_positions(structure)
+        free = structure.free_degrees_of_freedom
+        restrained = structure.restrained_degrees_of_freedom
+        free_displacements = np.zeros(len(free))
+        restrained_reactions = np.zeros(len(restrained))
+        indices, rows, columns = positions(free)
+        free_displacements[indices] = displacements[rows, columns]
+        indices, rows, columns = positions(restrained)
+        restrained_reactions[indices] = reactions[rows, columns]
+        return free_displacements, restrained_reactions
+
+    def store(self, structure, analysis, results):
+        key = self.key(structure, analysis)
+        if key is None:
+            return
+        entry = os.path.join(self.path, key)
+        temporary = tempfile.mkdtemp(dir=self.path, prefix='.tmp-')
+        try:
+            ResultsStore(temporary).write(results)
+            if os.path.isdir(entry):
+                self.__remove(entry)
+            os.rename(temporary, entry)
+        except OSError:
+            # another process stored the same entry first
+            shutil.rmtree(temporary, ignore_errors=True)
+            return
+        self.stores += 1
+        self.__evict()
+
+    def clear(self):
+        for entry, _, _ in self.__entries():
+            self.__remove(entry)
+
+    def __entries(self):
+        """(path, last use, size) of the complete entries"""
+        entries = []
+        for name in os.listdir(self.path):
+            entry = os.path.join(self.path, name)
+            if name.startswith('.') or not os.path.isdir(entry):
+                continue
+            try:
+                size = sum(os.path.getsize(os.path.join(directory, file))
+                           for directory, _, files in os.walk(entry) for file in files)
+                entries.append((entry, os.path.getmtime(entry), size))
+            except FileNotFoundError:
+                continue
+        return entries
+
+    def __evict(self):
+        entries = sorted(self.__entries(), key=lambda entry: entry[1])
+        size = sum(entry_size for _, _, entry_size in entries)
+        for entry, _, entry_size in entries:
+            if size <= self.max_size:
+                break
+            self.__remove(entry)
+            self.evictions += 1
+            size -= entry_size
+
+    def __remove(self, entry):
+        # the entry is renamed first so it disappears at once for the other processes
+        removed = os.path.join(self.path, '.tmp-removed-' + os.path.basename(entry) + '-%d' % os.getpid())
+        try:
+            os.rename(entry, removed)
+        except OSError:
+            return
+        shutil.rmtree(removed, ignore_errors=True)
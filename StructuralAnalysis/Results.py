@@ -0,0 +1,177 @@
+"""
+This class holds the results of an analysis as arrays indexed by node (rows ordered as structure.nodes) and degree
+of freedom number (columns dof_1 to dof_6). It is returned by the Solver; nothing is printed or written unless
+requested. Derived quantities are computed on first access only.
+Attributes:
+    self.structure: the analyzed structure
+    self.node_ids: array of the node ids (nodes)
+    self.coordinates: array of the node coordinates (nodes, 3)
+    self.restrained: boolean array (nodes, 6), True for restrained degrees of freedom
+    self.applied_forces: array (nodes, 6) of the forces assigned by the user when the analysis started
+    self.displacements: array (nodes, 6) of displacements and rotations (including settlements)
+    self.reactions: array (nodes, 6) of the reactions (zero at free degrees of freedom)
+    self.free_displacements: displacements ordered as structure.free_degrees_of_freedom
+    self.restrained_reactions: reactions ordered as structure.restrained_degrees_of_freedom
+Properties (computed lazily):
+    self.element_end_forces: dict {element id: end forces in the element local axis (Element.end_forces)}
+    self.translations: array (nodes,) of the magnitude of the translation of every node
+    self.maximum_translation: (node id, magnitude) of the largest translation
+    self.member_forces: MemberForces object (end forces and internal-action diagrams of all the line elements)
+Methods:
+    self.node_displacements(node), self.node_reactions(node): the 6 values of a node
+    self.input_report(), self.results_report(): text reports (same layout as the former Input.txt and Results.txt)
+    self.write_report(path, background=False): writes both reports to path; with background=True the file is
+                                               written on a separate thread which is returned
+    self.save(path, load_case, ids=None): stores the arrays in the binary ResultsStore at path under load_case (see
+                                          ResultsStore.write for ids)
+"""
+
+
+import threading
+import numpy as np
+from functools import cached_property
+from StructuralAnalysis.ResultsStore import ResultsStore
+from StructuralAnalysis.MemberForces import MemberForces
+
+
+class Results:
+
+    def __init__(self, structure, free_displacements, restrained_reactions, applied_forces=None,
+                 restrained_displacements=None):
+        """
+        The settlements are read from the restrained degrees of freedom unless restrained_displacements (ordered as
+        structure.restrained_degrees_of_freedom) is given.
+        """
+        self.structure = structure
+        self.free_displacements = np.asarray(free_displacements, dtype=float)
+        self.restrained_reactions = np.asarray(restrained_reactions, dtype=float)
+
+        nodes = structure.nodes
+        self.__node_index = {node: i for i, node in enumerate(nodes)}
+        self.node_ids = np.array([node.id for node in nodes])
+        self.coordinates = np.array([[node.x, node.y, node.z] for node in nodes], dtype=float).reshape(-1, 3)
+        self.restrained = np.array([[getattr(node, 'dof_%d' % number).restrained for number in range(1, 7)]
+                                    for node in nodes], dtype=bool).reshape(-1, 6)
+        self.applied_forces = applied_forces if applied_forces is not None else node_forces(structure)
+
+        positions = dof_positions(structure)
+        self.displacements = np.zeros((len(nodes), 6))
+        self.reactions = np.zeros((len(nodes), 6))
+        restrained = structure.restrained_degrees_of_freedom
+        if restrained_displacements is None:
+            settlements = np.array([dof.displacement for dof in restrained], dtype=float)
+        else:
+            settlements = np.asarray(restrained_displacements, dtype=float)
+        indices, rows, columns = positions(restrained)
+        self.displacements[rows, columns] = settlements[indices]
+        self.reactions[rows, columns] = self.restrained_reactions[indices]
+        indices, rows, columns = positions(structure.free_degrees_of_freedom)
+        self.displacements[rows, columns] = self.free_displacements[indices]
+        self.__dof_displacements = dict(zip(structure.free_degrees_of_freedom, self.free_displacements))
+        self.__dof_displacements.update(zip(restrained, settlements))
+
+    def node_displacements(self, node):
+        return self.displacements[self.__node_index[node]]
+
+    def node_reactions(self, node):
+        return self.reactions[self.__node_index[node]]
+
+    @cached_property
+    def element_end_forces(self):
+        end_forces = {}
+        for element in self.structure.elements:
+            displacements = np.array([self.__dof_displacements.get(dof, 0.0)
+                                      for dof in element.degrees_of_freedom])
+            end_forces[element.id] = element.end_forces(displacements)
+        return end_forces
+
+    @cached_property
+    def member_forces(self):
+        return MemberForces(self.structure, self)
+
+    @cached_property
+    def translations(self):
+        return np.linalg.norm(self.displacements[:, :3], axis=1)
+
+    @cached_property
+    def maximum_translation(self):
+        i = int(np.argmax(self.translations))
+        return self.node_ids[i], self.translations[i]
+
+    def input_report(self):
+        lines = ["########################### INPUT ###########################\n\n",
+                 "******* NODES *******\n",
+                 "Node ID\t\t\tX\t\t\t\t\t\tY\t\t\t\t\t\tZ\n"]
+        lines += ["%d\t\t\t%.2e\t\t\t\t\t\t%.2e\t\t\t\t\t\t%.2e\n" % (node_id, x, y, z)
+                  for node_id, (x, y, z) in zip(self.node_ids, self.coordinates)]
+        lines += ["\n", "******* ELEMENTS *******\n", "Element ID\t\t\tStart Node\t\t\tEnd Node\n"]
+        lines += ["%d\t\t\t\t%d\t\t\t\t%d\n" % (element.id, element.nodes[0].id, element.nodes[-1].id)
+                  for element in self.structure.elements]
+        lines += ["\n", "******* BOUNDARY CONDITIONS *******\n", "True: Restrained, False: Free\n",
+                  "Node ID\t\tX-Disp.\t\tY-Disp.\t\tZ-Disp.\t\tX-Rot.\t\tY-Rot.\t\tZ-Rot.\n"]
+        lines += self.__table_rows("%d\t\t%.2e\t\t%.2e\t\t%.2e\t\t%.2e\t\t%.2e\t\t%.2e\n", self.restrained)
+        lines += ["\n", "******* INITIAL SETTLEMENT *******\n",
+                  "Node ID\t\tX-Disp.\t\tY-Disp.\t\tZ-Disp.\t\tX-Rot.\t\tY-Rot.\t\tZ-Rot.\n"]
+        lines += self.__table_rows("%d\t\t%.2e\t\t%.2e\t\t%.2e\t\t%.2e\t\t%.2e\t\t%.2e\n",
+                                   np.where(self.restrained, self.displacements, 0))
+        lines += ["\n", "******* APPLIED FORCES *******\n",
+                  "Node ID\t\tFX.\t\tFY.\t\tFZ.\t\tMX.\t\tMY.\t\tMZ.\n"]
+        lines += self.__table_rows("%d\t\t%.2e\t\t%.2e\t\t%.2e\t\t%.2e\t\t%.2e\t\t%.2e\n", self.applied_forces)
+        return "".join(lines)
+
+    def results_report(self):
+        row = "%d\t\t\t  %.2e\t\t\t  %.2e\t\t\t  %.2e\t\t\t  %.2e\t\t\t  %.2e\t\t\t  %.2e\n"
+        lines = ["########################### OUTPUT ###########################\n\n", "\n",
+                 "******* DISPLACEMENTS *******\n",
+                 "Node ID\t\t\tX-Disp.\t\t\t\tY-Disp.\t\t\t\tZ-Disp.\t\t\t\tX-Rot.\t\t\t\tY-Rot.\t\t\t\tZ-Rot.\n"]
+        lines += self.__table_rows(row, self.displacements)
+        lines += ["\n", "******* REACTIONS *******\n",
+                  "Node ID\t\t\tFX.\t\t\t\tFY.\t\t\t\tFZ.\t\t\t\tMX.\t\t\t\tMY.\t\t\t\tMZ.\n"]
+        lines += self.__table_rows(row, np.where(self.restrained, self.reactions, self.applied_forces))
+        return "".join(lines)
+
+    def write_report(self, path, background=False):
+        def write():
+            text = self.input_report() + "\n" + self.results_report()
+            with open(path, "w") as txt:
+                txt.write(text)
+
+        if not background:
+            write()
+            return None
+        thread = threading.Thread(target=write, daemon=False)
+        thread.start()
+        return thread
+
+    def save(self, path, load_case='default', ids=None):
+        store = ResultsStore(path)
+        store.write(self, load_case, ids)
+        return store
+
+    def __table_rows(self, row, values):
+        return [row % ((node_id,) + tuple(value)) for node_id, value in zip(self.node_ids, values)]
+
+
+def dof_positions(structure):
+    """
+    returns a function mapping a list of degrees of freedom to (indices in the list, node rows, dof columns) of the
+    result arrays; degrees of freedom that do not belong to a node of the structure are skipped
+    """
+    position = {}
+    for i, node in enumerate(structure.nodes):
+        for number in range(1, 7):
+            position[getattr(node, 'dof_%d' % number)] = (i, number - 1)
+
+    def positions(dofs):
+        found = [(i,) + position[dof] for i, dof in enumerate(dofs) if dof in position]
+        if not found:
+            return np.zeros(0, dtype=int), np.zeros(0, dtype=int), np.zeros(0, dtype=int)
+        indices, rows, columns = zip(*found)
+        return np.array(indices), np.array(rows), np.array(columns)
+
+    return positions
+
+
+def node_forces(structure):
+    return np.array([[getattr(node, 'dof_%d' % number).force for number in range(1, 7)]
+                     for node in structure.nodes], dtype=float).reshape(-1, 6)
@@ -0,0 +1,136 @@
+"""
+This class stores Results objects in a directory of binary NumPy (.npy) arrays, one file per quantity and load case,
+and reads them back memory-mapped so only the slices that are used are loaded from disk.
+Layout of the directory:
+    manifest.json: format version and the list of load cases
+    node_ids.npy: (nodes,) node ids, the row order of the node arrays
+    element_ids.npy: (elements,) element ids
+    element_offsets.npy: (elements + 1,) start of the end forces of every element in the flat end forces arrays
+    <load case>/displacements.npy: (nodes, 6)
+    <load case>/reactions.npy: (nodes, 6)
+    <load case>/element_end_forces.npy: flat array of the local end forces of all the elements
+Every file is written to a temporary file first and then renamed, so readers never see a partially written array.
+Attributes:
+    self.path: directory of the store
+Properties:
+    self.load_cases: list of the load case names
+    self.node_ids, self.element_ids: memory-mapped arrays
+Methods:
+    self.write(results, load_case, ids=None): adds (or replaces) a load case; ids is (node ids, element ids) ordered as
+                                              the nodes and elements of the structure, written instead of the
+                                              ids of the objects (e.g. the ids of the model file)
+    self.displacements(load_case), self.reactions(load_case): memory-mapped (nodes, 6) arrays
+    self.element_end_forces(load_case, element_id=None): flat memory-mapped array, or the end forces of one element
+    self.node_row(node_id): row of a node in the node arrays
+"""
+
+
+import os
+import json
+import tempfile
+import numpy as np
+
+
+class ResultsStore:
+    version = 1
+
+    def __init__(self, path):
+        self.path = path
+        os.makedirs(path, exist_ok=True)
+        self.__node_rows = None
+        self.__element_rows = None
+
+    @property
+    def load_cases(self):
+        return self.__manifest()['load_cases']
+
+    @property
+    def node_ids(self):
+        return self.__load('node_ids.npy')
+
+    @property
+    def element_ids(self):
+        return self.__load('element_ids.npy')
+
+    def write(self, results, load_case='default', ids=None):
+        if not load_case or os.sep in load_case or load_case in ('.', '..'):
+            raise ValueError("Invalid load case name %r." % load_case)
+        elements = results.structure.elements
+        if ids is None:
+            node_ids = results.node_ids
+            element_ids = np.array([element.id for element in elements])
+        else:
+            node_ids, element_ids = (np.asarray(values) for values in ids)
+            if len(node_ids) != len(results.node_ids) or len(element_ids) != len(elements):
+                raise ValueError("ids must hold one id per node (%d) and one per element (%d)."
+                                 % (len(results.node_ids), len(elements)))
+        end_forces = [results.element_end_forces[element.id] for element in elements]
+        element_offsets = np.concatenate([[0], np.cumsum([len(forces) for forces in end_forces])]).astype(np.int64)
+
+        manifest = self.__manifest()
+        if manifest['load_cases']:
+            if not np.array_equal(self.node_ids, node_ids) or \
+                    not np.array_equal(self.element_ids, element_ids):
+                raise ValueError("The results do not belong to the model of the store.")
+        else:
+            self.__save('node_ids.npy', node_ids)
+            self.__save('element_ids.npy', element_ids)
+            self.__save('element_offsets.npy', element_offsets)
+
+        os.makedirs(os.path.join(self.path, load_case), exist_ok=True)
+        self.__save(os.path.join(load_case, 'displacements.npy'), results.displacements)
+        self.__save(os.path.join(load_case, 'reactions.npy'), results.reactions)
+        self.__save(os.path.join(load_case, 'element_end_forces.npy'),
+                    np.concatenate(end_forces) if end_forces else np.zeros(0))
+
+        if load_case not in manifest['load_cases']:
+            manifest['load_cases'].append(load_case)
+        self.__write_manifest(manifest)
+
+    def displacements(self, load_case='default'):
+        return self.__load(os.path.join(load_case, 'displacements.npy'))
+
+    def reactions(self, load_case='default'):
+        return self.__load(os.path.join(load_case, 'reactions.npy'))
+
+    def element_end_forces(self, load_case='default', element_id=None):
+        forces = self.__load(os.path.join(load_case, 'element_end_forces.npy'))
+        if element_id is None:
+            return forces
+        if self.__element_rows is None:
+            self.__element_rows = {element: i for i, element in enumerate(self.element_ids.tolist())}
+        offsets = self.__load('element_offsets.npy')
+        row = self.__element_rows[element_id]
+        return forces[offsets[row]:offsets[row + 1]]
+
+    def node_row(self, node_id):
+        if self.__node_rows is None:
+            self.__node_rows = {node: i for i, node in enumerate(self.node_ids.tolist())}
+        return self.__node_rows[node_id]
+
+    def __load(self, name):
+        return np.load(os.path.join(self.path, name), mmap_mode='r')
+
+    def __save(self, name, array):
+        self.__replace(name, lambda file: np.save(file, np.ascontiguousarray(array)))
+
+    def __manifest(self):
+        try:
+            with open(os.path.join(self.path, 'manifest.json')) as file:
+                return json.load(file)
+        except FileNotFoundError:
+            return {'version': self.version, 'load_cases': []}
+
+    def __write_manifest(self, manifest):
+        self.__replace('manifest.json', lambda file: file.write(json.dumps(manifest).encode()))
+
+    def __replace(self, name, write):
+        target = os.path.join(self.path, name)
+        descriptor, temporary = tempfile.mkstemp(dir=os.path.dirname(target), suffix='.tmp')
+        try:
+            with os.fdopen(descriptor, 'wb') as file:
+                write(file)
+            os.replace(temporary, target)
+        except BaseException:
+            os.remove(temporary)
+            raise
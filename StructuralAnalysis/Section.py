@@ -11,16 +11,24 @@ Properties(abstract methods):
     inertia_z = second moment of area about the z-axis
     polar_inertia = polar moment of inertia about the x-axis (J)
     warping_rigidity = warping rigidity that applies to non-circular sections
+Properties:
+    plastic_modulus_y = plastic section modulus about the y-axis (None if unknown)
+    plastic_modulus_z = plastic section modulus about the z-axis (None if unknown)
 
 Derived classes:
     Circle
     Square
     ArbitrarySection: section with user-defined properties
+    FiberSection: section discretized into fibers (y, z, area), properties are integrated over the fibers.
+                  Fiber coordinates are measured from the longitudinal axis of the element. The fibers are points,
+                  so a single row of fibers across a dimension has no bending stiffness about the other axis (e.g.
+                  rectangle(b, d, n, 1) only suits 2D elements bending about z).
 """
 
 
 from math import pi
 from abc import ABC, abstractmethod
+import numpy as np
 
 
 class Section(ABC):
@@ -56,6 +64,14 @@ class Section(ABC):
     def warping_rigidity(self):
         return self.__warping_rigidity
 
+    @property
+    def plastic_modulus_y(self):
+        return None
+
+    @property
+    def plastic_modulus_z(self):
+        return None
+
 
 class Circle(Section):
     def __init__(self, radius):
@@ -82,6 +98,14 @@ class Circle(Section):
     def warping_rigidity(self):
         return None
 
+    @property
+    def plastic_modulus_y(self):
+        return 4*self.radius**3/3
+
+    @property
+    def plastic_modulus_z(self):
+        return 4*self.radius**3/3
+
 
 class Rectangle(Section):
     def __init__(self, breadth, depth):
@@ -109,16 +133,27 @@ class Rectangle(Section):
     def warping_rigidity(self):
         return None
 
+    @property
+    def plastic_modulus_y(self):
+        return self.depth * self.breadth**2 / 4
+
+    @property
+    def plastic_modulus_z(self):
+        return self.breadth * self.depth**2 / 4
+
 
 class ArbitrarySection(Section):
 
-    def __init__(self, area, inertia_y, inertia_z, polar_inertia, warping_rigidity):
+    def __init__(self, area, inertia_y, inertia_z, polar_inertia, warping_rigidity,
+                 plastic_modulus_y=None, plastic_modulus_z=None):
         super().__init__()
         self.__area = area
         self.__inertia_y = inertia_y
         self.__inertia_z = inertia_z
         self.__polar_inertia = polar_inertia
         self.__warping_rigidity = warping_rigidity
+        self.__plastic_modulus_y = plastic_modulus_y
+        self.__plastic_modulus_z = plastic_modulus_z
 
     @property
     def area(self):
@@ -139,3 +174,79 @@ class ArbitrarySection(Section):
     @property
     def warping_rigidity(self):
         return self.__warping_rigidity
+
+    @property
+    def plastic_modulus_y(self):
+        return self.__plastic_modulus_y
+
+    @property
+    def plastic_modulus_z(self):
+        return self.__plastic_modulus_z
+
+
+class FiberSection(Section):
+
+    def __init__(self, y, z, areas):
+        super().__init__()
+        self.y = np.asarray(y, dtype=float)
+        self.z = np.asarray(z, dtype=float)
+        self.areas = np.asarray(areas, dtype=float)
+
+    @classmethod
+    def rectangle(cls, breadth, depth, number_of_fibers_y, number_of_fibers_z):
+        dy = depth / number_of_fibers_y
+        dz = breadth / number_of_fibers_z
+        y = -depth / 2 + dy * (np.arange(number_of_fibers_y) + 0.5)
+        z = -breadth / 2 + dz * (np.arange(number_of_fibers_z) + 0.5)
+        y, z = np.meshgrid(y, z, indexing='ij')
+        return cls(y.ravel(), z.ravel(), np.full(y.size, dy * dz))
+
+    @classmethod
+    def i_shape(cls, depth, flange_width, flange_thickness, web_thickness,
+                number_of_fibers_flange=10, number_of_fibers_web=20):
+        web_depth = depth - 2 * flange_thickness
+        # the thin web and flanges have one fiber across their thickness
+        web = cls.rectangle(web_thickness, web_depth, number_of_fibers_web, 1)
+        flange = cls.rectangle(flange_width, flange_thickness, 1, number_of_fibers_flange)
+        offset = (depth - flange_thickness) / 2
+        return cls(np.concatenate([web.y, flange.y + offset, flange.y - offset]),
+                   np.concatenate([web.z, flange.z, flange.z]),
+                   np.concatenate([web.areas, flange.areas, flange.areas]))
+
+    @property
+    def number_of_fibers(self):
+        return len(self.areas)
+
+    @property
+    def area(self):
+        return np.sum(self.areas)
+
+    @property
+    def inertia_y(self):
+        return np.sum(self.areas * self.z ** 2)
+
+    @property
+    def inertia_z(self):
+        return np.sum(self.areas * self.y ** 2)
+
+    @property
+    def polar_inertia(self):
+        return self.inertia_y + self.inertia_z
+
+    @property
+    def warping_rigidity(self):
+        return None
+
+    @property
+    def plastic_modulus_y(self):
+        return self.__plastic_modulus(self.z)
+
+    @property
+    def plastic_modulus_z(self):
+        return self.__plastic_modulus(self.y)
+
+    def __plastic_modulus(self, coordinates):
+        order = np.argsort(coordinates)
+        cumulative_area = np.cumsum(self.areas[order])
+        neutral_axis = coordinates[order][np.searchsorted(cumulative_area, cumulative_area[-1] / 2)]
+        return np.sum(self.areas * np.abs(coordinates - neutral_axis))
@@ -0,0 +1,158 @@
+"""
+This class computes the derivatives of responses of a first-order elastic analysis with respect to the section and
+material properties of every line element (see MemberForces), by the adjoint method: dJ/dp = a^T (dK/dp) u, where u
+solves the load case and a is the adjoint solution of the response J. Every response costs one solve with the
+factorization of the ElasticSystem. Loads are taken as independent of the design variables, and the derivatives are
+those of one element, as if every element had its own section and material. Structures with constraints are not
+supported.
+Attributes:
+    self.structure: the analyzed structure
+    self.system: ElasticSystem of the structure (may be given to share its factorization)
+    self.results: Results of the load case
+    self.elements: list of the line elements, ordered as the rows of the returned arrays
+    self.element_ids: array (elements,) of the element ids
+Methods:
+    self.displacement(node, number): array (elements, 5) of the derivatives of the displacement of dof_<number>
+    self.reaction(node, number): array (elements, 5) of the derivatives of the reaction of a restrained dof_<number>
+    self.compliance(): array (elements, 5) of the derivatives of the compliance (work of the free forces, f^T u)
+
+Constants:
+    DESIGN_VARIABLES: names of the design variables, ordered as the columns of the derivatives (the shear modulus is
+                      taken as proportional to elasticity_modulus)
+    STIFFNESS_PATTERNS: list of four dicts {power of the length: (12, 12) pattern}, one per design variable in the
+                        order of DESIGN_VARIABLES (area, inertia_y, inertia_z, polar_inertia); the derivative of the
+                        local stiffness matrix is the sum of pattern * modulus (E or G) / length ** power
+"""
+
+
+import numpy as np
+from StructuralAnalysis.Structure import Structure
+from StructuralAnalysis.ElasticSystem import ElasticSystem
+from StructuralAnalysis.MemberForces import MemberForces, ELEMENT_ACTIONS
+from StructuralAnalysis.Results import dof_positions
+from StructuralAnalysis import Instrumentation
+
+DESIGN_VARIABLES = ('area', 'inertia_y', 'inertia_z', 'polar_inertia', 'elasticity_modulus')
+# (row, column, coefficient, power of the length) of the upper triangle of the local stiffness matrix, divided by
+# the section property and the modulus of every design variable
+__AREA_TERMS = [(0, 0, 1, 1), (0, 6, -1, 1), (6, 6, 1, 1)]
+__INERTIA_Z_TERMS = [(1, 1, 12, 3), (1, 5, 6, 2), (1, 7, -12, 3), (1, 11, 6, 2), (5, 5, 4, 1), (5, 7, -6, 2),
+                     (5, 11, 2, 1), (7, 7, 12, 3), (7, 11, -6, 2), (11, 11, 4, 1)]
+__INERTIA_Y_TERMS = [(2, 2, 12, 3), (2, 4, -6, 2), (2, 8, -12, 3), (2, 10, -6, 2), (4, 4, 4, 1), (4, 8, 6, 2),
+                     (4, 10, 2, 1), (8, 8, 12, 3), (8, 10, 6, 2), (10, 10, 4, 1)]
+__POLAR_INERTIA_TERMS = [(3, 3, 1, 1), (3, 9, -1, 1), (9, 9, 1, 1)]
+
+
+def __patterns(terms):
+    """{power of the length: symmetric (12, 12) pattern} of the terms"""
+    patterns = {}
+    for i, j, coefficient, power in terms:
+        pattern = patterns.setdefault(power, np.zeros((12, 12)))
+        pattern[i, j] = coefficient
+        pattern[j, i] = coefficient
+    return patterns
+
+
+# the patterns of area, inertia_y, inertia_z and polar_inertia, in the order of DESIGN_VARIABLES
+STIFFNESS_PATTERNS = [__patterns(__AREA_TERMS), __patterns(__INERTIA_Y_TERMS), __patterns(__INERTIA_Z_TERMS),
+                      __patterns(__POLAR_INERTIA_TERMS)]
+
+
+class Sensitivity:
+
+    def __init__(self, structure: Structure, system: ElasticSystem = None, forces=None, settlements=None):
+        """
+        forces and settlements: (nodes, 6) arrays of the load case, as ElasticSystem.solve; without forces the loads
+        of the model are analyzed
+        """
+        self.structure = structure
+        self.system = system if system is not None else ElasticSystem(structure)
+        if self.system.singular:
+            raise ValueError("Matrix is singular or ill-conditioned! Check for stability.")
+        self.results = self.system.solve(forces, settlements)
+        self.__member_forces = MemberForces(structure, self.results)
+        self.elements = self.__member_forces.elements
+        self.element_ids = self.__member_forces.element_ids
+
+        positions = dof_positions(structure)
+        self.__free = {dof: i for i, dof in enumerate(structure.free_degrees_of_freedom)}
+        self.__restrained = {dof: i for i, dof in enumerate(structure.restrained_degrees_of_freedom)}
+        self.__free_positions = positions(structure.free_degrees_of_freedom)
+        self.__restrained_positions = positions(structure.restrained_degrees_of_freedom)
+        self.__node_rows = {node: i for i, node in enumerate(structure.nodes)}
+        self.__moduli = self.__element_moduli()
+
+    def displacement(self, node, number):
+        dof = getattr(node, 'dof_%d' % number)
+        if dof not in self.__free:
+            # a restrained displacement is prescribed
+            return np.zeros((len(self.elements), len(DESIGN_VARIABLES)))
+        unit = np.zeros(len(self.__free))
+        unit[self.__free[dof]] = 1
+        return self.__sensitivities(-self.__adjoint_solve(unit))
+
+    def reaction(self, node, number):
+        dof = getattr(node, 'dof_%d' % number)
+        if dof not in self.__restrained:
+            raise ValueError("dof_%d of node %d is not restrained." % (number, node.id))
+        adjoint = -self.__adjoint_solve(self.system.sf[self.__restrained[dof]])
+        adjoint[self.__node_rows[node], number - 1] = 1
+        return self.__sensitivities(adjoint)
+
+    def compliance(self):
+        # the adjoint load is the free force vector Kff uf + Kfs us, so the adjoint displacements are the free
+        # displacements plus Kff^-1 Kfs us, which only needs a solve if a support is displaced
+        adjoint = np.zeros((len(self.structure.nodes), 6))
+        indices, rows, columns = self.__free_positions
+        adjoint[rows, columns] = self.results.displacements[rows, columns]
+        indices, rows, columns = self.__restrained_positions
+        restrained_displacements = np.zeros(len(self.__restrained))
+        restrained_displacements[indices] = self.results.displacements[rows, columns]
+        if np.any(restrained_displacements):
+            adjoint += self.__adjoint_solve(np.dot(self.system.fs, restrained_displacements))
+        return self.__sensitivities(-adjoint)
+
+    def __adjoint_solve(self, free_vector):
+        """(nodes, 6) array of the solution of the free-free system for free_vector, zero at restrained dofs"""
+        solution = self.system.factorization.solve(free_vector)
+        Instrumentation.count('adjoint_solves')
+        adjoint = np.zeros((len(self.structure.nodes), 6))
+        indices, rows, columns = self.__free_positions
+        adjoint[rows, columns] = solution[indices]
+        return adjoint
+
+    @Instrumentation.timed('adjoint_sensitivity')
+    def __sensitivities(self, adjoint):
+        """(elements, 5) derivatives a^T dK/dp u for the (nodes, 6) adjoint displacements a"""
+        member_forces = self.__member_forces
+        start_rows = np.array([self.__node_rows[element.start_node] for element in self.elements], dtype=int)
+        end_rows = np.array([self.__node_rows[element.end_node] for element in self.elements], dtype=int)
+        local_adjoint = np.einsum('eij,ej->ei', member_forces.transformation_matrices,
+                                  np.hstack([adjoint[start_rows], adjoint[end_rows]]))
+        local_displacements = member_forces.local_displacements
+        lengths = member_forces.lengths
+        elasticity_moduli, shear_moduli = self.__moduli
+
+        derivatives = np.zeros((len(self.elements), len(DESIGN_VARIABLES)))
+        for column, patterns in enumerate(STIFFNESS_PATTERNS):
+            for power, pattern in patterns.items():
+                derivatives[:, column] += np.einsum('ei,ij,ej->e', local_adjoint, pattern, local_displacements) / \
+                    lengths ** power
+        derivatives[:, :3] *= elasticity_moduli[:, np.newaxis]
+        derivatives[:, 3] *= shear_moduli
+        # the actions an element type does not have are not part of its stiffness
+        actions = np.array([ELEMENT_ACTIONS[type(element)] for element in self.elements], dtype=float).reshape(-1, 3)
+        derivatives[:, 1] *= actions[:, 1]
+        derivatives[:, 2] *= actions[:, 0]
+        derivatives[:, 3] *= actions[:, 2]
+        # the local stiffness matrix is proportional to the modulus
+        derivatives[:, 4] = np.einsum('ei,eij,ej->e', local_adjoint, member_forces.local_matrices,
+                                      local_displacements) / elasticity_moduli
+        return derivatives
+
+    def __element_moduli(self):
+        elasticity_moduli = np.array([element.material.elasticity_modulus for element in self.elements], dtype=float)
+        # elements without torsion may have a material without a shear modulus
+        shear_moduli = np.array([(element.material.shear_modulus or 0) if ELEMENT_ACTIONS[type(element)][2] else 0
+                                 for element in self.elements], dtype=float)
+        return elasticity_moduli, shear_moduli
@@ -1,109 +1,266 @@
 from StructuralAnalysis.__SolverHelper import *
 from StructuralAnalysis import Structure
+from StructuralAnalysis import DomainDecomposition
+from StructuralAnalysis import Instrumentation
+from StructuralAnalysis.Factorization import Factorization
+from StructuralAnalysis.ElasticSystem import ElasticSystem
+from StructuralAnalysis.PlasticHinge import PlasticHinge, PushoverResult
+from StructuralAnalysis.Results import Results, node_forces
 import warnings
 import sys
 
 
-def analyze_first_order_elastic(structure: Structure):
-    global_matrix = global_elastic_matrix(structure)
-    ff, fs, sf, ss = partition_global_matrix(structure, global_matrix)
+@Instrumentation.timed('first_order_elastic')
+def analyze_first_order_elastic(structure: Structure, report_path=None, background_report=False, cache=None,
+                                bypass_cache=False, global_matrix=None):
+    """
+    Solves for the displacements and the reactions and stores them in the degrees of freedom.
+    Returns a Results object (None if the structure is unstable). A text report is written to report_path only if
+    it is given, on a separate thread if background_report is True (see Results.write_report).
+    If a ResultCache is given, the results of an unchanged model are taken from it without solving, and new results
+    are added to it. With bypass_cache=True the model is always solved and its cache entry is replaced.
+    If a GlobalMatrix of the structure is given, only the elements changed since its last update are assembled again
+    (the number is global_matrix.recomputed and the elements_assembled counter of Instrumentation).
+    """
+    applied_forces = node_forces(structure)
+    cached = __cached_results(structure, 'first_order_elastic', applied_forces, cache, bypass_cache,
+                              report_path, background_report)
+    if cached is not None:
+        return cached
+
+    if global_matrix is not None:
+        global_matrix.update()
+        ff, fs, sf, ss = global_matrix.partition()
+    else:
+        ff, fs, sf, ss = partition_global_matrix(structure, global_elastic_matrix(structure))
     support_settlements = restrained_displacement_vector(structure)
     external_force_vector = force_vector(structure)
 
-    if np.linalg.cond(ff) >= 1 / sys.float_info.epsilon:
+    if structure.constraints:
+        transformation, retained_dofs, offset = constraint_transformation(structure)
+        reduced_ff, reduced_forces = reduce_constrained_system(transformation, offset, ff, fs,
+                                                               support_settlements, external_force_vector)
+    else:
+        reduced_ff = ff
+
+    with Instrumentation.phase('condition_check'):
+        ill_conditioned = np.linalg.cond(reduced_ff) >= 1 / sys.float_info.epsilon
+    if ill_conditioned:
         warnings.warn("Matrix is singular or ill-conditioned! Check for stability.")
+        return None
+
+    if structure.constraints:
+        displacements = solve_for_constrained_displacements(structure, transformation, offset,
+                                                            reduced_ff, reduced_forces)
     else:
-        __print_input_to_txt(structure)
         displacements = solve_for_displacements(structure, ff, fs, support_settlements, external_force_vector)
-        reactions = solve_for_reactions(structure, displacements, support_settlements, sf, ss)
-        __print_results_to_txt(structure)
-        print("*********DISPLACEMENTS***********")
-        print(displacements)
-        print("***********REACTIONS*************")
-        print(reactions)
+    reactions = solve_for_reactions(structure, displacements, support_settlements, sf, ss)
+    return __results(structure, displacements, reactions, applied_forces, report_path, background_report,
+                     cache, 'first_order_elastic')
 
 
+@Instrumentation.timed('first_order_elastic_pure')
+def solve_first_order_elastic(structure: Structure, forces=None, settlements=None, system=None):
+    """
+    First-order elastic analysis without side effects: the degrees of freedom are only read, the results are
+    returned as a Results object (None if the structure is unstable). forces and settlements are (nodes, 6) arrays
+    ordered as structure.nodes replacing the forces and settlements assigned to the degrees of freedom. Passing the
+    ElasticSystem of the structure as system reuses its factorization, so concurrent load cases of one structure
+    (e.g. from a thread pool) are solved without assembling or copying the model again.
+    """
+    if system is None:
+        system = ElasticSystem(structure)
+    if system.singular:
+        warnings.warn("Matrix is singular or ill-conditioned! Check for stability.")
+        return None
+    return system.solve(forces, settlements)
 
-def analyze_second_order_elastic(structure: Structure):
-    pass
 
+@Instrumentation.timed('first_order_elastic_in_parallel')
+def analyze_first_order_elastic_in_parallel(structure: Structure, number_of_subdomains=None, report_path=None,
+                                            background_report=False, cache=None, bypass_cache=False):
+    """
+    First-order elastic analysis by domain decomposition: the elements are split into number_of_subdomains
+    subdomains (default: one per core) whose interiors are factorized in separate processes, and only the interface
+    Schur complement is solved in this process (see DomainDecomposition).
+    Returns a Results object (None if the structure is unstable) and stores the results in the degrees of freedom
+    like analyze_first_order_elastic, and shares its cache entries. Structures with constraints are not supported.
+    """
+    applied_forces = node_forces(structure)
+    cached = __cached_results(structure, 'first_order_elastic', applied_forces, cache, bypass_cache,
+                              report_path, background_report)
+    if cached is not None:
+        return cached
 
-def analyze_first_order_inelastic(structure: Structure):
-    pass
+    with Instrumentation.phase('domain_decomposition'):
+        solution = DomainDecomposition.solve(structure, number_of_subdomains)
+    if solution is None:
+        warnings.warn("Matrix is singular or ill-conditioned! Check for stability.")
+        return None
+    displacements, reactions = solution
+    __store_in_degrees_of_freedom(structure, displacements, reactions)
+    return __results(structure, displacements, reactions, applied_forces, report_path, background_report,
+                     cache, 'first_order_elastic')
 
 
-def analyze_second_order_inelastic(structure: Structure):
+def analyze_second_order_elastic(structure: Structure):
     pass
 
 
-def __print_input_to_txt(structure: Structure):
-    txt = open("Input.txt", "w+")
-    txt.truncate(0)
-    txt.writelines("########################### INPUT ###########################\n\n")
+@Instrumentation.timed('first_order_inelastic')
+def analyze_first_order_inelastic(structure: Structure, max_load_factor=np.inf, max_updates=50):
+    """
+    Event-to-event (pushover) analysis with plastic hinges lumped at the element ends.
+    The nodal forces assigned to the degrees of freedom are the reference load pattern and are scaled by a load
+    factor that increases monotonically from zero (support settlements are not considered). Between two events the
+    structure is linear; at every event the end force with the smallest load factor to reach its plastic capacity
+    (Element.plastic_capacities) is released. The release changes the stiffness matrix by a rank-one term, which is
+    applied to the existing factorization instead of reassembling and refactorizing the matrix. A full
+    refactorization is only made once max_updates low-rank terms are accumulated.
+    The analysis stops when a collapse mechanism forms or when max_load_factor is reached.
+    Returns a PushoverResult object and leaves the final displacements in the degrees of freedom.
+    Structures with constraints are not supported.
+    """
+    if structure.constraints:
+        raise ValueError("Structures with constraints are not supported by the inelastic analysis.")
+    global_matrix = global_elastic_matrix(structure)
+    ff, fs, sf, ss = partition_global_matrix(structure, global_matrix)
+    reference_forces = force_vector(structure)
+
+    factorization = Factorization(ff)
+    if factorization.singular:
+        warnings.warn("Matrix is singular or ill-conditioned! Check for stability.")
+        return None
 
-    txt.writelines("******* NODES *******\n")
-    txt.writelines("Node ID\t\t\tX\t\t\t\t\t\tY\t\t\t\t\t\tZ\n")
-    for node in structure.nodes:
-        txt.writelines("%d\t\t\t%.2e\t\t\t\t\t\t%.2e\t\t\t\t\t\t%.2e\n" % (node.id, node.x, node.y, node.z))
+    no_free = len(structure.free_degrees_of_freedom)
+    free_index = {dof: i for i, dof in enumerate(structure.free_degrees_of_freedom)}
 
-    txt.writelines("\n")
-    txt.writelines("******* ELEMENTS *******\n")
-    txt.writelines("Element ID\t\t\tStart Node\t\t\tEnd Node\n")
+    local_matrices = {}
+    transformation_matrices = {}
+    dof_indices = {}
+    element_components = {}
+    components = []
     for element in structure.elements:
-        txt.writelines("%d\t\t\t\t%d\t\t\t\t%d\n" %(element.id, element.start_node.id, element.end_node.id))
-    txt.writelines("\n")
-    txt.writelines("******* BOUNDARY CONDITIONS *******\n")
-    txt.writelines("True: Restrained, False: Free\n")
-    txt.writelines("Node ID\t\tX-Disp.\t\tY-Disp.\t\tZ-Disp.\t\tX-Rot.\t\tY-Rot.\t\tZ-Rot.\n")
-    for node in structure.nodes:
-        txt.writelines("%d\t\t%.2e\t\t%.2e\t\t%.2e\t\t%.2e\t\t%.2e\t\t%.2e\n" %
-                       (node.id, node.dof_1.restrained, node.dof_2.restrained,
-                        node.dof_3.restrained, node.dof_4.restrained,
-                        node.dof_5.restrained, node.dof_6.restrained))
-    txt.writelines("\n")
-    txt.writelines("******* INITIAL SETTLEMENT *******\n")
-    txt.writelines("Node ID\t\tX-Disp.\t\tY-Disp.\t\tZ-Disp.\t\tX-Rot.\t\tY-Rot.\t\tZ-Rot.\n")
-    for node in structure.nodes:
-        txt.writelines("%d\t\t%.2e\t\t%.2e\t\t%.2e\t\t%.2e\t\t%.2e\t\t%.2e\n" %
-                       (node.id, node.dof_1.displaced, node.dof_2.displaced,
-                        node.dof_3.displaced, node.dof_4.displaced,
-                        node.dof_5.displaced, node.dof_6.displaced))
-    txt.writelines("\n")
-    txt.writelines("******* APPLIED FORCES *******\n")
-    txt.writelines("Node ID\t\tFX.\t\tFY.\t\tFZ.\t\tMX.\t\tMY.\t\tMZ.\n")
-    for node in structure.nodes:
-        txt.writelines("%d\t\t%.2e\t\t%.2e\t\t%.2e\t\t%.2e\t\t%.2e\t\t%.2e\n" %
-                       (node.id, node.dof_1.force, node.dof_2.force,
-                        node.dof_3.force, node.dof_4.force,
-                        node.dof_5.force, node.dof_6.force))
-    txt.close()
-
-
-def __print_results_to_txt(structure: Structure):
-    txt = open("Results.txt", "w+")
-    txt.truncate(0)
-    txt.writelines("########################### OUTPUT ###########################\n\n")
-
-    txt.writelines("\n")
-    txt.writelines("******* DISPLACEMENTS *******\n")
-    txt.writelines("Node ID\t\t\tX-Disp.\t\t\t\tY-Disp.\t\t\t\tZ-Disp.\t\t\t\tX-Rot.\t\t\t\tY-Rot.\t\t\t\tZ-Rot.\n")
-    for node in structure.nodes:
-        txt.writelines("%d\t\t\t  %.2e\t\t\t  %.2e\t\t\t  %.2e\t\t\t  %.2e\t\t\t  %.2e\t\t\t  %.2e\n" %
-                       (node.id, node.dof_1.displaced, node.dof_2.displaced,
-                        node.dof_3.displaced, node.dof_4.displaced,
-                        node.dof_5.displaced, node.dof_6.displaced))
-    txt.writelines("\n")
-    txt.writelines("******* REACTIONS *******\n")
-    txt.writelines("Node ID\t\t\tFX.\t\t\t\tFY.\t\t\t\tFZ.\t\t\t\tMX.\t\t\t\tMY.\t\t\t\tMZ.\n")
-    for node in structure.nodes:
-        txt.writelines("%d\t\t\t  %.2e\t\t\t  %.2e\t\t\t  %.2e\t\t\t  %.2e\t\t\t  %.2e\t\t\t  %.2e\n" %
-                       (node.id, node.dof_1.force, node.dof_2.force,
-                        node.dof_3.force, node.dof_4.force,
-                        node.dof_5.force, node.dof_6.force))
-    txt.close()
+        capacities = element.plastic_capacities()
+        if not capacities:
+            continue
+        local_matrices[element] = element._local_matrix().astype(float)
+        transformation_matrices[element] = element._transformation_matrix()
+        dof_indices[element] = np.array([free_index.get(dof, no_free) for dof in element.degrees_of_freedom])
+        element_components[element] = []
+        for local_index, capacity in capacities:
+            element_components[element].append(len(components))
+            components.append((element, local_index, capacity))
+
+    no_components = len(components)
+    max_dofs = max([len(indices) for indices in dof_indices.values()], default=0)
+    capacities = np.array([capacity for _, _, capacity in components], dtype=float)
+    rate_values = np.zeros((no_components, max_dofs))
+    rate_indices = np.full((no_components, max_dofs), no_free)
+
+    def update_rate_rows(element):
+        rows = np.dot(local_matrices[element], transformation_matrices[element])
+        for c in element_components[element]:
+            rate_values[c, :rows.shape[1]] = rows[components[c][1]]
+            rate_indices[c, :rows.shape[1]] = dof_indices[element]
+
+    for element in local_matrices:
+        update_rate_rows(element)
+
+    load_factor = 0
+    displacements = np.zeros(no_free)
+    forces = np.zeros(no_components)
+    yielded = np.zeros(no_components, dtype=bool)
+    load_factors = [load_factor]
+    history = [displacements.copy()]
+    hinges = []
+    mechanism = False
+    refactorizations_avoided = 0
+
+    while True:
+        rate = factorization.solve(reference_forces)
+        force_rates = np.sum(rate_values * np.append(rate, 0)[rate_indices], axis=1)
+        largest_rate = np.max(np.abs(force_rates), initial=0)
+        active = ~yielded & (np.abs(force_rates) > 1e-9 * largest_rate)
+
+        steps = np.full(no_components, np.inf)
+        steps[active] = (np.sign(force_rates[active]) * capacities[active] - forces[active]) / force_rates[active]
+        steps = np.maximum(steps, 0)
+        event = int(np.argmin(steps)) if no_components else None
+        step = min(steps[event] if no_components else np.inf, max_load_factor - load_factor)
+        if step == np.inf:
+            warnings.warn("No plastic hinge can form under the reference loads; set max_load_factor.")
+            break
+
+        Instrumentation.count('iterations')
+        load_factor += step
+        displacements += step * rate
+        forces += step * force_rates
+        load_factors.append(load_factor)
+        history.append(displacements.copy())
+        if load_factor >= max_load_factor:
+            break
+
+        element, local_index, capacity = components[event]
+        yielded[event] = True
+        forces[event] = np.sign(forces[event]) * capacity
+        hinges.append(PlasticHinge(element, local_index, capacity, load_factor, len(hinges) + 1))
+
+        local_matrix = local_matrices[element]
+        column = local_matrix[:, local_index].copy()
+        pivot = column[local_index]
+        local_matrices[element] = local_matrix - np.outer(column, column) / pivot
+        update_rate_rows(element)
+
+        element_vector = np.dot(transformation_matrices[element].T, column)
+        vector = np.zeros(no_free + 1)
+        np.add.at(vector, dof_indices[element], element_vector)
+        factorization.update(vector[:no_free], -1 / pivot)
+        if factorization.singular:
+            mechanism = True
+            break
+        if factorization.updates >= max_updates:
+            factorization.refactorize()
+        else:
+            refactorizations_avoided += 1
+
+    for i, dof in enumerate(structure.free_degrees_of_freedom):
+        dof.displacement = displacements[i]
+
+    return PushoverResult(structure, load_factors, history, hinges, mechanism,
+                          factorization.refactorizations, refactorizations_avoided)
+
+
+def analyze_second_order_inelastic(structure: Structure):
+    pass
 
 
+def __results(structure, displacements, reactions, applied_forces, report_path, background_report, cache=None,
+              analysis=None):
+    results = Results(structure, displacements, reactions, applied_forces)
+    if cache is not None:
+        with Instrumentation.phase('cache_store'):
+            cache.store(structure, analysis, results)
+    if report_path is not None:
+        with Instrumentation.phase('report'):
+            results.write_report(report_path, background_report)
+    return results
 
 
+def __cached_results(structure, analysis, applied_forces, cache, bypass_cache, report_path, background_report):
+    if cache is None or bypass_cache:
+        return None
+    with Instrumentation.phase('cache_lookup'):
+        cached = cache.load(structure, analysis)
+    if cached is None:
+        return None
+    displacements, reactions = cached
+    __store_in_degrees_of_freedom(structure, displacements, reactions)
+    return __results(structure, displacements, reactions, applied_forces, report_path, background_report)
 
 
+def __store_in_degrees_of_freedom(structure, displacements, reactions):
+    for i, dof in enumerate(structure.free_degrees_of_freedom):
+        dof.displacement = displacements[i]
+    for i, dof in enumerate(structure.restrained_degrees_of_freedom):
+        dof.force = reactions[i]
@@ -0,0 +1,192 @@
+"""
+Classes used by the staged construction analysis: the structure is built (and partly dismantled) in stages, and
+every stage solves only its increments on the structure existing at that stage, starting from the deformed state left
+by the previous stages. Activated elements are installed stress-free, deactivated elements and released degrees of
+freedom release their forces onto the remaining structure, and the restraints of the model are active from the first
+stage that activates one of the elements of the node. One Structure and one GlobalMatrix follow the stages, so every
+stage assembles only the elements it activates. Constraints are not supported.
+
+Stage: one construction stage.
+Attributes:
+    self.name
+    self.activate, self.deactivate: lists of the elements added to and removed from the structure
+    self.restrain, self.release: lists of the DegreeOfFreedom objects restrained and released
+    self.forces: dict {DegreeOfFreedom: force} of the forces applied in the stage
+    self.gravity: None or the (x, y, z) acceleration of the self-weight of the activated elements, applied as the
+                  mass matrix of every element times the acceleration (e.g. (0, -9.81, 0) in consistent units)
+
+StageResult: accumulated results at the end of a stage.
+Attributes:
+    self.stage: the Stage object
+    self.node_ids: array of the ids of the nodes of the structure of the stage
+    self.displacements: array (nodes, 6) of the accumulated displacements
+    self.increments: array (nodes, 6) of the displacements caused by the stage
+    self.reactions: array (nodes, 6) of the accumulated reactions (zero at free degrees of freedom)
+    self.element_end_forces: dict {element id: end forces (see Element.end_forces)} of the active elements
+    self.recomputed: number of element contributions assembled in the stage
+Methods:
+    self.node_displacements(node), self.node_reactions(node)
+
+StagedConstruction: the analysis.
+Attributes:
+    self.stages: list of the Stage objects
+    self.structure: Structure of the active elements of the last analyzed stage
+    self.global_matrix: GlobalMatrix of self.structure
+    self.results: list of the StageResult objects of the analyzed stages
+Methods:
+    self.analyze(): analyzes the stages that were not analyzed yet and returns self.results; stages may be appended
+                    to self.stages and analyzed later
+"""
+
+
+import numpy as np
+from StructuralAnalysis.Structure import Structure
+from StructuralAnalysis.GlobalMatrix import GlobalMatrix
+from StructuralAnalysis.Factorization import Factorization
+from StructuralAnalysis import Instrumentation
+
+
+class Stage:
+
+    def __init__(self, name, activate=(), deactivate=(), restrain=(), release=(), forces=None, gravity=None):
+        self.name = name
+        self.activate = list(activate)
+        self.deactivate = list(deactivate)
+        self.restrain = list(restrain)
+        self.release = list(release)
+        self.forces = dict(forces) if forces else {}
+        self.gravity = gravity
+
+
+class StageResult:
+
+    def __init__(self, stage, nodes, displacements, increments, reactions, element_end_forces, recomputed):
+        self.stage = stage
+        self.__node_index = {node: i for i, node in enumerate(nodes)}
+        self.node_ids = np.array([node.id for node in nodes])
+        self.displacements = displacements
+        self.increments = increments
+        self.reactions = reactions
+        self.element_end_forces = element_end_forces
+        self.recomputed = recomputed
+
+    def node_displacements(self, node):
+        return self.displacements[self.__node_index[node]]
+
+    def node_reactions(self, node):
+        return self.reactions[self.__node_index[node]]
+
+
+class StagedConstruction:
+
+    def __init__(self, stages):
+        self.stages = list(stages)
+        self.structure = None
+        self.global_matrix = None
+        self.results = []
+        self.__restrained = set()
+        self.__seen_nodes = set()
+        # accumulated values by degree of freedom, and the displacements of the active elements at their activation
+        self.__displacements = {}
+        self.__reactions = {}
+        self.__installed = {}
+
+    def analyze(self):
+        for stage in self.stages[len(self.results):]:
+            with Instrumentation.phase('construction_stage'):
+                self.results.append(self.__analyze_stage(stage))
+        return self.results
+
+    def __analyze_stage(self, stage):
+        loads = {}
+
+        def add_load(dof, value):
+            loads[dof] = loads.get(dof, 0) + value
+
+        for element in stage.deactivate:
+            if element not in self.__installed:
+                raise ValueError("Element %d is not active in stage %s." % (element.id, stage.name))
+            for dof, force in zip(element.degrees_of_freedom, self.__global_end_forces(element)):
+                add_load(dof, force)
+            del self.__installed[element]
+        if self.structure is None:
+            if not stage.activate:
+                raise ValueError("The first stage (%s) does not activate any element." % stage.name)
+            self.structure = Structure(stage.activate)
+            self.global_matrix = GlobalMatrix(self.structure)
+            recomputed = self.global_matrix.recomputed
+        else:
+            self.structure.remove_elements(stage.deactivate)
+            self.structure.add_elements(stage.activate)
+            recomputed = self.global_matrix.update()
+
+        for element in stage.activate:
+            self.__installed[element] = np.array([self.__displacements.get(dof, 0.0)
+                                                  for dof in element.degrees_of_freedom])
+            for node in element.nodes:
+                if node not in self.__seen_nodes:
+                    self.__seen_nodes.add(node)
+                    self.__restrained.update(getattr(node, 'dof_%d' % number) for number in range(1, 7)
+                                             if getattr(node, 'dof_%d' % number).restrained)
+            if stage.gravity is not None:
+                for dof, force in self.__self_weight(element, stage.gravity):
+                    add_load(dof, force)
+        self.__restrained.update(stage.restrain)
+        for dof in stage.release:
+            if dof in self.__restrained:
+                self.__restrained.discard(dof)
+                add_load(dof, -self.__reactions.pop(dof, 0.0))
+        for dof, force in stage.forces.items():
+            add_load(dof, force)
+
+        dofs = self.structure.degrees_of_freedom
+        free = [dof for dof in dofs if dof not in self.__restrained]
+        restrained = [dof for dof in dofs if dof in self.__restrained]
+        ff, fs, sf, ss = self.global_matrix.partition(free, restrained)
+        factorization = Factorization(ff)
+        if factorization.singular:
+            raise ValueError("The structure of stage %s is unstable." % stage.name)
+        free_forces = np.array([loads.get(dof, 0.0) for dof in free])
+        restrained_forces = np.array([loads.get(dof, 0.0) for dof in restrained])
+        free_increments = factorization.solve(free_forces) if free else np.zeros(0)
+        # forces applied at restrained degrees of freedom go straight into the supports
+        reaction_increments = np.dot(sf, free_increments) - restrained_forces
+
+        increments = dict(zip(free, free_increments))
+        for dof, increment in increments.items():
+            self.__displacements[dof] = self.__displacements.get(dof, 0.0) + increment
+        for dof, increment in zip(restrained, reaction_increments):
+            self.__reactions[dof] = self.__reactions.get(dof, 0.0) + increment
+        return self.__result(stage, increments, recomputed)
+
+    def __element_displacements(self, element):
+        """displacements of the degrees of freedom of an active element since its activation"""
+        displacements = np.array([self.__displacements.get(dof, 0.0) for dof in element.degrees_of_freedom])
+        return displacements - self.__installed[element]
+
+    def __global_end_forces(self, element):
+        return np.dot(self.global_matrix.element_matrix(element), self.__element_displacements(element))
+
+    @staticmethod
+    def __self_weight(element, gravity):
+        """(degree of freedom, force) pairs of the weight of an element, its mass matrix times the acceleration"""
+        mass = element.mass_matrix
+        if mass is None:
+            return []
+        acceleration = {getattr(node, 'dof_%d' % (number + 1)): gravity[number]
+                        for node in element.nodes for number in range(3)}
+        dofs = element.degrees_of_freedom
+        return zip(dofs, np.dot(mass, [acceleration.get(dof, 0.0) for dof in dofs]))
+
+    def __result(self, stage, increments, recomputed):
+        nodes = self.structure.nodes
+        numbers = range(1, 7)
+        displacements = np.array([[self.__displacements.get(getattr(node, 'dof_%d' % number), 0.0)
+                                   for number in numbers] for node in nodes]).reshape(-1, 6)
+        stage_increments = np.array([[increments.get(getattr(node, 'dof_%d' % number), 0.0)
+                                      for number in numbers] for node in nodes]).reshape(-1, 6)
+        reactions = np.array([[self.__reactions.get(getattr(node, 'dof_%d' % number), 0.0)
+                               for number in numbers] for node in nodes]).reshape(-1, 6)
+        end_forces = {element.id: element.end_forces(self.__element_displacements(element))
+                      for element in self.structure.elements}
+        return StageResult(stage, nodes, displacements, stage_increments, reactions, end_forces, recomputed)
@@ -0,0 +1,172 @@
+"""
+This class checks steel line elements (see MemberForces) for every load combination at once. The end forces of the
+load cases are combined by a (combinations, load cases) matrix of load factors, every check is evaluated as array
+operations over (combinations, members) in chunks of chunk_size members, and only the governing ratio of every member
+and check is kept. The checks follow AISC 360, every nominal strength times the resistance factor of its check
+(tension_factor, compression_factor, flexure_factor, shear_factor, 1.0 by default for the nominal strengths):
+    interaction: Pr/Pc + 8/9 (Mry/Mcy + Mrz/Mcz) if Pr/Pc >= 0.2, otherwise Pr/(2 Pc) + (Mry/Mcy + Mrz/Mcz), with
+                 Pc = fy A in tension and Fcr A (flexural buckling, K L / r) in compression, Mc = fy Z
+    shear: the larger of Vy and Vz over 0.6 fy Av, Av = shear_area_factor * A
+    slenderness: K L / r over slenderness_limits[0] for members compressed in any combination, reported for their
+                 most compressed combination, over slenderness_limits[1] otherwise, reported for their most tensioned
+                 combination
+r is the smaller radius of gyration of the section; torsion is not checked. The materials must have a yield_strength
+(Steel) and the sections of elements that bend must have plastic moduli.
+Attributes:
+    self.elements: list of the checked elements, ordered as the rows of the arrays
+    self.element_ids: array (elements,) of the element ids
+    self.combinations: array (combinations, load cases) of the load factors
+    self.ratios: array (elements, 3) of the governing ratio of every check, ordered as CHECKS
+    self.governing_combinations: array (elements, 3) of the combination that governs every check
+    self.governing_ratio: array (elements,) of the largest ratio of every element
+    self.governing_combination: array (elements,) of the combination of governing_ratio
+    self.governing_check: array (elements,) of the index in CHECKS of the check of governing_ratio
+Methods:
+    self.failing(limit=1.0): ids of the elements whose governing ratio exceeds limit
+    SteelDesign.from_results(results, combinations=None, ...): checks the line elements of a list of Results objects
+                                                               (one per load case) of the same structure
+
+Constants:
+    CHECKS: names of the checks, ordered as the columns of the ratios
+"""
+
+
+import numpy as np
+from StructuralAnalysis.MemberForces import ELEMENT_ACTIONS
+from StructuralAnalysis import Instrumentation
+
+CHECKS = ('interaction', 'shear', 'slenderness')
+
+
+class SteelDesign:
+    chunk_size = 4096
+
+    def __init__(self, elements, end_forces, combinations=None, effective_length_factors=1.0, tension_factor=1.0,
+                 compression_factor=1.0, flexure_factor=1.0, shear_factor=1.0, shear_area_factor=1.0,
+                 slenderness_limits=(200, 300)):
+        """
+        end_forces: array (load cases, elements, 12) of the local end forces, ordered as elements
+        combinations: array (combinations, load cases) of load factors, every load case on its own by default
+        effective_length_factors: K of every element (a number or an array (elements,))
+        tension_factor, compression_factor, flexure_factor, shear_factor: resistance factors of the checks (e.g. 0.9,
+                                                                          0.9, 0.9 and 1.0 for AISC 360 LRFD)
+        """
+        self.elements = list(elements)
+        self.element_ids = np.array([element.id for element in self.elements], dtype=int)
+        end_forces = end_forces if isinstance(end_forces, np.ndarray) else np.asarray(end_forces, dtype=float)
+        if end_forces.shape[1:] != (len(self.elements), 12):
+            raise ValueError("end_forces must be an array (load cases, %d, 12)." % len(self.elements))
+        if combinations is None:
+            combinations = np.eye(len(end_forces))
+        self.combinations = np.atleast_2d(np.asarray(combinations, dtype=float))
+        if self.combinations.shape[1] != len(end_forces):
+            raise ValueError("combinations must have one load factor per load case (%d)." % len(end_forces))
+        self.tension_factor = tension_factor
+        self.compression_factor = compression_factor
+        self.flexure_factor = flexure_factor
+        self.shear_factor = shear_factor
+        self.shear_area_factor = shear_area_factor
+        self.slenderness_limits = slenderness_limits
+        self.__properties = self.__member_properties(np.broadcast_to(np.asarray(effective_length_factors,
+                                                                                dtype=float), len(self.elements)))
+        self.ratios, self.governing_combinations = self.__check(end_forces)
+        self.governing_check = np.argmax(self.ratios, axis=1)
+        rows = np.arange(len(self.elements))
+        self.governing_ratio = self.ratios[rows, self.governing_check]
+        self.governing_combination = self.governing_combinations[rows, self.governing_check]
+
+    @classmethod
+    def from_results(cls, results, combinations=None, **options):
+        member_forces = [result.member_forces for result in results]
+        return cls(member_forces[0].elements, np.stack([forces.end_forces for forces in member_forces]),
+                   combinations, **options)
+
+    def failing(self, limit=1.0):
+        return self.element_ids[self.governing_ratio > limit]
+
+    @Instrumentation.timed('steel_design_checks')
+    def __check(self, end_forces):
+        ratios = np.zeros((len(self.elements), len(CHECKS)))
+        governing = np.zeros((len(self.elements), len(CHECKS)), dtype=int)
+        for start in range(0, len(self.elements), self.chunk_size):
+            stop = min(start + self.chunk_size, len(self.elements))
+            # (combinations, members, 12) end forces of the chunk
+            forces = np.tensordot(self.combinations, np.asarray(end_forces[:, start:stop], dtype=float), axes=(1, 0))
+            properties = {name: values[start:stop] for name, values in self.__properties.items()}
+            for column, values in enumerate(self.__chunk_ratios(forces, properties)):
+                governing[start:stop, column] = np.argmax(values, axis=0)
+                ratios[start:stop, column] = np.take_along_axis(values, governing[np.newaxis, start:stop, column],
+                                                                axis=0)[0]
+            ratios[start:stop, 2], governing[start:stop, 2] = self.__slenderness_ratios(forces[:, :, 6],
+                                                                                       properties['slenderness'])
+        Instrumentation.count('design_checks', len(self.elements) * len(self.combinations))
+        return ratios, governing
+
+    @staticmethod
+    def __chunk_ratios(forces, properties):
+        """(combinations, members) arrays of the interaction and shear ratios"""
+        # tension is positive, the axial force is constant along the element
+        axial = forces[:, :, 6]
+        shear = np.abs(forces[:, :, [1, 2, 7, 8]]).max(axis=2)
+        moment_y = np.maximum(np.abs(forces[:, :, 4]), np.abs(forces[:, :, 10]))
+        moment_z = np.maximum(np.abs(forces[:, :, 5]), np.abs(forces[:, :, 11]))
+
+        axial_capacity = np.where(axial >= 0, properties['tension_capacity'], properties['compression_capacity'])
+        axial_ratio = np.abs(axial) / axial_capacity
+        bending_ratio = moment_y * properties['inverse_moment_capacity_y'] + \
+            moment_z * properties['inverse_moment_capacity_z']
+        interaction = np.where(axial_ratio >= 0.2, axial_ratio + 8 / 9 * bending_ratio,
+                               axial_ratio / 2 + bending_ratio)
+        shear_ratio = shear * properties['inverse_shear_capacity']
+        return interaction, shear_ratio
+
+    def __slenderness_ratios(self, axial, slenderness):
+        """(members,) arrays of the slenderness ratios and of the combination they are reported for"""
+        compressed = (axial < 0).any(axis=0)
+        limits = np.where(compressed, self.slenderness_limits[0], self.slenderness_limits[1])
+        # the most compressed combination, or the most tensioned one of a member that is never compressed
+        combinations = np.where(compressed, np.argmin(axial, axis=0), np.argmax(axial, axis=0))
+        return slenderness / limits, combinations
+
+    def __member_properties(self, effective_length_factors):
+        """arrays (elements,) of the capacities and slenderness, each section and material is evaluated once"""
+        sections = {}
+        materials = {}
+        values = np.zeros((len(self.elements), 8))
+        for i, element in enumerate(self.elements):
+            bending_z, bending_y, _ = ELEMENT_ACTIONS[type(element)]
+            section = element.section
+            material = element.material
+            if section not in sections:
+                sections[section] = (section.area, min(section.inertia_y, section.inertia_z),
+                                     section.plastic_modulus_y, section.plastic_modulus_z)
+            if material not in materials:
+                yield_strength = getattr(material, 'yield_strength', None)
+                if yield_strength is None:
+                    raise ValueError("The material of element %d has no yield strength." % element.id)
+                materials[material] = (yield_strength, material.elasticity_modulus)
+            area, inertia, plastic_modulus_y, plastic_modulus_z = sections[section]
+            if (bending_y and plastic_modulus_y is None) or (bending_z and plastic_modulus_z is None):
+                raise ValueError("The section of element %d has no plastic modulus." % element.id)
+            yield_strength, elasticity_modulus = materials[material]
+            values[i] = [area, inertia, plastic_modulus_y if bending_y else 0, plastic_modulus_z if bending_z else 0,
+                         yield_strength, elasticity_modulus, element.length, effective_length_factors[i]]
+        area, inertia, plastic_modulus_y, plastic_modulus_z, yield_strength, elasticity_modulus, length, factor = \
+            values.T
+
+        slenderness = factor * length / np.sqrt(inertia / area)
+        elastic_buckling_stress = np.pi ** 2 * elasticity_modulus / slenderness ** 2
+        ratio = yield_strength / elastic_buckling_stress
+        critical_stress = np.where(ratio <= 2.25, 0.658 ** ratio * yield_strength, 0.877 * elastic_buckling_stress)
+        flexure_strength = self.flexure_factor * yield_strength
+        shear_strength = 0.6 * self.shear_factor * yield_strength
+        with np.errstate(divide='ignore'):
+            # no bending about an axis: the moment about it is always zero and does not count
+            inverse_moment_capacity_y = np.where(plastic_modulus_y > 0, 1 / (flexure_strength * plastic_modulus_y), 0)
+            inverse_moment_capacity_z = np.where(plastic_modulus_z > 0, 1 / (flexure_strength * plastic_modulus_z), 0)
+        return {'tension_capacity': self.tension_factor * yield_strength * area,
+                'compression_capacity': self.compression_factor * critical_stress * area,
+                'inverse_moment_capacity_y': inverse_moment_capacity_y,
+                'inverse_moment_capacity_z': inverse_moment_capacity_z,
+                'inverse_shear_capacity': 1 / (shear_strength * self.shear_area_factor * area),
+                'slenderness': slenderness}
@@ -2,18 +2,27 @@
 This class assembles element objects and creates the structure.
 Attributes:
     self.elements: list of Element objects that is initialized by user
+    self.constraints: list of Constraint objects (rigid diaphragms, rigid links, ...) that is initialized by user
     self.nodes: list of Node objects associated with elements sorted by the nodes ids
     self.degrees_of_freedom: list of DegreeOfFreedom objects associated with self.nodes sorted by the objects id
     self.free_degrees_of_freedom: list of the DegreeOfFreedom objects extracted from self.degrees_of_freedom
                                   that have their restrained property set to False. (sorted by id)
     self.restrained_degrees_of_freedom: list of the DegreeOfFreedom objects extracted from self.degrees_of_freedom
                                   that have their restrained property set to True. (sorted by id)
-    self.no_of_degrees_of_freedom: the greatest dof.id number
+    self.no_of_degrees_of_freedom: the number of degrees of freedom of the structure
+    self.dof_indices: dict {DegreeOfFreedom: index}, the position of every degree of freedom in
+                      self.degrees_of_freedom, which numbers the rows and columns of the global matrices
 
 Properties:
-    self.global_matrix: assembles the global stiffness matrix where columns and rows are indexed by the sorted
-                        self.degrees_of_freedom (id - 1)
+    self.dirty_elements: elements added, moved (a node coordinate changed) or given another section or material
+                         since the last call of self.clear_changes (all the elements before the first call)
+    self.removed_elements: elements removed since the last call of self.clear_changes
+    self.global_matrix: assembles the global stiffness matrix where columns and rows are indexed by
+                        self.dof_indices
 Methods:
+    self.add_elements(elements), self.remove_elements(elements): change the elements of the structure and update its
+                                                                 nodes and degrees of freedom
+    self.clear_changes(): marks the current state of the elements as assembled (see GlobalMatrix)
     self.__nodes: returns a tuple of two lists that are sorted by id(nodes, degrees_of_freedom) to
                   set self.nodes, self.degrees_of_freedom = self.__nodes()
     self.__free_and_restrained_dofs: returns a tuple of two lists that are sorted by id(free_dofs, restrained_dofs) to
@@ -37,23 +46,66 @@ from StructuralAnalysis.FrameElements import Element
 
 class Structure:
 
-    def __init__(self, elements: [Element]):
+    def __init__(self, elements: [Element], constraints=None):
         self.elements = sorted(elements, key=lambda x: x.id)
+        self.constraints = list(constraints) if constraints else []
         self.nodes, self.degrees_of_freedom = self.__nodes()
         self.free_degrees_of_freedom, self.restrained_degrees_of_freedom = self.__free_and_restrained_dofs()
-        self.no_of_degrees_of_freedom = self.degrees_of_freedom[-1].id
+        self.dof_indices = {dof: i for i, dof in enumerate(self.degrees_of_freedom)}
+        self.no_of_degrees_of_freedom = len(self.degrees_of_freedom)
+        # revisions of every element and of its nodes at the last clear_changes
+        self.__stamps = {}
+        self.__removed = {}
+
+    @property
+    def dirty_elements(self):
+        return [element for element in self.elements if self.__stamps.get(element) != self.__stamp(element)]
+
+    @property
+    def removed_elements(self):
+        return list(self.__removed)
+
+    def add_elements(self, elements):
+        present = set(self.elements)
+        elements = [element for element in elements if element not in present]
+        for element in elements:
+            self.__removed.pop(element, None)
+        self.__update_elements(self.elements + elements)
+
+    def remove_elements(self, elements):
+        removed = set(elements)
+        for element in self.elements:
+            if element in removed and element in self.__stamps:
+                self.__removed[element] = None
+                del self.__stamps[element]
+        self.__update_elements([element for element in self.elements if element not in removed])
+
+    def clear_changes(self):
+        self.__stamps = {element: self.__stamp(element) for element in self.elements}
+        self.__removed = {}
+
+    def __stamp(self, element):
+        return (element.revision,) + tuple(node.revision for node in element.nodes)
+
+    def __update_elements(self, elements):
+        self.elements = sorted(elements, key=lambda x: x.id)
+        self.nodes, self.degrees_of_freedom = self.__nodes()
+        self.free_degrees_of_freedom, self.restrained_degrees_of_freedom = self.__free_and_restrained_dofs()
+        self.dof_indices = {dof: i for i, dof in enumerate(self.degrees_of_freedom)}
+        self.no_of_degrees_of_freedom = len(self.degrees_of_freedom)
 
     def __nodes(self):
-        nodes = []
-        dofs = []
+        # dictionaries are used as ordered sets so collecting the nodes stays linear in the number of elements
+        nodes = {}
+        dofs = {}
         for element in self.elements:
-            for dof in element.degrees_of_freedom:
-                if dof not in dofs:
-                    dofs.append(dof)
-            if element.start_node not in nodes:
-                nodes.append(element.start_node)
-            if element.end_node not in nodes:
-                nodes.append(element.end_node)
+            dofs.update(dict.fromkeys(element.degrees_of_freedom))
+            nodes.update(dict.fromkeys(element.nodes))
+        for constraint in self.constraints:
+            nodes.update(dict.fromkeys(constraint.nodes))
+            for slave_dof, terms in constraint.equations():
+                if slave_dof in dofs:
+                    dofs.update(dict.fromkeys(dof for dof, _ in terms))
         return sorted(nodes, key=lambda x: x.id), sorted(dofs, key=lambda x: x.id)
 
     def __free_and_restrained_dofs(self):
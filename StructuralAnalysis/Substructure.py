@@ -0,0 +1,83 @@
+"""
+This class statically condenses a structure onto a set of boundary nodes so it can be reused as a superelement.
+The condensation is computed once, when the object is created, and shared by every SuperElement instance.
+The interior degrees of freedom are the free degrees of freedom of the structure that do not belong to a boundary
+node; the restraints of the boundary degrees of freedom inside the structure are ignored (they are assigned in the
+parent structure). Forces and settlements assigned inside the structure are condensed into self.load_vector.
+Structures with constraints cannot be condensed.
+Attributes:
+    self.structure: Structure object that is condensed
+    self.boundary_nodes: list of Node objects of self.structure kept in the condensed matrix
+    self.boundary_degrees_of_freedom: list of (boundary node position, dof number 1 to 6) that orders the rows and
+                                      columns of the condensed matrix
+    self.interior_degrees_of_freedom: list of the condensed DegreeOfFreedom objects
+    self.matrix: condensed stiffness matrix Kbb - Kbi * inverse(Kii) * Kib
+    self.load_vector: condensed forces fb - Kbi * inverse(Kii) * fi
+    self.recovery_matrix: -inverse(Kii) * Kib, interior displacements caused by unit boundary displacements
+    self.fixed_interior_displacements: interior displacements caused by the interior forces with the boundary fixed
+Methods:
+    self.interior_displacements(boundary_displacements): recovers the interior displacements
+"""
+
+
+import numpy as np
+from StructuralAnalysis.Node import Node
+from StructuralAnalysis.Structure import Structure
+from StructuralAnalysis.Factorization import Factorization
+from StructuralAnalysis.__SolverHelper import global_elastic_matrix
+
+
+class Substructure:
+
+    def __init__(self, structure: Structure, boundary_nodes: [Node]):
+        if structure.constraints:
+            raise ValueError("Structures with constraints cannot be condensed.")
+        self.structure = structure
+        self.boundary_nodes = list(boundary_nodes)
+
+        structure_dofs = set(structure.degrees_of_freedom)
+        boundary_dofs = []
+        self.boundary_degrees_of_freedom = []
+        for position, node in enumerate(self.boundary_nodes):
+            for number in range(1, 7):
+                dof = getattr(node, 'dof_%d' % number)
+                if dof in structure_dofs:
+                    boundary_dofs.append(dof)
+                    self.boundary_degrees_of_freedom.append((position, number))
+        if not boundary_dofs:
+            raise ValueError("None of the boundary nodes belongs to the structure.")
+
+        boundary_set = set(boundary_dofs)
+        self.interior_degrees_of_freedom = [dof for dof in structure.free_degrees_of_freedom
+                                            if dof not in boundary_set]
+        supports = [dof for dof in structure.restrained_degrees_of_freedom if dof not in boundary_set]
+
+        indices = structure.dof_indices
+        b = [indices[dof] for dof in boundary_dofs]
+        i = [indices[dof] for dof in self.interior_degrees_of_freedom]
+        s = [indices[dof] for dof in supports]
+        global_matrix = global_elastic_matrix(structure)
+        kbb = global_matrix[np.ix_(b, b)]
+        kbi = global_matrix[np.ix_(b, i)]
+        kii = global_matrix[np.ix_(i, i)]
+
+        settlements = np.array([dof.displacement for dof in supports], dtype=float)
+        fb = np.array([dof.force for dof in boundary_dofs], dtype=float) - \
+            np.dot(global_matrix[np.ix_(b, s)], settlements)
+        fi = np.array([dof.force for dof in self.interior_degrees_of_freedom], dtype=float) - \
+            np.dot(global_matrix[np.ix_(i, s)], settlements)
+
+        if i:
+            factorization = Factorization(kii)
+            if factorization.singular:
+                raise ValueError("The interior of the substructure is unstable when its boundary is fixed.")
+            self.recovery_matrix = -factorization.solve(kbi.T)
+            self.fixed_interior_displacements = factorization.solve(fi)
+        else:
+            self.recovery_matrix = np.zeros((0, len(b)))
+            self.fixed_interior_displacements = np.zeros(0)
+        self.matrix = kbb + np.dot(kbi, self.recovery_matrix)
+        self.load_vector = fb + np.dot(self.recovery_matrix.T, fi)
+
+    def interior_displacements(self, boundary_displacements):
+        return np.dot(self.recovery_matrix, boundary_displacements) + self.fixed_interior_displacements
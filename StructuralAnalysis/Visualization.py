@@ -1,17 +1,39 @@
+"""
+Interactive OpenGL viewer of the structure. show_structure and show_deformed_shape only compute the line segments;
+pyqtgraph (Qt and OpenGL) is imported and the QApplication and the window are created by execute_qt, so this module
+can be imported and used on machines without a display.
+animate and animate_mode_shape play a time history or a mode shape in the window once execute_qt is called; every
+frame is written into the existing vertex buffer (DeformedShape.write_segments).
+"""
+
+
 from StructuralAnalysis import Structure
-from StructuralAnalysis.FrameElements import Element
-from pyqtgraph.Qt import QtCore, QtGui
-import pyqtgraph.opengl as gl
+from StructuralAnalysis.DeformedShape import DeformedShape
+from StructuralAnalysis.ResultsStore import ResultsStore
+import itertools
 import numpy as np
-import math
 
 __structure = None
+__deformed = None
+# (function drawing frame i, interval between frames in milliseconds) of the animation to play
+__animation = None
+__timer = None
+# (vertices, color, line item once the window exists) of every drawn set of lines
+__lines = []
 
-app = QtGui.QApplication([])
-w = gl.GLViewWidget()
+app = None
+w = None
 
 
 def __initiate_window():
+    global app, w
+    from pyqtgraph.Qt import QtGui
+    import pyqtgraph.opengl as gl
+    app = QtGui.QApplication.instance() or QtGui.QApplication([])
+    w = gl.GLViewWidget()
+    for i, (vertices, color, _) in enumerate(__lines):
+        __lines[i] = (vertices, color, __line_item(vertices, color))
+
     distance = __get_camera_distance(__structure)
     w.setGeometry(50, 100, 700, 700)
     w.opts['distance'] = distance * 3
@@ -30,6 +52,15 @@ def __initiate_window():
     w.addItem(axis)
 
 
+def __line_item(vertices, color):
+    import pyqtgraph.opengl as gl
+    plt = gl.GLLinePlotItem(pos=vertices, color=color, width=2, antialias=True, mode='lines')
+    plt.rotate(angle=90, x=90, y=0, z=0)
+    plt.rotate(angle=90, x=0, y=0, z=90)
+    w.addItem(plt)
+    return plt
+
+
 def __get_camera_distance(structure):
     maximum = 0
     for node in structure.nodes:
@@ -42,128 +73,107 @@ def __get_camera_distance(structure):
 def show_structure(structure: Structure):
     global __structure
     __structure = structure
-    for element in structure.elements:
-        x = np.array([element.start_node.x, element.end_node.x])
-        y = np.array([element.start_node.y, element.end_node.y])
-        z = np.array([element.start_node.z, element.end_node.z])
-
-        pts = np.vstack([x, y, z]).T
-        plt = gl.GLLinePlotItem(pos=pts, color='w', width=2, antialias=True)
-        plt.rotate(angle=90, x=90, y=0, z=0)
-        plt.rotate(angle=90, x=0, y=0, z=90)
-
-        w.addItem(plt)
-    global __max_coordinate
+    shape = DeformedShape(structure, 1)
+    __add_lines(shape.segments(shape.coordinates), 'w')
 
 
 def show_deformed_shape(structure: Structure, number_of_stations: int, scale: int):
-    global __structure
+    """
+    All the elements are drawn as one line-segment item; the segment displacements are kept so the scale can be
+    changed later by set_deformation_scale without recomputing the geometry.
+    """
+    global __structure, __deformed
     __structure = structure
-    for element in structure.elements:
-        pts = __get_stations_global_displaced_position(element, number_of_stations, scale)
-        plt = gl.GLLinePlotItem(pos=pts, color='r', width=2, antialias=True)
-        plt.rotate(angle=90, x=90, y=0, z=0)
-        plt.rotate(angle=90, x=0, y=0, z=90)
-        w.addItem(plt)
+    shape = DeformedShape(structure, number_of_stations)
+    coordinates = shape.segments(shape.coordinates)
+    displacements = shape.segments(shape.displacements())
+    vertices = coordinates + scale * displacements
+    __deformed = (coordinates, displacements, vertices, __add_lines(vertices, 'r'))
+
+
+def set_deformation_scale(scale):
+    if __deformed is None:
+        raise ValueError("show_deformed_shape must be called before set_deformation_scale.")
+    coordinates, displacements, vertices, line = __deformed
+    np.multiply(displacements, scale, out=vertices)
+    vertices += coordinates
+    __refresh(line)
+
+
+def animate(structure: Structure, frames, number_of_stations=10, scale=1, interval=33):
+    """
+    Plays a time history. frames is an array (frames, nodes, 6) of node displacements ordered as structure.nodes,
+    e.g. a memory-mapped .npy file (np.load(path, mmap_mode='r')) that is then read one frame at a time, or a
+    ResultsStore whose load cases are played in order. The frames loop every interval milliseconds.
+    """
+    global __structure, __animation
+    __structure = structure
+    shape = DeformedShape(structure, number_of_stations)
+    if isinstance(frames, ResultsStore):
+        store = frames
+        load_cases = store.load_cases
+
+        def frame(i):
+            return store.displacements(load_cases[i])
+        count = len(load_cases)
+    else:
+        frame = frames.__getitem__
+        count = len(frames)
+    vertices = np.empty((len(shape.elements) * number_of_stations * 2, 3))
+    shape.write_segments(scale, frame(0), vertices)
+    line = __add_lines(vertices, 'r')
+
+    def draw(i):
+        shape.write_segments(scale, frame(i % count), vertices)
+        __refresh(line)
+    __animation = (draw, interval)
+
+
+def animate_mode_shape(structure: Structure, mode_shape, number_of_stations=10, scale=1, frames_per_cycle=40,
+                       interval=33):
+    """
+    Plays a mode shape (array (nodes, 6) ordered as structure.nodes) oscillating harmonically; the station
+    displacements are computed once and every frame only rescales them.
+    """
+    global __structure, __animation
+    __structure = structure
+    shape = DeformedShape(structure, number_of_stations)
+    coordinates = shape.segments(shape.coordinates)
+    displacements = shape.segments(shape.displacements(mode_shape))
+    vertices = coordinates + scale * displacements
+    line = __add_lines(vertices, 'r')
+    amplitudes = scale * np.sin(2 * np.pi * np.arange(frames_per_cycle) / frames_per_cycle)
+
+    def draw(i):
+        np.multiply(displacements, amplitudes[i % frames_per_cycle], out=vertices)
+        np.add(vertices, coordinates, out=vertices)
+        __refresh(line)
+    __animation = (draw, interval)
 
 
 def execute_qt():
+    global __timer
     __initiate_window()
     w.show()
     import sys
+    from pyqtgraph.Qt import QtCore, QtGui
+    if __animation is not None:
+        draw, interval = __animation
+        frames = itertools.count()
+        __timer = QtCore.QTimer()
+        __timer.timeout.connect(lambda: draw(next(frames)))
+        __timer.start(interval)
     if (sys.flags.interactive != 1) or not hasattr(QtCore, 'PYQT_VERSION'):
         QtGui.QApplication.instance().exec_()
 
 
-def __transformation_matrix(element):
-    if element.start_node.x == element.end_node.x and element.start_node.y == element.end_node.y:
-        if element.end_node.z > element.start_node.z:
-            return np.array([[0, 0, 1],
-                             [0, 1, 0],
-                             [-1, 0, 0]])
-        else:
-            return np.array([[0, 0, -1],
-                             [0, 1, 0],
-                             [1, 0, 0]])
-    else:
-        cxx = (element.end_node.x - element.start_node.x) / element.length
-        cyx = (element.end_node.y - element.start_node.y) / element.length
-        czx = (element.end_node.z - element.start_node.z) / element.length
-        d = math.sqrt(cxx ** 2 + cyx ** 2)
-        cxy = -cyx / d
-        cyy = cxx / d
-        czy = 0
-        cxz = -cxx * czx / d
-        cyz = -cyx * czx / d
-        czz = d
-        return np.array([[cxx, cyx, czx],
-                         [cxy, cyy, czy],
-                         [cxz, cyz, czz]])
-
-
-def __local_end_displacements(element: Element):
-    gama_matrix = __transformation_matrix(element)
-    global_displacements = np.array([element.start_node.dof_1.displacement,
-                                    element.start_node.dof_2.displacement,
-                                    element.start_node.dof_3.displacement,
-                                    element.start_node.dof_4.displacement,
-                                    element.start_node.dof_5.displacement,
-                                    element.start_node.dof_6.displacement,
-                                    element.end_node.dof_1.displacement,
-                                    element.end_node.dof_2.displacement,
-                                    element.end_node.dof_3.displacement,
-                                    element.end_node.dof_4.displacement,
-                                    element.end_node.dof_5.displacement,
-                                    element.end_node.dof_6.displacement])
-    transformation_matrix = np.zeros((12, 12))
-    for i in range(4):
-        transformation_matrix[(i * 3):(i + 1) * 3, (i * 3):(i + 1) * 3] = gama_matrix
-    return np.dot(transformation_matrix, global_displacements)
-
-
-def __get_stations_local_coordinates(element: Element, number_of_stations):
-    local_coordinates = np.zeros((number_of_stations+1, 3))
-    inter_station_length = element.length / number_of_stations
-    for i in range(0, number_of_stations+1):
-        local_coordinates[i] = np.array([i*inter_station_length, 0, 0])
-    return local_coordinates
-
-
-def __get_stations_global_coordinates(element: Element, number_of_stations, stations_local_coordinates):
-    transformed_coordinates = np.zeros((number_of_stations+1, 3))
-    transformation_matrrix = __transformation_matrix(element)
-    i = 0
-    for station_coordinates in stations_local_coordinates:
-        transformed_coordinates[i] = np.dot(transformation_matrrix.T, station_coordinates.T) + \
-                                     np.array([element.start_node.x, element.start_node.y, element.start_node.z])
-        i += 1
-    return transformed_coordinates
-
-
-def __get_stations_local_displacement(element: Element, number_of_stations, stations_local_coordinates):
-    stations_local_displacement = np.zeros((number_of_stations+1, 3))
-    i = 0
-    for station_coordinate in stations_local_coordinates:
-        x = station_coordinate[0]
-        local_displacement_vector = np.dot(element.shape_function_matrix(x), __local_end_displacements(element))
-        columns = np.shape(local_displacement_vector)[0]
-        stations_local_displacement[i, 0:columns] = local_displacement_vector
-        i += 1
-    return stations_local_displacement
-
-
-def __get_stations_global_displaced_position(element: Element, number_of_stations, scale):
-    stations_local_coordinates = __get_stations_local_coordinates(element, number_of_stations)
-    stations_global_displaced_position = np.zeros((number_of_stations+1, 3))
-    stations_local_displacements = __get_stations_local_displacement(element, number_of_stations,
-                                                                     stations_local_coordinates)
-    stations_global_coordinates = __get_stations_global_coordinates(element, number_of_stations,
-                                                                    stations_local_coordinates)
-    transformation_matrix = __transformation_matrix(element)
-    i = 0
-    for displacements in stations_local_displacements:
-        global_displacement = np.dot(scale, np.dot(transformation_matrix.T, displacements.T))
-        global_position = global_displacement + stations_global_coordinates[i]
-        stations_global_displaced_position[i] = global_position
-        i += 1
-    return stations_global_displaced_position
+def __add_lines(vertices, color):
+    # once the window exists the lines are drawn at once, otherwise execute_qt draws them
+    __lines.append((vertices, color, __line_item(vertices, color) if w is not None else None))
+    return len(__lines) - 1
+
+
+def __refresh(line):
+    vertices, _, item = __lines[line]
+    if item is not None:
+        item.setData(pos=vertices)
@@ -1,9 +1,13 @@
 import numpy as np
+from scipy.sparse import coo_matrix
 from StructuralAnalysis.Structure import Structure
+from StructuralAnalysis import Instrumentation
 
 
+@Instrumentation.timed('assembly')
 def global_elastic_matrix(structure: Structure):
     no_dof = structure.no_of_degrees_of_freedom
+    indices = structure.dof_indices
     initialized_matrix = np.zeros((no_dof, no_dof))
     for element in structure.elements:
         element_matrix = np.zeros((no_dof, no_dof))
@@ -11,17 +15,21 @@ def global_elastic_matrix(structure: Structure):
         for row in element.matrix:
             j = 0
             for col in row:
-                k, z = element.degrees_of_freedom[i].id - 1, element.degrees_of_freedom[j].id - 1
+                k, z = indices[element.degrees_of_freedom[i]], indices[element.degrees_of_freedom[j]]
                 element_matrix[k, z] = col
                 j += 1
             i += 1
         initialized_matrix = np.add(initialized_matrix, element_matrix)
 
+    Instrumentation.count('elements_assembled', len(structure.elements))
+    if Instrumentation.is_enabled():
+        Instrumentation.count('nonzeros', int(np.count_nonzero(initialized_matrix)))
     return initialized_matrix
 
 
 def global_elastic_geometric_matrix(structure: Structure):
     no_dof = structure.no_of_degrees_of_freedom
+    indices = structure.dof_indices
     initialized_matrix = np.zeros((no_dof, no_dof))
     for element in structure.elements:
         element_matrix = np.zeros((no_dof, no_dof))
@@ -29,7 +37,7 @@ def global_elastic_geometric_matrix(structure: Structure):
         for row in element.elastic_geometric_matrix:
             j = 0
             for col in row:
-                k, z = element.degrees_of_freedom[i].id - 1, element.degrees_of_freedom[j].id - 1
+                k, z = indices[element.degrees_of_freedom[i]], indices[element.degrees_of_freedom[j]]
                 element_matrix[k, z] = col
                 j += 1
             i += 1
@@ -38,7 +46,39 @@ def global_elastic_geometric_matrix(structure: Structure):
     return initialized_matrix
 
 
+def sparse_elastic_matrix(elements, element_indices, size):
+    """
+    sparse (size, size) stiffness matrix (csc) of elements, element_indices holds the rows of the degrees of freedom
+    of every element (ordered as element.degrees_of_freedom)
+    """
+    rows = [np.repeat(indices, len(indices)) for indices in element_indices]
+    columns = [np.tile(indices, len(indices)) for indices in element_indices]
+    values = [np.ravel(element.matrix).astype(float) for element in elements]
+    empty = [np.zeros(0, dtype=np.int64)]
+    return coo_matrix((np.concatenate(values + [np.zeros(0)]), (np.concatenate(rows + empty),
+                                                                 np.concatenate(columns + empty))),
+                      shape=(size, size)).tocsc()
+
+
+@Instrumentation.timed('mass_assembly')
+def global_mass_matrix(structure: Structure):
+    no_dof = structure.no_of_degrees_of_freedom
+    indices = structure.dof_indices
+    initialized_matrix = np.zeros((no_dof, no_dof))
+    for element in structure.elements:
+        element_matrix = element.mass_matrix
+        if element_matrix is None:
+            continue
+        ids = [indices[dof] for dof in element.degrees_of_freedom]
+        initialized_matrix[np.ix_(ids, ids)] += element_matrix
+    return initialized_matrix
+
+
+@Instrumentation.timed('partition')
 def partition_global_matrix(structure, global_matrix):
+    Instrumentation.count('free_degrees_of_freedom', len(structure.free_degrees_of_freedom))
+    Instrumentation.count('restrained_degrees_of_freedom', len(structure.restrained_degrees_of_freedom))
+    indices = structure.dof_indices
 
     def ff_matrix():
         no_dof = len(structure.free_degrees_of_freedom)
@@ -47,7 +87,7 @@ def partition_global_matrix(structure, global_matrix):
         for dof_i in structure.free_degrees_of_freedom:
             j = 0
             for dof_j in structure.free_degrees_of_freedom:
-                current = global_matrix[dof_i.id - 1, dof_j.id - 1]
+                current = global_matrix[indices[dof_i], indices[dof_j]]
                 matrix[i, j] = current
                 j += 1
             i += 1
@@ -61,7 +101,7 @@ def partition_global_matrix(structure, global_matrix):
         for dof_i in structure.free_degrees_of_freedom:
             j = 0
             for dof_j in structure.restrained_degrees_of_freedom:
-                current = global_matrix[dof_i.id - 1, dof_j.id - 1]
+                current = global_matrix[indices[dof_i], indices[dof_j]]
                 matrix[i, j] = current
                 j += 1
             i += 1
@@ -75,7 +115,7 @@ def partition_global_matrix(structure, global_matrix):
         for dof_i in structure.restrained_degrees_of_freedom:
             j = 0
             for dof_j in structure.free_degrees_of_freedom:
-                matrix[i, j] = global_matrix[dof_i.id - 1, dof_j.id - 1]
+                matrix[i, j] = global_matrix[indices[dof_i], indices[dof_j]]
                 j += 1
             i += 1
         return matrix
@@ -87,7 +127,7 @@ def partition_global_matrix(structure, global_matrix):
         for dof_i in structure.restrained_degrees_of_freedom:
             j = 0
             for dof_j in structure.restrained_degrees_of_freedom:
-                matrix[i, j] = global_matrix[dof_i.id - 1, dof_j.id - 1]
+                matrix[i, j] = global_matrix[indices[dof_i], indices[dof_j]]
                 j += 1
             i += 1
         return matrix
@@ -101,6 +141,21 @@ def force_vector(structure):
     for dof in structure.free_degrees_of_freedom:
         forces[i] = dof.force
         i += 1
+    equivalent_forces = element_load_vector(structure)
+    if equivalent_forces is not None:
+        forces += equivalent_forces[[structure.dof_indices[dof] for dof in structure.free_degrees_of_freedom]]
+    return forces
+
+
+def element_load_vector(structure):
+    loaded_elements = [element for element in structure.elements if element.load_vector is not None]
+    if not loaded_elements:
+        return None
+    forces = np.zeros(structure.no_of_degrees_of_freedom)
+    indices = structure.dof_indices
+    for element in loaded_elements:
+        ids = [indices[dof] for dof in element.degrees_of_freedom]
+        np.add.at(forces, ids, element.load_vector)
     return forces
 
 
@@ -113,9 +168,11 @@ def restrained_displacement_vector(structure):
     return displacements
 
 
+@Instrumentation.timed('solve')
 def solve_for_displacements(structure, ff_matrix, fs_matrix, restrained_displacements, forces):
     displacements = np.dot(np.linalg.inv(ff_matrix),
                            forces - np.dot(fs_matrix, restrained_displacements))
+    Instrumentation.count('factorizations')
     i = 0
     for dof in structure.free_degrees_of_freedom:
         dof.displacement = displacements[i]
@@ -130,11 +187,91 @@ def update_node_coordinates(structure):
         node.z = node.z + node.dof_3.displacement
 
 
+@Instrumentation.timed('reactions')
 def solve_for_reactions(structure, displacements, restrained_displacements, sf_matrix, ss_matrix):
     reactions = np.dot(sf_matrix, displacements) + \
                 np.dot(ss_matrix, restrained_displacements)
+    equivalent_forces = element_load_vector(structure)
+    if equivalent_forces is not None:
+        reactions -= equivalent_forces[[structure.dof_indices[dof] for dof in structure.restrained_degrees_of_freedom]]
     i = 0
     for dof in structure.restrained_degrees_of_freedom:
         dof.force = reactions[i]
         i += 1
     return reactions
+
+
+@Instrumentation.timed('constraints')
+def constraint_transformation(structure):
+    """
+    Returns (transformation, retained_dofs, offset) such that the displacements of the free degrees of freedom are
+    transformation * (displacements of retained_dofs) + offset. The retained degrees of freedom are the free degrees
+    of freedom that are not slaves of a constraint; offset holds the contribution of restrained (settled) masters.
+    """
+    structure_dofs = set(structure.degrees_of_freedom)
+    equations = {}
+    for constraint in structure.constraints:
+        for slave, terms in constraint.equations():
+            if slave not in structure_dofs:
+                continue
+            if slave in equations:
+                raise ValueError("%s is constrained more than once." % slave)
+            if slave.restrained:
+                raise ValueError("%s is restrained and cannot be a slave of a constraint." % slave)
+            equations[slave] = dict()
+            for master, coefficient in terms:
+                equations[slave][master] = equations[slave].get(master, 0) + coefficient
+
+    # substitute slaves that are masters of other constraints until only independent masters remain
+    for _ in range(len(equations) + 1):
+        chained = False
+        for slave, terms in equations.items():
+            for master in [master for master in terms if master in equations]:
+                if master is slave:
+                    raise ValueError("Circular constraint at %s." % slave)
+                coefficient = terms.pop(master)
+                for other, other_coefficient in equations[master].items():
+                    terms[other] = terms.get(other, 0) + coefficient * other_coefficient
+                chained = True
+        if not chained:
+            break
+    else:
+        raise ValueError("Circular constraints.")
+
+    free_dofs = structure.free_degrees_of_freedom
+    retained_dofs = [dof for dof in free_dofs if dof not in equations]
+    retained_index = {dof: i for i, dof in enumerate(retained_dofs)}
+    rows, columns, values = [], [], []
+    offset = np.zeros(len(free_dofs))
+    for i, dof in enumerate(free_dofs):
+        if dof not in equations:
+            rows.append(i)
+            columns.append(retained_index[dof])
+            values.append(1.0)
+            continue
+        for master, coefficient in equations[dof].items():
+            if master.restrained:
+                offset[i] += coefficient * master.displacement
+            else:
+                rows.append(i)
+                columns.append(retained_index[master])
+                values.append(coefficient)
+    transformation = coo_matrix((values, (rows, columns)), shape=(len(free_dofs), len(retained_dofs))).tocsr()
+    return transformation, retained_dofs, offset
+
+
+def reduce_constrained_system(transformation, offset, ff_matrix, fs_matrix, restrained_displacements, forces):
+    reduced_forces = transformation.T.dot(forces - np.dot(fs_matrix, restrained_displacements) -
+                                          np.dot(ff_matrix, offset))
+    reduced_matrix = np.asarray(transformation.T @ ff_matrix @ transformation)
+    return reduced_matrix, reduced_forces
+
+
+@Instrumentation.timed('solve')
+def solve_for_constrained_displacements(structure, transformation, offset, reduced_matrix, reduced_forces):
+    displacements = transformation.dot(np.linalg.solve(reduced_matrix, reduced_forces)) + offset
+    i = 0
+    for dof in structure.free_degrees_of_freedom:
+        dof.displacement = displacements[i]
+        i += 1
+    return displacements
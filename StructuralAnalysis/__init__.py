@@ -2,9 +2,47 @@ from StructuralAnalysis.Structure import Structure
 from StructuralAnalysis.Node import Node
 from StructuralAnalysis import Material
 from StructuralAnalysis import Section
-from StructuralAnalysis import Solver
-from StructuralAnalysis import Visualization
 from StructuralAnalysis import FrameElements
 
 import StructuralAnalysis.FrameElements
-import StructuralAnalysis.Node
\ No newline at end of file
+import StructuralAnalysis.Node
+
+# name: (module, attribute of the module, None for the module itself) of everything imported when it is first used,
+# so importing the package loads neither scipy nor Qt and OpenGL
+__LAZY = {'Solver': ('StructuralAnalysis.Solver', None),
+          'Visualization': ('StructuralAnalysis.Visualization', None),
+          'Constraint': ('StructuralAnalysis.Constraint', None),
+          'ModelFile': ('StructuralAnalysis.ModelFile', None),
+          'Instrumentation': ('StructuralAnalysis.Instrumentation', None),
+          'Substructure': ('StructuralAnalysis.Substructure', 'Substructure'),
+          'ReducedModel': ('StructuralAnalysis.ModelReduction', 'ReducedModel'),
+          'ResultsStore': ('StructuralAnalysis.ResultsStore', 'ResultsStore'),
+          'ResultCache': ('StructuralAnalysis.ResultCache', 'ResultCache'),
+          'MemberForces': ('StructuralAnalysis.MemberForces', 'MemberForces'),
+          'ElasticSystem': ('StructuralAnalysis.ElasticSystem', 'ElasticSystem'),
+          'GlobalMatrix': ('StructuralAnalysis.GlobalMatrix', 'GlobalMatrix'),
+          'StagedConstruction': ('StructuralAnalysis.StagedConstruction', 'StagedConstruction'),
+          'Stage': ('StructuralAnalysis.StagedConstruction', 'Stage'),
+          'InfluenceLines': ('StructuralAnalysis.MovingLoad', 'InfluenceLines'),
+          'Lane': ('StructuralAnalysis.MovingLoad', 'Lane'),
+          'Vehicle': ('StructuralAnalysis.MovingLoad', 'Vehicle'),
+          'Sensitivity': ('StructuralAnalysis.Sensitivity', 'Sensitivity'),
+          'SteelDesign': ('StructuralAnalysis.SteelDesign', 'SteelDesign')}
+# "from StructuralAnalysis import *" loads the lazy names too, except the viewer
+__all__ = ['Structure', 'Node', 'Material', 'Section', 'FrameElements'] + [name for name in __LAZY
+                                                                          if name != 'Visualization']
+
+
+def __getattr__(name):
+    if name not in __LAZY:
+        raise AttributeError("module %r has no attribute %r" % (__name__, name))
+    import sys
+    import importlib
+    importlib.import_module(__LAZY[name][0])
+    # importing a module binds it to its name in the package, which hides a class of the same name (e.g.
+    # ElasticSystem), so every loaded name is bound again
+    for lazy_name, (module, attribute) in __LAZY.items():
+        if module in sys.modules:
+            globals()[lazy_name] = sys.modules[module] if attribute is None else getattr(sys.modules[module],
+                                                                                         attribute)
+    return globals()[name]
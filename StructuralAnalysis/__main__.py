@@ -1,83 +1,206 @@
-from StructuralAnalysis import Node, Structure, Section, Material, Solver, Visualization
-from StructuralAnalysis.FrameElements import *
-
-n1 = Node(0, 0, 0)
-n2 = Node(6000, 0, 0)
-n3 = Node(0, 0, 6000)
-n4 = Node(6000, 0, 6000)
-
-n5 = Node(0, 6000, 0)
-n6 = Node(6000, 6000, 0)
-n7 = Node(0, 6000, 6000)
-n8 = Node(6000, 6000, 6000)
-
-n9 = Node(0, 12000, 0)
-n10 = Node(6000, 12000, 0)
-n11 = Node(0, 12000, 6000)
-n12 = Node(6000, 12000, 6000)
-
-
-section = Section.ArbitrarySection(3000, 180*10**6, 180*10**6, 360*10**6, 0)
-
-steel = Material.Steel(250, 400, 200000, 0.2)
-
-e15 = FrameElement(n1, n5, section, steel)
-e26 = FrameElement(n2, n6, section, steel)
-e37 = FrameElement(n3, n7, section, steel)
-e48 = FrameElement(n4, n8, section, steel)
-
-e56 = FrameElement(n5, n6, section, steel)
-e68 = FrameElement(n6, n8, section, steel)
-e87 = FrameElement(n8, n7, section, steel)
-e57 = FrameElement(n5, n7, section, steel)
-
-e59 = FrameElement(n5, n9, section, steel)
-e610 = FrameElement(n10, n6, section, steel)
-e711 = FrameElement(n11, n7, section, steel)
-e812 = FrameElement(n8, n12, section, steel)
-
-e910 = FrameElement(n9, n10, section, steel)
-e1112 = FrameElement(n11, n12, section, steel)
-e911 = FrameElement(n11, n9, section, steel)
-e1012 = FrameElement(n10, n12, section, steel)
-
-n1.dof_1.restrained = True
-n1.dof_2.restrained = True
-n1.dof_3.restrained = True
-
-
-n3.dof_1.restrained = True
-n3.dof_2.restrained = True
-n3.dof_3.restrained = True
-n3.dof_4.restrained = True
-n3.dof_5.restrained = True
-n3.dof_6.restrained = True
-
-n2.dof_1.restrained = True
-n2.dof_2.restrained = True
-n2.dof_3.restrained = True
-n2.dof_4.restrained = True
-n2.dof_5.restrained = True
-n2.dof_6.restrained = True
-
-n4.dof_1.restrained = True
-n4.dof_2.restrained = True
-n4.dof_3.restrained = True
-n4.dof_4.restrained = True
-n4.dof_5.restrained = True
-n4.dof_6.restrained = True
-
-n5.dof_3.displaced = -50
-
-n10.dof_1.force = 2000000
-n6.dof_3.force = 4000000
-
-
-structure = Structure([e15, e26, e37, e48, e56, e68, e87, e57, e59, e610, e711, e812, e910, e1112, e911, e1012])
-
-Solver.analyze_first_order_elastic(structure)
-
-# Visualization.show_structure(structure)
-# Visualization.show_deformed_shape(structure, 10, 1)
-# Visualization.execute_qt()
-
+"""
+Batch analysis from the command line:
+    python -m StructuralAnalysis [--output DIR] [--format npz|json] [--workers N] [--memory-limit MB] PATH [PATH ...]
+Every PATH is a model file (.npz), a CSV model directory (a directory holding nodes.csv, see ModelFile) or a
+directory that is searched recursively for both. The models are analyzed (first-order elastic) in parallel by
+--workers processes (default: one per core), and the results of every model are written to the output directory,
+named after the model:
+    --format npz: <name>.results, a ResultsStore directory of binary arrays
+    --format json: <name>.json with the node ids, displacements and reactions (nodes, 6), and the element ids and
+                   local end forces (elements, 12) of the line elements (see MemberForces)
+The node and element ids written in both formats are those of the model file.
+--memory-limit is the memory in MB shared by all the workers. A worker refuses a model whose dense stiffness
+matrices would not fit in its share. Where the resource module exists, the worker's address space is also limited
+to its share, so a model that outgrows it fails on its own without exhausting the machine.
+Progress is printed to stderr after every model, followed by a throughput summary. The exit status is 1 if any
+model failed.
+
+Functions:
+    main(arguments=None): runs the batch, returns the exit status
+    find_models(paths): list of the model files and CSV model directories found in paths
+"""
+
+
+import os
+import sys
+import json
+import time
+import argparse
+import warnings
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from StructuralAnalysis import Solver
+from StructuralAnalysis.ModelFile import read_model
+
+# the global matrix, its partitions and the inverse of the free-free partition are held at the same time
+MATRIX_COPIES = 3
+
+
+def main(arguments=None):
+    parser = argparse.ArgumentParser(prog='python -m StructuralAnalysis',
+                                     description='Analyzes model files in parallel and writes their results.')
+    parser.add_argument('paths', nargs='+', help='model files (.npz), CSV model directories or directories of models')
+    parser.add_argument('--output', default='results', help='directory of the results (default: results)')
+    parser.add_argument('--format', choices=('npz', 'json'), default='npz',
+                        help='npz: a binary ResultsStore per model, json: a JSON file per model')
+    parser.add_argument('--workers', type=int, default=None, help='number of processes (default: one per core)')
+    parser.add_argument('--memory-limit', type=float, default=None, help='memory shared by the workers in MB')
+    parser.add_argument('--quiet', action='store_true', help='only print the summary')
+    arguments = parser.parse_args(arguments)
+
+    models = find_models(arguments.paths)
+    if not models:
+        parser.error('no model files found in %s' % ', '.join(arguments.paths))
+    workers = max(1, min(arguments.workers or os.cpu_count() or 1, len(models)))
+    worker_memory = arguments.memory_limit * 2 ** 20 / workers if arguments.memory_limit else None
+    os.makedirs(arguments.output, exist_ok=True)
+
+    start = time.perf_counter()
+    failures = []
+    degrees_of_freedom = 0
+    progress = __Progress(len(models), arguments.quiet)
+    with ProcessPoolExecutor(max_workers=workers, initializer=_limit_memory, initargs=(worker_memory,)) as executor:
+        futures = {executor.submit(_analyze_model, path, os.path.join(arguments.output, name), arguments.format,
+                                   worker_memory): path
+                   for path, name in zip(models, __output_names(models))}
+        for future in as_completed(futures):
+            try:
+                error, seconds, size = future.result()
+            except Exception as exception:
+                # the worker process died, e.g. killed by the operating system
+                error, seconds, size = '%s: %s' % (type(exception).__name__, exception), 0.0, 0
+            if error is not None:
+                failures.append((futures[future], error))
+            degrees_of_freedom += size
+            progress.update(futures[future], error, seconds)
+
+    elapsed = time.perf_counter() - start
+    progress.finish()
+    analyzed = len(models) - len(failures)
+    print('Analyzed %d of %d models in %.2f s with %d workers: %.2f models/s, %.0f degrees of freedom/s'
+          % (analyzed, len(models), elapsed, workers, analyzed / elapsed, degrees_of_freedom / elapsed))
+    for path, error in failures:
+        print('failed: %s: %s' % (path, error))
+    return 1 if failures else 0
+
+
+def find_models(paths):
+    models = []
+    for path in paths:
+        if os.path.isfile(path) and path.endswith('.npz'):
+            models.append(path)
+        elif os.path.isdir(path):
+            for directory, subdirectories, files in os.walk(path):
+                if 'nodes.csv' in files:
+                    models.append(directory)
+                    subdirectories[:] = []
+                    continue
+                subdirectories.sort()
+                models.extend(os.path.join(directory, file) for file in sorted(files) if file.endswith('.npz'))
+        else:
+            raise SystemExit('%s is not a model file or a directory.' % path)
+    return models
+
+
+def _limit_memory(worker_memory):
+    if worker_memory is None:
+        return
+    try:
+        import resource
+        # the share is added to the address space the worker already uses (interpreter, NumPy and BLAS buffers)
+        with open('/proc/self/statm') as file:
+            used = int(file.read().split()[0]) * os.sysconf('SC_PAGE_SIZE')
+        limit = int(used + worker_memory)
+        resource.setrlimit(resource.RLIMIT_AS, (limit, resource.getrlimit(resource.RLIMIT_AS)[1]))
+    except (ImportError, OSError, ValueError):
+        # no resource module or no /proc: only the size check of _analyze_model applies
+        pass
+
+
+def _analyze_model(path, output, output_format, worker_memory):
+    """analyzes one model file and writes its results, returns (error message or None, seconds, degrees of freedom)"""
+    start = time.perf_counter()
+    size = 0
+    try:
+        structure, nodes, elements = read_model(path, return_ids=True)
+        size = len(structure.degrees_of_freedom)
+        required = MATRIX_COPIES * 8 * structure.no_of_degrees_of_freedom ** 2
+        if worker_memory is not None and required > worker_memory:
+            raise MemoryError('the stiffness matrices need about %.0f MB, the limit of a worker is %.0f MB'
+                              % (required / 2 ** 20, worker_memory / 2 ** 20))
+        with warnings.catch_warnings():
+            warnings.simplefilter('ignore')
+            results = Solver.analyze_first_order_elastic(structure)
+        if results is None:
+            raise ValueError('Matrix is singular or ill-conditioned! Check for stability.')
+        node_ids = {node: node_id for node_id, node in nodes.items()}
+        element_ids = {element: element_id for element_id, element in elements.items()}
+        if output_format == 'json':
+            __write_json(results, output + '.json', node_ids, element_ids)
+        else:
+            results.save(output + '.results', ids=([node_ids[node] for node in structure.nodes],
+                                                   [element_ids[element] for element in structure.elements]))
+    except MemoryError as error:
+        return 'MemoryError: %s' % (str(error) or 'the memory limit of a worker was exceeded'), \
+            time.perf_counter() - start, 0
+    except Exception as error:
+        return '%s: %s' % (type(error).__name__, error), time.perf_counter() - start, 0
+    return None, time.perf_counter() - start, size
+
+
+def __write_json(results, path, node_ids, element_ids):
+    """node_ids and element_ids: {object: id in the model file}, the ids written instead of the object ids"""
+    member_forces = results.member_forces
+    with open(path, 'w') as file:
+        json.dump({'node_ids': [node_ids[node] for node in results.structure.nodes],
+                   'displacements': results.displacements.tolist(),
+                   'reactions': results.reactions.tolist(),
+                   'element_ids': [element_ids[element] for element in member_forces.elements],
+                   'end_forces': member_forces.end_forces.tolist()}, file)
+
+
+def __output_names(models):
+    """the name of every model file without its extension, numbered when several models have the same name"""
+    names = []
+    used = set()
+    for path in models:
+        name = os.path.splitext(os.path.basename(os.path.normpath(path)))[0]
+        unique = name
+        number = 1
+        while unique in used:
+            number += 1
+            unique = '%s-%d' % (name, number)
+        used.add(unique)
+        names.append(unique)
+    return names
+
+
+class __Progress:
+
+    def __init__(self, total, quiet):
+        self.total = total
+        self.quiet = quiet
+        self.done = 0
+        self.failed = 0
+        self.start = time.perf_counter()
+        self.interactive = sys.stderr.isatty()
+
+    def update(self, path, error, seconds):
+        self.done += 1
+        self.failed += error is not None
+        if self.quiet:
+            return
+        rate = self.done / max(time.perf_counter() - self.start, 1e-9)
+        if self.interactive:
+            sys.stderr.write('\r[%d/%d] %d failed, %.2f models/s' % (self.done, self.total, self.failed, rate))
+        else:
+            sys.stderr.write('[%d/%d] %s %s %.2f s\n' % (self.done, self.total, path,
+                                                          'failed' if error else 'done', seconds))
+        sys.stderr.flush()
+
+    def finish(self):
+        if self.interactive and not self.quiet:
+            sys.stderr.write('\n')
+
+
+if __name__ == '__main__':
+    sys.exit(main())
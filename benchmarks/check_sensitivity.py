@@ -0,0 +1,110 @@
+"""
+Checks the adjoint derivatives of Sensitivity against central finite differences on a space frame with a settled
+support, where the compliance is not self-adjoint.
+Usage:
+    python benchmarks/check_sensitivity.py [--elements 6] [--tolerance 1e-4] [--output check_sensitivity.json]
+Exits with status 1 if a derivative differs from its finite difference by more than --tolerance, relative to the
+largest derivative of its response and design variable.
+"""
+
+
+import os
+import sys
+import json
+import argparse
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import numpy as np
+import generators
+from StructuralAnalysis import Structure, ElasticSystem, Section, Material
+from StructuralAnalysis.Sensitivity import Sensitivity, DESIGN_VARIABLES
+
+RESPONSES = ('displacement', 'reaction', 'compliance')
+SETTLEMENT = -5
+STEP = 1e-6
+
+
+def model():
+    """frame whose elements have their own section and material, as the derivatives assume, and a settled base"""
+    elements = generators.frame_3d(2, 2, 1)
+    for element in elements:
+        section = element.section
+        material = element.material
+        element.section = Section.ArbitrarySection(section.area, section.inertia_y, section.inertia_z,
+                                                   section.polar_inertia, 0)
+        element.material = Material.Steel(250, 400, material.elasticity_modulus, material.poissons_ratio)
+    structure = Structure(elements)
+    base = min(structure.nodes, key=lambda node: (node.y, node.x, node.z))
+    base.dof_2.displaced = SETTLEMENT
+    top = max(structure.nodes, key=lambda node: (node.y, node.x, node.z))
+    return structure, top, base
+
+
+def responses(structure, top, base):
+    system = ElasticSystem(structure)
+    results = system.solve()
+    free = np.array([[not getattr(node, 'dof_%d' % number).restrained for number in range(1, 7)]
+                     for node in structure.nodes])
+    return {'displacement': results.displacements[structure.nodes.index(top), 0],
+            'reaction': results.reactions[structure.nodes.index(base), 0],
+            'compliance': np.sum(system.node_forces()[free] * results.displacements[free])}
+
+
+def assign(element, variable, value):
+    if variable == 'elasticity_modulus':
+        element.material = Material.Steel(250, 400, value, element.material.poissons_ratio)
+    else:
+        properties = {name: getattr(element.section, name) for name in DESIGN_VARIABLES[:4]}
+        properties[variable] = value
+        element.section = Section.ArbitrarySection(*(properties[name] for name in DESIGN_VARIABLES[:4]), 0)
+
+
+def check(number_of_elements):
+    """largest relative error of every response over the first number_of_elements elements"""
+    structure, top, base = model()
+    sensitivity = Sensitivity(structure)
+    derivatives = {'displacement': sensitivity.displacement(top, 1), 'reaction': sensitivity.reaction(base, 1),
+                   'compliance': sensitivity.compliance()}
+    errors = dict.fromkeys(RESPONSES, 0.0)
+    for row, element in enumerate(sensitivity.elements[:number_of_elements]):
+        section, material = element.section, element.material
+        for column, variable in enumerate(DESIGN_VARIABLES):
+            value = material.elasticity_modulus if variable == 'elasticity_modulus' else getattr(section, variable)
+            step = value * STEP
+            assign(element, variable, value + step)
+            forward = responses(structure, top, base)
+            assign(element, variable, value - step)
+            backward = responses(structure, top, base)
+            element.section, element.material = section, material
+            for name in RESPONSES:
+                difference = (forward[name] - backward[name]) / (2 * step)
+                scale = np.abs(derivatives[name][:, column]).max()
+                error = abs(difference - derivatives[name][row, column])
+                errors[name] = max(errors[name], float(error / scale if scale > 0 else error))
+    return errors
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--elements', type=int, default=6)
+    parser.add_argument('--tolerance', type=float, default=1e-4)
+    parser.add_argument('--output', help='JSON file for the result')
+    arguments = parser.parse_args()
+
+    result = {'benchmark': 'check_sensitivity',
+              'settlement': SETTLEMENT,
+              'relative_errors': check(arguments.elements),
+              'tolerance': arguments.tolerance}
+    result['passed'] = bool(max(result['relative_errors'].values()) <= arguments.tolerance)
+    text = json.dumps(result, indent=2)
+    print(text)
+    if arguments.output:
+        with open(arguments.output, 'w') as file:
+            file.write(text)
+    return 0 if result['passed'] else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,116 @@
+"""
+Parametric models used by the benchmarks. Every generator returns a list of elements with restrained supports and
+lateral and gravity nodal forces, ready to be assembled in a Structure. The sizes grow with the parameters so the
+phases of the analysis can be timed on models of any size.
+
+Functions:
+    frame_2d(stories, bays): plane moment frame of TwoDimensionalFrameElement, fixed bases
+    frame_3d(stories, bays_x, bays_z): space moment frame of FrameElement, fixed bases
+    space_truss(bays_x, bays_z, depth): double-layer grid of TrussElement, pinned at the corners
+    pyramid_lattice(levels): stacked pyramids of FrameElement legs and TrussElement braces, modelled on
+                             Examples/Pyramid_Frame.py
+"""
+
+
+from StructuralAnalysis import Node, Section, Material
+from StructuralAnalysis.FrameElements import FrameElement, TrussElement, TwoDimensionalFrameElement
+
+STEEL = Material.Steel(250, 400, 200000, 0.3)
+COLUMN = Section.Rectangle(400, 400)
+BEAM = Section.Rectangle(300, 600)
+BAR = Section.Circle(40)
+
+
+def __fix(node, dof_numbers=(1, 2, 3, 4, 5, 6)):
+    for number in dof_numbers:
+        getattr(node, 'dof_%d' % number).restrained = True
+
+
+def frame_2d(stories, bays, story_height=3000, bay_width=6000):
+    nodes = [[Node(i * bay_width, j * story_height, 0) for i in range(bays + 1)] for j in range(stories + 1)]
+    elements = []
+    for j in range(stories):
+        for i in range(bays + 1):
+            elements.append(TwoDimensionalFrameElement(nodes[j][i], nodes[j + 1][i], COLUMN, STEEL))
+        for i in range(bays):
+            elements.append(TwoDimensionalFrameElement(nodes[j + 1][i], nodes[j + 1][i + 1], BEAM, STEEL))
+    for node in nodes[0]:
+        __fix(node, (1, 2, 6))
+    for row in nodes[1:]:
+        row[0].dof_1.force = 10000
+        for node in row:
+            node.dof_2.force = -20000
+    return elements
+
+
+def frame_3d(stories, bays_x, bays_z, story_height=3000, bay_width=6000):
+    nodes = [[[Node(i * bay_width, j * story_height, k * bay_width) for k in range(bays_z + 1)]
+              for i in range(bays_x + 1)] for j in range(stories + 1)]
+    elements = []
+    for j in range(stories):
+        for i in range(bays_x + 1):
+            for k in range(bays_z + 1):
+                elements.append(FrameElement(nodes[j][i][k], nodes[j + 1][i][k], COLUMN, STEEL))
+                if i < bays_x:
+                    elements.append(FrameElement(nodes[j + 1][i][k], nodes[j + 1][i + 1][k], BEAM, STEEL))
+                if k < bays_z:
+                    elements.append(FrameElement(nodes[j + 1][i][k], nodes[j + 1][i][k + 1], BEAM, STEEL))
+    for plane in nodes[0]:
+        for node in plane:
+            __fix(node)
+    for floor in nodes[1:]:
+        floor[0][0].dof_1.force = 10000
+        for plane in floor:
+            for node in plane:
+                node.dof_2.force = -20000
+    return elements
+
+
+def space_truss(bays_x, bays_z, depth=1500, spacing=3000):
+    top = [[Node(i * spacing, depth, k * spacing) for k in range(bays_z + 1)] for i in range(bays_x + 1)]
+    bottom = [[Node((i + 0.5) * spacing, 0, (k + 0.5) * spacing) for k in range(bays_z)] for i in range(bays_x)]
+    elements = []
+    for i in range(bays_x + 1):
+        for k in range(bays_z + 1):
+            if i < bays_x:
+                elements.append(TrussElement(top[i][k], top[i + 1][k], BAR, STEEL))
+            if k < bays_z:
+                elements.append(TrussElement(top[i][k], top[i][k + 1], BAR, STEEL))
+    for i in range(bays_x):
+        for k in range(bays_z):
+            for corner in (top[i][k], top[i + 1][k], top[i][k + 1], top[i + 1][k + 1]):
+                elements.append(TrussElement(bottom[i][k], corner, BAR, STEEL))
+            if i + 1 < bays_x:
+                elements.append(TrussElement(bottom[i][k], bottom[i + 1][k], BAR, STEEL))
+            if k + 1 < bays_z:
+                elements.append(TrussElement(bottom[i][k], bottom[i][k + 1], BAR, STEEL))
+    for i, k in ((0, 0), (bays_x, 0), (0, bays_z), (bays_x, bays_z)):
+        __fix(top[i][k], (1, 2, 3))
+    for row in top:
+        for node in row:
+            node.dof_2.force = -5000
+    return elements
+
+
+def pyramid_lattice(levels, width=2000, height=1500):
+    """levels x levels pyramids per level, every pyramid is two frame legs and two truss braces to its apex"""
+    elements = []
+    base = [[Node(i * width, 0, k * width) for k in range(levels + 1)] for i in range(levels + 1)]
+    for plane in base:
+        for node in plane:
+            __fix(node, (1, 2, 3, 4, 5, 6))
+    for level in range(levels):
+        count = levels - level
+        apexes = [[Node((i + 0.5 + level / 2) * width, (level + 1) * height, (k + 0.5 + level / 2) * width)
+                   for k in range(count)] for i in range(count)]
+        for i in range(count):
+            for k in range(count):
+                apex = apexes[i][k]
+                elements.append(FrameElement(base[i][k], apex, COLUMN, STEEL))
+                elements.append(FrameElement(base[i + 1][k + 1], apex, COLUMN, STEEL))
+                elements.append(TrussElement(base[i + 1][k], apex, BAR, STEEL))
+                elements.append(TrussElement(base[i][k + 1], apex, BAR, STEEL))
+                apex.dof_2.force = -7000
+                apex.dof_1.force = 1000
+        base = apexes
+    return elements
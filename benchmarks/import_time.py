@@ -0,0 +1,67 @@
+"""
+Measures the time taken by "import StructuralAnalysis" in fresh interpreters and checks that the import does not load
+the Qt/OpenGL stack or scipy (the viewer, the solvers and the feature modules must stay lazy so headless analysis
+workers start fast).
+Usage:
+    python benchmarks/import_time.py [--repeat 5] [--max-seconds 1.0] [--output import_time.json]
+Exits with status 1 if a GUI or scipy module is imported or the median import time exceeds --max-seconds.
+"""
+
+
+import os
+import sys
+import json
+import argparse
+import statistics
+import subprocess
+
+GUI_MODULES = ('PyQt5', 'PySide2', 'PySide6', 'PyQt6', 'pyqtgraph', 'OpenGL')
+HEAVY_MODULES = ('scipy',)
+SCRIPT = """
+import sys, time, json
+start = time.perf_counter()
+import StructuralAnalysis
+seconds = time.perf_counter() - start
+print(json.dumps({'seconds': seconds,
+                  'gui_modules': sorted(m for m in sys.modules if m.split('.')[0] in %r),
+                  'heavy_modules': sorted(m for m in sys.modules if m.split('.')[0] in %r)}))
+""" % (GUI_MODULES, HEAVY_MODULES)
+
+
+def measure(repeat):
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    environment = dict(os.environ, PYTHONPATH=os.pathsep.join(filter(None, [root, os.environ.get('PYTHONPATH')])))
+    runs = []
+    for _ in range(repeat):
+        output = subprocess.run([sys.executable, '-c', SCRIPT], env=environment, check=True,
+                                capture_output=True, text=True).stdout
+        runs.append(json.loads(output.strip().splitlines()[-1]))
+    return {'benchmark': 'import_time',
+            'python': sys.version.split()[0],
+            'runs': [run['seconds'] for run in runs],
+            'median_seconds': statistics.median(run['seconds'] for run in runs),
+            'gui_modules': sorted(set(module for run in runs for module in run['gui_modules'])),
+            'heavy_modules': sorted(set(module for run in runs for module in run['heavy_modules']))}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--max-seconds', type=float, default=1.0)
+    parser.add_argument('--output', help='JSON file for the result')
+    arguments = parser.parse_args()
+
+    result = measure(arguments.repeat)
+    result['max_seconds'] = arguments.max_seconds
+    result['passed'] = not result['gui_modules'] and not result['heavy_modules'] and \
+        result['median_seconds'] <= arguments.max_seconds
+    text = json.dumps(result, indent=2)
+    print(text)
+    if arguments.output:
+        with open(arguments.output, 'w') as file:
+            file.write(text)
+    return 0 if result['passed'] else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,155 @@
+"""
+Times every phase of a first-order elastic analysis on the parametric models of generators.py and records the peak
+memory allocated by each phase (tracemalloc). The results are written as JSON so runs of different versions can be
+compared automatically.
+Phases: structure (Structure construction), element_stiffness (element.matrix of every element),
+        global_elastic_matrix, partition_global_matrix, solve (displacements), reactions,
+        post_processing (MemberForces end forces and internal actions at 10 stations)
+Usage:
+    python benchmarks/run_benchmarks.py [--size small|medium|large] [--models frame_2d ...] [--repeat 3]
+                                        [--no-memory] [--output results.json]
+    python benchmarks/run_benchmarks.py --compare old.json new.json [--tolerance 0.2]
+The comparison exits with status 1 if a phase of a model became slower than (1 + tolerance) times its old time.
+"""
+
+
+import os
+import sys
+import json
+import time
+import argparse
+import platform
+import tracemalloc
+from contextlib import contextmanager
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import numpy as np
+import generators
+from StructuralAnalysis import Structure, MemberForces
+from StructuralAnalysis.__SolverHelper import global_elastic_matrix, partition_global_matrix, force_vector, \
+    restrained_displacement_vector, solve_for_displacements, solve_for_reactions
+
+SIZES = {'small': {'frame_2d': (5, 3), 'frame_3d': (2, 2, 2), 'space_truss': (4, 4), 'pyramid_lattice': (3,)},
+         'medium': {'frame_2d': (15, 5), 'frame_3d': (4, 3, 3), 'space_truss': (8, 8), 'pyramid_lattice': (6,)},
+         'large': {'frame_2d': (30, 8), 'frame_3d': (8, 4, 4), 'space_truss': (14, 14), 'pyramid_lattice': (10,)}}
+PHASES = ('structure', 'element_stiffness', 'global_elastic_matrix', 'partition_global_matrix', 'solve',
+          'reactions', 'post_processing')
+
+
+@contextmanager
+def phase(records, name, memory):
+    if memory:
+        tracemalloc.start()
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        # a failing phase is still recorded and never leaves tracemalloc running for the next one
+        seconds = time.perf_counter() - start
+        record = records.setdefault(name, {})
+        if memory:
+            record['peak_bytes'] = tracemalloc.get_traced_memory()[1]
+            tracemalloc.stop()
+        else:
+            record['seconds'] = seconds
+
+
+def run_pipeline(model, parameters, memory):
+    """runs every phase on a new model; returns {phase: {'seconds' or 'peak_bytes': value}} and the model size"""
+    records = {}
+    elements = getattr(generators, model)(*parameters)
+    with phase(records, 'structure', memory):
+        structure = Structure(elements)
+    with phase(records, 'element_stiffness', memory):
+        for element in structure.elements:
+            element.matrix
+    with phase(records, 'global_elastic_matrix', memory):
+        matrix = global_elastic_matrix(structure)
+    with phase(records, 'partition_global_matrix', memory):
+        ff, fs, sf, ss = partition_global_matrix(structure, matrix)
+    settlements = restrained_displacement_vector(structure)
+    forces = force_vector(structure)
+    with phase(records, 'solve', memory):
+        displacements = solve_for_displacements(structure, ff, fs, settlements, forces)
+    with phase(records, 'reactions', memory):
+        solve_for_reactions(structure, displacements, settlements, sf, ss)
+    with phase(records, 'post_processing', memory):
+        MemberForces(structure).internal_actions(10)
+    size = {'elements': len(structure.elements), 'nodes': len(structure.nodes),
+            'free_degrees_of_freedom': len(structure.free_degrees_of_freedom)}
+    return records, size
+
+
+def run(size, models, repeat, memory):
+    results = []
+    for model in models:
+        parameters = SIZES[size][model]
+        runs = [run_pipeline(model, parameters, False) for _ in range(repeat)]
+        model_size = runs[0][1]
+        phases = {name: {'seconds': float(np.median([records[name]['seconds'] for records, _ in runs]))}
+                  for name in PHASES}
+        if memory:
+            records, _ = run_pipeline(model, parameters, True)
+            for name in PHASES:
+                phases[name]['peak_bytes'] = records[name]['peak_bytes']
+        results.append({'model': model, 'parameters': list(parameters), 'size': model_size, 'phases': phases,
+                        'total_seconds': sum(record['seconds'] for record in phases.values())})
+        print('%-16s %6d elements %8.3f s' % (model, model_size['elements'], results[-1]['total_seconds']),
+              file=sys.stderr)
+    return {'version': 1, 'size': size, 'repeat': repeat, 'python': platform.python_version(),
+            'numpy': np.__version__, 'machine': platform.machine(), 'processor': platform.processor(),
+            'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S'), 'results': results}
+
+
+def compare(old, new, tolerance):
+    """returns the list of (model, phase, old seconds, new seconds) that became slower than the tolerance allows"""
+    old_results = {(result['model'], tuple(result['parameters'])): result for result in old['results']}
+    regressions = []
+    for result in new['results']:
+        previous = old_results.get((result['model'], tuple(result['parameters'])))
+        if previous is None:
+            continue
+        for name, record in result['phases'].items():
+            if name not in previous['phases']:
+                continue
+            before = previous['phases'][name]['seconds']
+            after = record['seconds']
+            print('%-16s %-24s %10.4f s %10.4f s %+7.1f%%' % (result['model'], name, before, after,
+                                                               100 * (after - before) / max(before, 1e-12)))
+            if after > (1 + tolerance) * before and after - before > 1e-3:
+                regressions.append((result['model'], name, before, after))
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--size', choices=sorted(SIZES), default='small')
+    parser.add_argument('--models', nargs='+', choices=sorted(SIZES['small']), default=sorted(SIZES['small']))
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--no-memory', action='store_true', help='skip the tracemalloc pass')
+    parser.add_argument('--output', help='JSON file for the results (printed if not given)')
+    parser.add_argument('--compare', nargs=2, metavar=('OLD', 'NEW'), help='compare two JSON result files')
+    parser.add_argument('--tolerance', type=float, default=0.2)
+    arguments = parser.parse_args()
+
+    if arguments.compare:
+        with open(arguments.compare[0]) as old_file, open(arguments.compare[1]) as new_file:
+            regressions = compare(json.load(old_file), json.load(new_file), arguments.tolerance)
+        for model, name, before, after in regressions:
+            print('REGRESSION %s %s: %.4f s -> %.4f s' % (model, name, before, after))
+        return 1 if regressions else 0
+
+    results = run(arguments.size, arguments.models, arguments.repeat, not arguments.no_memory)
+    text = json.dumps(results, indent=2)
+    if arguments.output:
+        with open(arguments.output, 'w') as file:
+            file.write(text)
+    else:
+        print(text)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
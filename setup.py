@@ -17,12 +17,13 @@ setuptools.setup(
     install_requires=["numpy==1.19.5",
                       "PyOpenGL==3.1.5",
                       "PyQt5==5.15.2",
-                      "pyqtgraph==0.11.1"],
+                      "pyqtgraph==0.11.1",
+                      "scipy==1.6.0"],
 
     classifiers=[
         "Programming Language :: Python :: 3",
         "License :: OSI Approved :: MIT License",
         "Operating System :: OS Independent",
     ],
-    python_requires='>=3.6',
+    python_requires='>=3.8',
 )
\ No newline at end of file